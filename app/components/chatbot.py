@@ -1,6 +1,7 @@
 # app/components/chatbot.py - ChatBot ARREGLADO con Gráficas Detalladas
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
@@ -8,10 +9,47 @@ import re
 import random
 import logging
 
+from app.components.fragmentos import recargar_fragmento
+from app.core.config import config
 from app.core.database import db_manager
+from app.core.estadisticas import calcular_estadisticas
+from app.core.inquilino_schema import TABLA_CATEGORIAS
+from app.core.inquilinos_frame import perfil_inquilino, registro_poblacion
+from app.core.recomendaciones import (
+    UMBRAL_MEJORES_OPCIONES,
+    obtener_factores_comunes,
+    obtener_recomendaciones,
+)
 
 logger = logging.getLogger(__name__)
 
+# Campos que no hacen falta para listar o comparar perfiles en búsquedas
+PROYECCION_PERFIL = {"_id": 0, "cedula": 0, "created_at": 0, "updated_at": 0}
+
+# Tope de candidatos que se comparan entre sí al armar un grupo (costo O(n²))
+MIN_CANDIDATOS_GRUPO = 100
+
+# Compatibilidad por reglas: factores principales con pesos altos
+FACTORES_PESOS = {
+    'fumador': 0.20,
+    'orden': 0.15,
+    'bioritmo': 0.15,
+    'mascotas': 0.10,
+    'deporte': 0.10,
+    'visitas': 0.05,
+    'personalidad': 0.10,
+    'edad': 0.10
+}
+
+# Factores blandos con pesos menores
+FACTORES_PESOS_EXTRA = {
+    'nivel_educativo': 0.02,
+    'musica_tipo': 0.02,
+    'plan_perfecto': 0.02,
+    'instrumento': 0.02,
+    'rol': 0.02
+}
+
 def mostrar_chatbot_avanzado(motor_ia):
     """🤖 ChatBot ARREGLADO con visualizaciones avanzadas"""
     
@@ -19,9 +57,6 @@ def mostrar_chatbot_avanzado(motor_ia):
     if 'mensajes_chat' not in st.session_state:
         st.session_state.mensajes_chat = []
     
-    if 'inquilinos_df' not in st.session_state:
-        st.session_state.inquilinos_df = cargar_inquilinos_data()
-    
     # Header mejorado
     st.markdown("""
     <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
@@ -31,6 +66,19 @@ def mostrar_chatbot_avanzado(motor_ia):
     </div>
     """, unsafe_allow_html=True)
     
+    panel_chat(motor_ia)
+
+@st.fragment
+def panel_chat(motor_ia):
+    """
+    Panel del chat como fragmento: enviar un mensaje o pulsar una sugerencia
+    vuelve a ejecutar solo este panel, no la página completa.
+    Depende de: st.session_state.mensajes_chat, la versión de población de la
+    sesión (st.session_state.version_poblacion) y el motor IA compartido.
+    """
+    # Fijar la última instantánea compartida (solo se guarda su versión)
+    cargar_inquilinos_data()
+    
     # Mostrar historial de mensajes
     mostrar_historial_chat()
     
@@ -41,20 +89,31 @@ def mostrar_chatbot_avanzado(motor_ia):
     mostrar_sugerencias_preguntas(motor_ia)
 
 def cargar_inquilinos_data():
-    """Carga datos de inquilinos"""
+    """
+    Actualiza la instantánea compartida del proceso (sincronizada por deltas)
+    y guarda en la sesión solo su número de versión.
+    """
     try:
-        data = db_manager.obtener_todos_inquilinos()
-        if data:
-            df = pd.DataFrame(data)
-            if 'id_inquilino' in df.columns:
-                df['id_inquilino'] = pd.to_numeric(df['id_inquilino'], errors='coerce')
-                df = df.dropna(subset=['id_inquilino']).astype({'id_inquilino': int})
-            return df
-        return pd.DataFrame()
+        instantanea = registro_poblacion.actual()
+        st.session_state.version_poblacion = instantanea.version
+        return instantanea.almacen.vista()
     except Exception as e:
         logger.error(f"Error cargando datos: {e}")
         return pd.DataFrame()
 
+def poblacion_sesion(completa=False):
+    """
+    DataFrame (solo lectura) de la versión de población que usa esta sesión:
+    las columnas compactas sin copiar o, con `completa`, también nombres y
+    texto libre (carga la tabla lateral la primera vez)
+    """
+    try:
+        instantanea = registro_poblacion.obtener(st.session_state.get('version_poblacion'))
+        return instantanea.df if completa else instantanea.almacen.vista()
+    except Exception as e:
+        logger.error(f"Error obteniendo población: {e}")
+        return pd.DataFrame()
+
 def mostrar_historial_chat():
     """Muestra el historial de mensajes del chat - ARREGLADO"""
     
@@ -143,7 +202,7 @@ def mostrar_mensaje_bot(contenido, timestamp, datos=None):
     
     # Si hay datos adicionales (gráficas), mostrarlas
     if datos and datos.get('tipo') == 'estadisticas_detalladas':
-        mostrar_graficas_estadisticas(datos['df'])
+        mostrar_graficas_estadisticas(datos['estadisticas'])
 
 def mostrar_input_chat(motor_ia):
     """Input del chat - ARREGLADO"""
@@ -163,12 +222,12 @@ def mostrar_input_chat(motor_ia):
         
         if enviar and mensaje.strip():
             procesar_mensaje(mensaje.strip(), motor_ia)
-            st.rerun()
+            recargar_fragmento()
 
 def mostrar_sugerencias_preguntas(motor_ia):
     """Sugerencias mejoradas"""
     
-    df = st.session_state.inquilinos_df
+    df = poblacion_sesion()
     
     if not df.empty:
         st.markdown("---")
@@ -182,22 +241,22 @@ def mostrar_sugerencias_preguntas(motor_ia):
         with col1:
             if st.button("📊 Estadísticas detalladas", key="btn_stats_det"):
                 procesar_mensaje("Muéstrame estadísticas detalladas con gráficas", motor_ia)
-                st.rerun()
+                recargar_fragmento()
         
         with col2:
             if len(ids_ejemplo) >= 2 and st.button("🤝 Ejemplo compatibilidad", key="btn_compat"):
                 procesar_mensaje(f"¿Cuál es la compatibilidad entre {ids_ejemplo[0]} y {ids_ejemplo[1]}?", motor_ia)
-                st.rerun()
+                recargar_fragmento()
         
         with col3:
             if len(ids_ejemplo) >= 1 and st.button("🏆 Mejores matches", key="btn_matches"):
                 procesar_mensaje(f"Encuentra los mejores matches para {ids_ejemplo[0]}", motor_ia)
-                st.rerun()
+                recargar_fragmento()
         
         with col4:
             if st.button("🔍 Buscar fumadores", key="btn_search"):
                 procesar_mensaje("Busca inquilinos fumadores", motor_ia)
-                st.rerun()
+                recargar_fragmento()
         
         # Segunda fila
         col5, col6, col7, col8 = st.columns(4)
@@ -205,23 +264,23 @@ def mostrar_sugerencias_preguntas(motor_ia):
         with col5:
             if st.button("🏃 Buscar deportistas", key="btn_deport"):
                 procesar_mensaje("Busca inquilinos deportistas", motor_ia)
-                st.rerun()
+                recargar_fragmento()
         
         with col6:
             if st.button("📈 Análisis completo", key="btn_analisis"):
                 procesar_mensaje("Hazme un análisis completo del sistema", motor_ia)
-                st.rerun()
+                recargar_fragmento()
         
         with col7:
             if st.button("❓ Ayuda", key="btn_help"):
                 procesar_mensaje("ayuda", motor_ia)
-                st.rerun()
+                recargar_fragmento()
         
         with col8:
             if len(ids_ejemplo) >= 2 and st.button("🎯 Análisis random", key="btn_random"):
                 id1, id2 = random.sample(ids_ejemplo, 2)
                 procesar_mensaje(f"Analiza la compatibilidad entre {id1} y {id2}", motor_ia)
-                st.rerun()
+                recargar_fragmento()
 
 def procesar_mensaje(mensaje, motor_ia):
     """Procesa mensaje - MEJORADO"""
@@ -246,13 +305,18 @@ def generar_respuesta_avanzada(mensaje, motor_ia):
     """Genera respuesta AVANZADA con datos para gráficas"""
     
     mensaje_lower = mensaje.lower()
-    df = st.session_state.inquilinos_df
+    df = poblacion_sesion()
     
     try:
         # Estadísticas DETALLADAS
         if any(palabra in mensaje_lower for palabra in ['estadística', 'estadísticas', 'resumen', 'datos', 'análisis completo', 'detallad']):
-            respuesta = generar_estadisticas_detalladas(df)
-            datos_extra = {'tipo': 'estadisticas_detalladas', 'df': df}
+            estadisticas = calcular_estadisticas()
+            respuesta = generar_estadisticas_detalladas(estadisticas)
+            datos_extra = {
+                'tipo': 'estadisticas_detalladas',
+                'version': st.session_state.get('version_poblacion'),
+                'estadisticas': estadisticas,
+            }
             return respuesta, datos_extra
         
         # Compatibilidad entre 2 inquilinos
@@ -268,12 +332,12 @@ def generar_respuesta_avanzada(mensaje, motor_ia):
 
         # 🔥 Grupos de inquilinos compatibles
         elif any(palabra in mensaje_lower for palabra in ['grupo', 'armar grupo']):
-            respuesta = generar_grupo_compatible(mensaje_lower, df, motor_ia)
+            respuesta = generar_grupo_compatible(mensaje_lower, motor_ia)
             return respuesta, None
         
         # Búsquedas simples
         elif any(palabra in mensaje_lower for palabra in ['busca', 'encuentra', 'filtra']):
-            respuesta = generar_busqueda_detallada(mensaje_lower, df)
+            respuesta = generar_busqueda_detallada(mensaje_lower)
             return respuesta, None
         
         # Ayuda
@@ -296,15 +360,16 @@ def generar_respuesta_avanzada(mensaje, motor_ia):
         respuesta = f"❌ Lo siento, hubo un error procesando tu solicitud: {str(e)}"
         return respuesta, None
 
-def generar_estadisticas_detalladas(df):
-    """Genera estadísticas MUY DETALLADAS SIN ASTERISCOS"""
+def generar_estadisticas_detalladas(estadisticas):
+    """Genera estadísticas MUY DETALLADAS SIN ASTERISCOS (a partir de la agregación)"""
     
-    if df.empty:
+    total = estadisticas['total']
+    if not total:
         return "❌ No hay inquilinos registrados en el sistema."
     
-    total = len(df)
-    edad_promedio = df['edad'].mean() if 'edad' in df else 0
-    edad_mediana = df['edad'].median() if 'edad' in df else 0
+    edad = estadisticas['edad']
+    edad_promedio = edad['promedio']
+    edad_mediana = edad['mediana']
     
     respuesta = f"""📊 ANÁLISIS ESTADÍSTICO COMPLETO DEL SISTEMA
 
@@ -312,7 +377,7 @@ def generar_estadisticas_detalladas(df):
 • Total de inquilinos registrados: {total}
 • Edad promedio: {edad_promedio:.1f} años
 • Edad mediana: {edad_mediana:.1f} años
-• Rango de edades: {df['edad'].min():.0f} - {df['edad'].max():.0f} años
+• Rango de edades: {edad['min']:.0f} - {edad['max']:.0f} años
 
 📈 DISTRIBUCIÓN POR CARACTERÍSTICAS:
 """
@@ -329,8 +394,8 @@ def generar_estadisticas_detalladas(df):
     }
     
     for categoria, titulo in categorias.items():
-        if categoria in df.columns:
-            conteos = df[categoria].value_counts()
+        conteos = estadisticas['categorias'].get(categoria)
+        if conteos:
             respuesta += f"\n{titulo}:\n"
             
             for valor, count in conteos.items():
@@ -339,8 +404,8 @@ def generar_estadisticas_detalladas(df):
                 respuesta += f"   • {valor}: {count} inquilinos ({porcentaje:.1f}%) {barra}\n"
     
     # Análisis de compatibilidad general
-    if 'compatible' in df.columns:
-        compatibles = (df['compatible'] == 1).sum()
+    compatibles = estadisticas['compatible']['compatibles']
+    if compatibles or estadisticas['compatible']['no_compatibles']:
         porcentaje_compat = (compatibles / total) * 100
         respuesta += f"""
 🎯 ÍNDICE DE COMPATIBILIDAD GENERAL:
@@ -351,19 +416,19 @@ def generar_estadisticas_detalladas(df):
     # Insights adicionales
     respuesta += f"""
 💡 INSIGHTS CLAVE:
-• Perfil predominante: {obtener_perfil_predominante(df)}
-• Oportunidades de matching: {obtener_oportunidades_matching(df)}
-• Recomendación del sistema: {obtener_recomendacion_sistema(df)}
+• Perfil predominante: {obtener_perfil_predominante(estadisticas)}
+• Oportunidades de matching: {obtener_oportunidades_matching(estadisticas)}
+• Recomendación del sistema: {obtener_recomendacion_sistema(estadisticas)}
 
 📊 Consulta las gráficas circulares detalladas abajo para visualizar mejor los datos
 """
     
     return respuesta
 
-def mostrar_graficas_estadisticas(df):
+def mostrar_graficas_estadisticas(estadisticas):
     """Muestra gráficas circulares DETALLADAS tipo reloj"""
     
-    if df.empty:
+    if not estadisticas.get('total'):
         return
     
     st.markdown("### 📊 Visualizaciones Detalladas")
@@ -374,24 +439,24 @@ def mostrar_graficas_estadisticas(df):
     categorias_principales = ['fumador', 'mascotas', 'orden', 'deporte']
     
     for i, categoria in enumerate(categorias_principales):
-        if categoria in df.columns:
+        conteos = estadisticas['categorias'].get(categoria)
+        if conteos:
             with col1 if i % 2 == 0 else col2:
-                crear_grafica_circular(df, categoria)
+                crear_grafica_circular(conteos, categoria)
     
     # Gráfica de edad
-    if 'edad' in df.columns:
+    if estadisticas['edad']['histograma']['conteos']:
         st.markdown("#### 📈 Distribución de Edades")
-        crear_histograma_edad(df)
+        crear_histograma_edad(estadisticas['edad']['histograma'])
     
     # Gráfica de compatibilidad general
-    if 'compatible' in df.columns:
+    compatible = estadisticas['compatible']
+    if compatible['compatibles'] or compatible['no_compatibles']:
         st.markdown("#### 🎯 Índice de Compatibilidad General")
-        crear_grafica_compatibilidad(df)
+        crear_grafica_compatibilidad(compatible)
 
-def crear_grafica_circular(df, categoria):
-    """Crea gráfica circular tipo reloj para una categoría"""
-    
-    conteos = df[categoria].value_counts()
+def crear_grafica_circular(conteos, categoria):
+    """Crea gráfica circular tipo reloj para una categoría (conteos {valor: n})"""
     
     # Colores personalizados según categoría
     colores = {
@@ -402,8 +467,8 @@ def crear_grafica_circular(df, categoria):
     }
     
     fig = go.Figure(data=[go.Pie(
-        labels=conteos.index,
-        values=conteos.values,
+        labels=list(conteos.keys()),
+        values=list(conteos.values()),
         hole=0.4,  # Hace el gráfico tipo donut
         textinfo='label+percent+value',
         textfont_size=12,
@@ -427,19 +492,22 @@ def crear_grafica_circular(df, categoria):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def crear_histograma_edad(df):
-    """Crea histograma de edades"""
+def crear_histograma_edad(histograma):
+    """Crea histograma de edades a partir de los buckets precalculados"""
     
-    fig = px.histogram(
-        df, 
-        x='edad', 
-        nbins=15,
-        title='Distribución de Edades',
-        color_discrete_sequence=['#667eea']
-    )
+    bordes = histograma['bordes']
+    centros = [(a + b) / 2 for a, b in zip(bordes[:-1], bordes[1:])]
+    anchos = [b - a for a, b in zip(bordes[:-1], bordes[1:])]
+    
+    fig = go.Figure(data=[go.Bar(
+        x=centros,
+        y=histograma['conteos'],
+        width=anchos,
+        marker_color='#667eea'
+    )])
     
     fig.update_layout(
-        title={'x': 0.5, 'font': {'size': 16}},
+        title={'text': 'Distribución de Edades', 'x': 0.5, 'font': {'size': 16}},
         xaxis_title="Edad (años)",
         yaxis_title="Número de Inquilinos",
         height=400
@@ -447,11 +515,11 @@ def crear_histograma_edad(df):
     
     st.plotly_chart(fig, use_container_width=True)
 
-def crear_grafica_compatibilidad(df):
+def crear_grafica_compatibilidad(compatible):
     """Crea gráfica de compatibilidad general"""
     
-    compatibles = (df['compatible'] == 1).sum()
-    no_compatibles = (df['compatible'] == 0).sum()
+    compatibles = compatible['compatibles']
+    no_compatibles = compatible['no_compatibles']
     
     fig = go.Figure(data=[go.Pie(
         labels=['Alta Compatibilidad', 'Baja Compatibilidad'],
@@ -478,20 +546,19 @@ def generar_compatibilidad_detallada(id1, id2, df, motor_ia):
     if df.empty:
         return "❌ No hay inquilinos registrados para analizar."
     
-    if id1 not in df['id_inquilino'].values:
+    # Perfiles por la caché de id_inquilino (sin recorrer el DataFrame)
+    row1 = perfil_inquilino(id1, df)
+    if row1 is None:
         return f"❌ No encontré inquilino con ID {id1}"
     
-    if id2 not in df['id_inquilino'].values:
+    row2 = perfil_inquilino(id2, df)
+    if row2 is None:
         return f"❌ No encontré inquilino con ID {id2}"
     
     if id1 == id2:
         return "❌ No puedo analizar la compatibilidad de un inquilino consigo mismo."
     
     try:
-        # Obtener datos completos
-        row1 = df[df['id_inquilino'] == id1].iloc[0]
-        row2 = df[df['id_inquilino'] == id2].iloc[0]
-        
         nombre1 = row1['nombre']
         nombre2 = row2['nombre']
         
@@ -575,59 +642,29 @@ def generar_recomendaciones_detalladas(id_inquilino, df, motor_ia):
     if df.empty:
         return "❌ No hay inquilinos registrados para analizar."
     
-    if id_inquilino not in df['id_inquilino'].values:
+    inquilino_base = perfil_inquilino(id_inquilino, df)
+    if inquilino_base is None:
         return f"❌ No encontré inquilino con ID {id_inquilino}"
     
     try:
-        inquilino_base = df[df['id_inquilino'] == id_inquilino].iloc[0]
         nombre_base = inquilino_base['nombre']
-        otros_inquilinos = df[df['id_inquilino'] != id_inquilino]
         
-        if len(otros_inquilinos) == 0:
-            return "❌ No hay otros inquilinos para generar recomendaciones."
-        
-        # Calcular compatibilidades detalladas con TODOS los inquilinos
-        recomendaciones = []
-        for _, otro in otros_inquilinos.iterrows():
-            try:
-                if motor_ia and motor_ia.is_trained:
-                    try:
-                        resultado = motor_ia.calcular_compatibilidad_avanzada(
-                            id_inquilino, otro['id_inquilino'], df
-                        )
-                        if 'error' not in resultado:
-                            compatibilidad = resultado['compatibilidad_porcentaje']
-                        else:
-                            compatibilidad = calcular_compatibilidad_simple(
-                                id_inquilino, otro['id_inquilino'], df
-                            )
-                    except:
-                        compatibilidad = calcular_compatibilidad_simple(
-                            id_inquilino, otro['id_inquilino'], df
-                        )
-                else:
-                    compatibilidad = calcular_compatibilidad_simple(
-                        id_inquilino, otro['id_inquilino'], df
-                    )
-                
-                # Analizar factores en común y diferencias
-                factores_comunes = obtener_factores_comunes(inquilino_base, otro)
-                diferencias_clave = obtener_diferencias_clave(inquilino_base, otro)
-                
-                recomendaciones.append({
-                    'id': otro['id_inquilino'],
-                    'nombre': otro['nombre'],
-                    'edad': otro.get('edad', 'N/A'),
-                    'compatibilidad': compatibilidad,
-                    'factores_comunes': factores_comunes,
-                    'diferencias': diferencias_clave,
-                    'perfil': obtener_perfil_resumen(otro)
-                })
-            except:
-                continue
+        # Top-K precalculado para la versión del modelo en uso
+        version = motor_ia.metrics.last_training if motor_ia and motor_ia.is_trained else None
+        precalculadas = obtener_recomendaciones(id_inquilino, version)
         
-        # Ordenar por compatibilidad descendente
-        recomendaciones.sort(key=lambda x: x['compatibilidad'], reverse=True)
+        if precalculadas:
+            recomendaciones = recomendaciones_precalculadas(inquilino_base, precalculadas)
+            mejores_opciones = precalculadas['alta_compatibilidad']
+        else:
+            # Inquilino más nuevo que la instantánea (o sin precálculo): puntuación en vivo
+            df = poblacion_sesion(completa=True)
+            otros_inquilinos = df[df['id_inquilino'] != id_inquilino]
+            if len(otros_inquilinos) == 0:
+                return "❌ No hay otros inquilinos para generar recomendaciones."
+            recomendaciones, mejores_opciones = recomendaciones_en_vivo(
+                inquilino_base, otros_inquilinos, motor_ia
+            )
         
         # Generar respuesta limpia SIN ASTERISCOS
         respuesta = f"""🏆 RECOMENDACIONES DETALLADAS PARA {nombre_base} (ID: {id_inquilino})
@@ -654,7 +691,6 @@ def generar_recomendaciones_detalladas(id_inquilino, df, motor_ia):
         # Análisis estadístico
         top_10 = recomendaciones[:10]
         avg_compatibility = sum(r['compatibilidad'] for r in top_10) / len(top_10) if top_10 else 0
-        mejores_opciones = len([r for r in recomendaciones if r['compatibilidad'] >= 70])
         
         respuesta += f"""
 📈 ANÁLISIS ESTADÍSTICO:
@@ -670,10 +706,79 @@ def generar_recomendaciones_detalladas(id_inquilino, df, motor_ia):
     except Exception as e:
         return f"❌ Error generando recomendaciones detalladas: {str(e)}"
 
-def generar_busqueda_detallada(mensaje, df):
-    """Búsqueda DETALLADA con cantidad opcional y filtro de compatibilidad"""
-    
-    if df.empty:
+def detalle_recomendacion(inquilino_base, otro, compatibilidad, factores_comunes):
+    """Entrada de la lista de recomendaciones que muestra el chatbot"""
+    return {
+        'id': otro['id_inquilino'],
+        'nombre': otro['nombre'],
+        'edad': otro.get('edad', 'N/A'),
+        'compatibilidad': compatibilidad,
+        'factores_comunes': factores_comunes,
+        'diferencias': obtener_diferencias_clave(inquilino_base, otro),
+        'perfil': obtener_perfil_resumen(otro)
+    }
+
+def recomendaciones_precalculadas(inquilino_base, precalculadas):
+    """Lista ya ordenada; solo se cargan (en una consulta) los perfiles del top-K"""
+    matches = precalculadas['matches']
+    perfiles = db_manager.obtener_inquilinos_por_ids([m['id_inquilino'] for m in matches])
+    
+    recomendaciones = []
+    for match in matches:
+        perfil = perfiles.get(match['id_inquilino'])
+        if perfil is None:
+            continue  # eliminado después del precálculo
+        recomendaciones.append(detalle_recomendacion(
+            inquilino_base, pd.Series(perfil), match['compatibilidad'], match['factores_comunes']
+        ))
+    return recomendaciones
+
+def recomendaciones_en_vivo(inquilino_base, otros_inquilinos, motor_ia):
+    """
+    Puntúa al inquilino contra todos los demás: en un solo lote con el modelo
+    entrenado, o con las reglas si no lo hay. Devuelve (top-K, mejores opciones)
+    """
+    puntuaciones = None
+    if motor_ia and motor_ia.is_trained:
+        try:
+            modelos = motor_ia.modelos  # una sola versión aunque se publique otra a mitad
+            X_base = motor_ia.codificar_poblacion(inquilino_base.to_frame().T, modelos)
+            X_otros = motor_ia.codificar_poblacion(otros_inquilinos, modelos)
+            # Bosque completo, como las listas precalculadas: misma puntuación por par
+            puntuaciones = motor_ia.puntuar_lote(X_base, X_otros, interactivo=False, modelos=modelos)[0].round(1)
+        except Exception as e:
+            logger.warning(f"Puntuación por lotes no disponible, se usan reglas: {e}")
+    if puntuaciones is None:
+        puntuaciones = compatibilidad_reglas_lote(inquilino_base.to_frame().T, otros_inquilinos)[0]
+    
+    recomendaciones = []
+    for posicion in np.argsort(-puntuaciones, kind='stable')[:config.RECOMENDACIONES_TOP_K]:
+        otro = otros_inquilinos.iloc[posicion]
+        recomendaciones.append(detalle_recomendacion(
+            inquilino_base, otro, float(puntuaciones[posicion]),
+            obtener_factores_comunes(inquilino_base, otro)
+        ))
+    return recomendaciones, int((puntuaciones >= UMBRAL_MEJORES_OPCIONES).sum())
+
+def compilar_filtro(mensaje, terminos):
+    """
+    Traduce la intención del mensaje a un filtro de MongoDB.
+    Devuelve (filtro, termino_usado) o (None, None) si no reconoce ninguno.
+    """
+    for termino, (campo, valor) in terminos.items():
+        if termino in mensaje:
+            filtro = {campo: valor}
+            # Filtro de compatibilidad opcional ("compatible"/"compatibles")
+            if "compatible" in mensaje:
+                filtro["compatible"] = 1
+            return filtro, termino
+    return None, None
+
+def generar_busqueda_detallada(mensaje):
+    """Búsqueda DETALLADA con cantidad opcional y filtro de compatibilidad (resuelta en MongoDB)"""
+    
+    total_poblacion = db_manager.contar_inquilinos()
+    if total_poblacion == 0:
         return "❌ No hay inquilinos registrados para buscar."
     
     # 1️⃣ Detectar cantidad solicitada en el mensaje
@@ -700,38 +805,34 @@ def generar_busqueda_detallada(mensaje, df):
         'introvertido': ('personalidad', 'introvertido')
     }
     
-    campo, valor, termino_usado = None, None, None
-    for termino, (c, v) in busquedas.items():
-        if termino in mensaje:
-            campo, valor, termino_usado = c, v, termino
-            break
+    filtro, termino_usado = compilar_filtro(mensaje, busquedas)
     
-    if not campo:
+    if not filtro:
         return "❓ No entendí qué característica buscas. Intenta con: fumadores, deportistas, ordenados, nocturnos, universitarios, etc."
     
-    # 4️⃣ Filtrar en DataFrame
-    resultados = df[df[campo] == valor]
-    
-    if solo_compatibles and "compatible" in df.columns:
-        resultados = resultados[resultados["compatible"] == 1]
-    
-    total = len(resultados)
+    # 4️⃣ Conteo + edad promedio en el servidor, y solo la página pedida de resultados
+    resumen = db_manager.resumir_busqueda(filtro)
+    total = resumen['total']
     
     if total == 0:
         return f"❌ No encontré inquilinos con la característica '{termino_usado}'"
     
+    resultados = pd.DataFrame(db_manager.buscar_inquilinos(
+        filtro, proyeccion=PROYECCION_PERFIL, limite=cantidad, orden=[("id_inquilino", 1)]
+    ))
+    
     # 5️⃣ Preparar respuesta
     respuesta = f"""🔍 BÚSQUEDA DETALLADA: {termino_usado.upper()}S{" COMPATIBLES" if solo_compatibles else ""}
 
 📊 ESTADÍSTICAS:
-• Total encontrados: {total} de {len(df)} inquilinos ({(total/len(df))*100:.1f}%)
-• Edad promedio: {resultados['edad'].mean():.1f} años
-• Representatividad: {'Alta' if total/len(df) > 0.4 else 'Media' if total/len(df) > 0.2 else 'Baja'}
+• Total encontrados: {total} de {total_poblacion} inquilinos ({(total/total_poblacion)*100:.1f}%)
+• Edad promedio: {resumen['edad_promedio']:.1f} años
+• Representatividad: {'Alta' if total/total_poblacion > 0.4 else 'Media' if total/total_poblacion > 0.2 else 'Baja'}
 
 👥 INQUILINOS ENCONTRADOS (máx {cantidad}):
 """
     
-    for _, inquilino in resultados.head(cantidad).iterrows():
+    for _, inquilino in resultados.iterrows():
         edad = inquilino.get('edad', 'N/A')
         perfil = obtener_perfil_resumen(inquilino)
         respuesta += f"• {inquilino['nombre']} (ID: {inquilino['id_inquilino']}) - {edad} años - {perfil}\n"
@@ -805,38 +906,22 @@ def generar_respuesta_generica_mejorada(mensaje, numeros):
 # FUNCIONES AUXILIARES DETALLADAS
 # ============================================================================
 
-def calcular_compatibilidad_simple(id1, id2, df):
+def calcular_compatibilidad_simple(id1, id2, df=None):
     """Cálculo de compatibilidad mejorado usando TODOS los campos."""
-    try:
-        row1 = df[df['id_inquilino'] == id1].iloc[0]
-        row2 = df[df['id_inquilino'] == id2].iloc[0]
-
-        # Factores principales con pesos altos
-        factores_pesos = {
-            'fumador': 0.20,
-            'orden': 0.15,
-            'bioritmo': 0.15,
-            'mascotas': 0.10,
-            'deporte': 0.10,
-            'visitas': 0.05,
-            'personalidad': 0.10,
-            'edad': 0.10
-        }
-
-        # Factores blandos con pesos menores
-        factores_pesos_extra = {
-            'nivel_educativo': 0.02,
-            'musica_tipo': 0.02,
-            'plan_perfecto': 0.02,
-            'instrumento': 0.02,
-            'rol': 0.02
-        }
+    row1 = perfil_inquilino(id1, df)
+    row2 = perfil_inquilino(id2, df)
+    if row1 is None or row2 is None:
+        return 50.0
+    return compatibilidad_entre_perfiles(row1, row2)
 
+def compatibilidad_entre_perfiles(row1, row2):
+    """Compatibilidad por reglas entre dos perfiles (Series) ya cargados"""
+    try:
         compatibilidad_total = 0
         peso_total = 0
 
         # Comparación de factores principales
-        for factor, peso in factores_pesos.items():
+        for factor, peso in FACTORES_PESOS.items():
             if factor == "edad":
                 if 'edad' in row1 and 'edad' in row2:
                     diff_edad = abs(int(row1['edad']) - int(row2['edad']))
@@ -849,7 +934,7 @@ def calcular_compatibilidad_simple(id1, id2, df):
                     compatibilidad_total += peso
 
         # Comparación de factores blandos (similitud básica)
-        for factor, peso in factores_pesos_extra.items():
+        for factor, peso in FACTORES_PESOS_EXTRA.items():
             if factor in row1.index and factor in row2.index:
                 peso_total += peso
                 val1 = str(row1[factor]).strip().lower()
@@ -865,35 +950,76 @@ def calcular_compatibilidad_simple(id1, id2, df):
     except Exception:
         return 50.0
 
-def obtener_perfil_predominante(df):
+def _codigos_factor(factor, base, candidatos):
+    """
+    Códigos enteros de `factor` en ambos DataFrames: los de TABLA_CATEGORIAS
+    si el campo tiene vocabulario (nulo = SIN_VALOR), o los de factorize
+    (minúsculas, sin espacios) si es texto libre. Como en la comparación de
+    strings, dos nulos coinciden; el texto vacío de un campo libre queda en -1.
+    """
+    if factor in TABLA_CATEGORIAS.valores:
+        return TABLA_CATEGORIAS.codificar(factor, base[factor]), TABLA_CATEGORIAS.codificar(factor, candidatos[factor])
+    textos = pd.concat([base[factor], candidatos[factor]], ignore_index=True).astype(object)
+    textos = textos.where(textos.notna(), "none").astype(str).str.strip().str.lower()
+    codigos, _ = pd.factorize(textos.replace("", None), use_na_sentinel=True)
+    return codigos[:len(base)], codigos[len(base):]
+
+def compatibilidad_reglas_lote(base, candidatos):
+    """
+    Matriz (len(base) × len(candidatos)) de compatibilidad por reglas: los
+    mismos pesos que compatibilidad_entre_perfiles, comparando códigos
+    enteros por columnas en lugar de strings par a par.
+    """
+    total = np.zeros((len(base), len(candidatos)))
+    peso_total = 0.0
+    for factor, peso in {**FACTORES_PESOS, **FACTORES_PESOS_EXTRA}.items():
+        if factor not in base.columns or factor not in candidatos.columns:
+            continue
+        peso_total += peso
+        if factor == "edad":
+            e1 = pd.to_numeric(base['edad'], errors='coerce').to_numpy(dtype=float)
+            e2 = pd.to_numeric(candidatos['edad'], errors='coerce').to_numpy(dtype=float)
+            similitud = np.clip((20 - np.abs(e1[:, None] - e2[None, :])) / 20, 0, None)
+            total += np.nan_to_num(similitud) * peso
+            continue
+        c1, c2 = _codigos_factor(factor, base, candidatos)
+        iguales = c1[:, None] == c2[None, :]
+        if factor in FACTORES_PESOS_EXTRA and factor not in TABLA_CATEGORIAS.valores:
+            iguales &= c1[:, None] >= 0  # en los factores blandos el texto vacío no coincide
+        total += iguales * peso
+
+    if peso_total == 0:
+        return np.full(total.shape, 50.0)
+    return np.round(total / peso_total * 100, 1)
+
+def _proporcion(estadisticas, campo, valor):
+    """Fracción de inquilinos con `campo == valor` según los conteos agregados"""
+    total = estadisticas['total']
+    return estadisticas['categorias'].get(campo, {}).get(valor, 0) / total if total else 0.0
+
+def obtener_perfil_predominante(estadisticas):
     """Determina el perfil predominante"""
-    if df.empty:
+    if not estadisticas['total']:
         return "No determinado"
     
     perfiles = []
-    if 'fumador' in df.columns:
-        no_fumadores = (df['fumador'] == 'no').mean()
-        if no_fumadores > 0.6:
-            perfiles.append("No fumadores")
+    if _proporcion(estadisticas, 'fumador', 'no') > 0.6:
+        perfiles.append("No fumadores")
     
-    if 'deporte' in df.columns:
-        deportistas = (df['deporte'] == 'si').mean()
-        if deportistas > 0.5:
-            perfiles.append("Deportistas")
+    if _proporcion(estadisticas, 'deporte', 'si') > 0.5:
+        perfiles.append("Deportistas")
     
-    if 'orden' in df.columns:
-        ordenados = (df['orden'] == 'ordenada').mean()
-        if ordenados > 0.5:
-            perfiles.append("Ordenados")
+    if _proporcion(estadisticas, 'orden', 'ordenada') > 0.5:
+        perfiles.append("Ordenados")
     
     return ", ".join(perfiles) if perfiles else "Diverso"
 
-def obtener_oportunidades_matching(df):
+def obtener_oportunidades_matching(estadisticas):
     """Determina oportunidades de matching"""
-    if df.empty:
+    total = estadisticas['total']
+    if not total:
         return "No determinado"
     
-    total = len(df)
     if total < 10:
         return "Base pequeña, expandir registro"
     elif total < 50:
@@ -901,14 +1027,15 @@ def obtener_oportunidades_matching(df):
     else:
         return "Base amplia, excelentes oportunidades"
 
-def obtener_recomendacion_sistema(df):
+def obtener_recomendacion_sistema(estadisticas):
     """Recomendación general del sistema"""
-    if df.empty:
+    total = estadisticas['total']
+    if not total:
         return "Registrar más inquilinos"
     
-    total = len(df)
-    if 'compatible' in df.columns:
-        tasa_compat = (df['compatible'] == 1).mean()
+    compatible = estadisticas['compatible']
+    if compatible['compatibles'] or compatible['no_compatibles']:
+        tasa_compat = compatible['compatibles'] / total
         if tasa_compat > 0.6:
             return "Sistema optimizado para matches exitosos"
         elif tasa_compat > 0.4:
@@ -953,18 +1080,6 @@ def obtener_consejos_convivencia(analisis_factores, compatibilidad):
     
     return "\n" + "\n".join(consejos) if consejos else "\n• Excelente base para una convivencia armoniosa"
 
-def obtener_factores_comunes(inquilino1, inquilino2):
-    """Identifica factores en común entre dos inquilinos"""
-    factores = ['fumador', 'mascotas', 'orden', 'deporte', 'bioritmo', 'nivel_educativo']
-    comunes = []
-    
-    for factor in factores:
-        if factor in inquilino1.index and factor in inquilino2.index:
-            if inquilino1[factor] == inquilino2[factor]:
-                comunes.append(f"{factor}: {inquilino1[factor]}")
-    
-    return comunes
-
 def obtener_diferencias_clave(inquilino1, inquilino2):
     """
     Devuelve lista de diferencias relevantes entre dos inquilinos.
@@ -1036,14 +1151,16 @@ def obtener_analisis_grupo(grupo_df):
     
     return "\n• " + "\n• ".join(analisis) if analisis else "\nGrupo diverso sin características predominantes"
 
-def generar_grupo_compatible(mensaje, df, motor_ia=None):
+def generar_grupo_compatible(mensaje, motor_ia=None):
     """
     Genera un grupo de N inquilinos que cumplen una condición
     (ej: deportistas, fumadores) y que además son compatibles entre sí.
+    Los candidatos se filtran en MongoDB y se muestrean al azar; solo se
+    trae un grupo acotado.
     """
     import re
     
-    if df.empty:
+    if db_manager.contar_inquilinos() == 0:
         return "❌ No hay inquilinos registrados en la base."
     
     # Detectar cantidad pedida (default = 10)
@@ -1059,37 +1176,32 @@ def generar_grupo_compatible(mensaje, df, motor_ia=None):
         "nocturno": ("bioritmo", "nocturno"),
     }
     
-    campo, valor = None, None
-    for termino, (c, v) in filtros.items():
-        if termino in mensaje:
-            campo, valor = c, v
-            break
+    filtro, _ = compilar_filtro(mensaje, filtros)
     
-    if not campo:
+    if not filtro:
         return "❓ No entendí qué grupo deseas. Ej: 'busca 10 inquilinos deportistas compatibles'."
-    
-    # Filtrar candidatos
-    candidatos = df[df[campo] == valor]
-    
-    if "compatible" in mensaje and "compatible" in df.columns:
-        candidatos = candidatos[candidatos["compatible"] == 1]
-    
-    if len(candidatos) < cantidad:
-        return f"⚠️ Solo encontré {len(candidatos)} inquilinos que cumplen el filtro."
-    
-    # Calcular compatibilidad promedio de cada inquilino con el resto
-    puntajes = []
-    for _, row in candidatos.iterrows():
-        comp_sum, count = 0, 0
-        for _, other in candidatos.iterrows():
-            if row["id_inquilino"] != other["id_inquilino"]:
-                compat = calcular_compatibilidad_simple(
-                    row["id_inquilino"], other["id_inquilino"], df
-                )
-                comp_sum += compat
-                count += 1
-        if count > 0:
-            puntajes.append((row, comp_sum / count))
+    campo = next(iter(filtro))
+    
+    # Contar en el servidor antes de traer candidatos
+    total_candidatos = db_manager.contar_inquilinos(filtro)
+    if total_candidatos < cantidad:
+        return f"⚠️ Solo encontré {total_candidatos} inquilinos que cumplen el filtro."
+    
+    # Muestra al azar (no los IDs más bajos): todos los inquilinos pueden entrar en un grupo
+    candidatos = pd.DataFrame(db_manager.muestrear_inquilinos(
+        filtro,
+        n=max(MIN_CANDIDATOS_GRUPO, cantidad * 5),
+        proyeccion=PROYECCION_PERFIL,
+    ))
+    
+    # Calcular compatibilidad promedio de cada inquilino con el resto (matriz por códigos)
+    matriz = compatibilidad_reglas_lote(candidatos, candidatos)
+    otros = candidatos["id_inquilino"].to_numpy()[:, None] != candidatos["id_inquilino"].to_numpy()[None, :]
+    conteos = otros.sum(axis=1)
+    medias = np.where(otros, matriz, 0).sum(axis=1) / np.maximum(conteos, 1)
+    puntajes = [
+        (candidatos.iloc[i], medias[i]) for i in range(len(candidatos)) if conteos[i] > 0
+    ]
     
     # Ordenar por compatibilidad
     puntajes.sort(key=lambda x: x[1], reverse=True)
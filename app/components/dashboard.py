@@ -10,7 +10,9 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import logging
 
-from app.core.database import db_manager   # ✅ importar instancia global
+from app.core.database import db_manager
+from app.core.database_async import reunir
+from app.core.estadisticas import calcular_estadisticas
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +23,11 @@ def mostrar_dashboard_completo(motor_ia):
     """
     📊 Dashboard completo con analítica avanzada
     """
-    # Cargar datos desde DB
-    inquilinos_data = db_manager.obtener_todos_inquilinos()
-    if not inquilinos_data:
+    # Conteo por metadatos (O(1)); cada pestaña pide luego sus propios datos
+    if not db_manager.contar_inquilinos():
         st.warning("⚠️ No hay datos registrados en la base.")
         return
 
-    df = pd.DataFrame(inquilinos_data)
-
     st.markdown("""
     <div style='padding:1rem; background:#f9f9f9; border-radius:10px; margin-bottom:1rem;'>
         <h2 style='text-align:center;'>📊 Dashboard RoomMatchAI</h2>
@@ -43,28 +42,54 @@ def mostrar_dashboard_completo(motor_ia):
     ])
 
     with tab1:
-        _mostrar_resumen_general(df, motor_ia)
+        _tab_resumen(motor_ia)
 
     with tab2:
-        _mostrar_patrones(df, motor_ia)
+        _tab_patrones(motor_ia)
+
+
+@st.fragment
+def _tab_resumen(motor_ia):
+    """
+    Pestaña de resumen como fragmento: se refresca sola sin re-ejecutar la página.
+    Depende de: calcular_estadisticas() y las métricas del motor IA.
+    """
+    # Estadísticas ($facet) y métricas del modelo se piden en paralelo
+    datos = reunir(
+        estadisticas=calcular_estadisticas,
+        metricas=motor_ia.obtener_metricas_modelo if motor_ia else dict,
+    )
+    _mostrar_resumen_general(datos["estadisticas"], datos["metricas"])
+    st.button("🔄 Actualizar estadísticas", key="dashboard_actualizar")
+
+
+@st.fragment
+def _tab_patrones(motor_ia):
+    """Pestaña de patrones como fragmento. Depende de: el motor IA compartido"""
+    _mostrar_patrones(motor_ia)
 
 
 # ============================================================================
 # SECCIÓN 1: MÉTRICAS Y DISTRIBUCIÓN
 # ============================================================================
-def _mostrar_resumen_general(df: pd.DataFrame, motor_ia):
+def _mostrar_resumen_general(estadisticas: dict, metricas: dict):
     """Resumen general del sistema"""
     st.subheader("📋 Resumen Ejecutivo")
 
+    # El fragmento se refresca solo: la colección puede haberse vaciado desde que cargó la página
+    total = estadisticas.get("total", 0)
+    if not total:
+        st.warning("⚠️ No hay datos registrados en la base.")
+        return
+
     col1, col2, col3, col4, col5 = st.columns(5)
 
-    total = len(df)
-    edad_prom = df["edad"].mean() if "edad" in df else 0
-    fumadores = (df["fumador"] == "si").mean() * 100 if "fumador" in df else 0
-    mascotas = (df["mascotas"] == "con mascotas").mean() * 100 if "mascotas" in df else 0
+    categorias = estadisticas["categorias"]
+    edad_prom = estadisticas["edad"]["promedio"]
+    fumadores = categorias["fumador"].get("si", 0) / total * 100
+    mascotas = categorias["mascotas"].get("con mascotas", 0) / total * 100
 
     # Métricas IA
-    metricas = motor_ia.obtener_metricas_modelo() if motor_ia else {}
     accuracy = metricas.get("accuracy", 0) * 100
 
     col1.metric("👥 Inquilinos", f"{total:,}")
@@ -78,12 +103,12 @@ def _mostrar_resumen_general(df: pd.DataFrame, motor_ia):
     # Distribuciones
     col_a, col_b = st.columns(2)
     with col_a:
-        _graficos_distribucion(df)
+        _graficos_distribucion(estadisticas["categorias"])
     with col_b:
-        _mapa_correlaciones(df)
+        _mapa_correlaciones(estadisticas["correlaciones"])
 
 
-def _graficos_distribucion(df: pd.DataFrame):
+def _graficos_distribucion(categorias: dict):
     """Gráfico de distribución principal"""
     st.markdown("### 📊 Distribución de Características")
     features = ["fumador", "mascotas", "orden", "deporte"]
@@ -96,12 +121,12 @@ def _graficos_distribucion(df: pd.DataFrame):
     )
 
     for i, feature in enumerate(features):
-        if feature in df:
-            vals = df[feature].value_counts()
+        vals = categorias.get(feature)
+        if vals:
             row = (i // cols) + 1
             col = (i % cols) + 1
             fig.add_trace(
-                go.Pie(labels=vals.index, values=vals.values, name=feature),
+                go.Pie(labels=list(vals.keys()), values=list(vals.values()), name=feature),
                 row=row, col=col
             )
 
@@ -110,26 +135,20 @@ def _graficos_distribucion(df: pd.DataFrame):
     st.plotly_chart(fig, config={"responsive": True})
 
 
-def _mapa_correlaciones(df: pd.DataFrame):
-    """Mapa de correlaciones numéricas básicas"""
+def _mapa_correlaciones(correlaciones: dict):
+    """Mapa de correlaciones de los indicadores binarios (calculado en la agregación)"""
     st.markdown("### 🔥 Correlaciones")
-    corr_df = pd.DataFrame()
-
-    if "fumador" in df:
-        corr_df["fumador"] = (df["fumador"] == "si").astype(int)
-    if "mascotas" in df:
-        corr_df["mascotas"] = (df["mascotas"] == "con mascotas").astype(int)
-    if "orden" in df:
-        corr_df["orden"] = (df["orden"] == "ordenada").astype(int)
-    if "deporte" in df:
-        corr_df["deporte"] = (df["deporte"] == "si").astype(int)
-
-    if corr_df.empty:
+
+    if not correlaciones.get("matriz"):
         st.info("⚠️ No hay suficientes datos categóricos.")
         return
 
+    corr_df = pd.DataFrame(
+        correlaciones["matriz"], index=correlaciones["campos"], columns=correlaciones["campos"]
+    ).astype(float)
+
     fig = px.imshow(
-        corr_df.corr(),
+        corr_df,
         text_auto=True,
         color_continuous_scale="RdBu_r",
         title="Mapa de Correlaciones"
@@ -140,7 +159,7 @@ def _mapa_correlaciones(df: pd.DataFrame):
 # ============================================================================
 # SECCIÓN 2: PATRONES DE IA
 # ============================================================================
-def _mostrar_patrones(df: pd.DataFrame, motor_ia):
+def _mostrar_patrones(motor_ia):
     """Patrones descubiertos por IA"""
     st.subheader("🧠 Patrones Descubiertos")
 
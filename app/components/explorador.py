@@ -0,0 +1,70 @@
+# app/components/explorador.py
+import streamlit as st
+import pandas as pd
+
+from app.components.fragmentos import recargar_fragmento
+from app.core.database import db_manager
+
+# Filtros disponibles: etiqueta → (campo, opciones)
+FILTROS_EXPLORADOR = {
+    "🚬 Fumador": ("fumador", ["si", "no"]),
+    "🐕 Mascotas": ("mascotas", ["con mascotas", "sin mascotas"]),
+    "🧹 Orden": ("orden", ["ordenada", "desordenada"]),
+    "⚽ Deporte": ("deporte", ["si", "no"]),
+    "⏰ Biorritmo": ("bioritmo", ["madrugador", "nocturno"]),
+}
+
+# Sin datos personales sensibles en el listado
+PROYECCION_EXPLORADOR = {"_id": 0, "cedula": 0, "created_at": 0, "updated_at": 0}
+
+TAMANOS_PAGINA = [10, 20, 50, 100]
+
+
+@st.fragment
+def mostrar_explorador():
+    """
+    🔎 Explorador paginado de inquilinos.
+    Cada página se pide a la BD por clave (id_inquilino > cursor), así que
+    solo se trae lo visible sin importar el tamaño de la colección.
+    La sesión guarda la pila de cursores para poder volver atrás.
+    Es un fragmento: cambiar de página solo re-ejecuta el explorador.
+    """
+    st.markdown("## 🔎 Explorador de Inquilinos")
+
+    cols = st.columns(len(FILTROS_EXPLORADOR) + 1)
+    filtro = {}
+    for col, (etiqueta, (campo, opciones)) in zip(cols, FILTROS_EXPLORADOR.items()):
+        valor = col.selectbox(etiqueta, ["todos"] + opciones, key=f"explorador_{campo}")
+        if valor != "todos":
+            filtro[campo] = valor
+    tamano = cols[-1].selectbox("📄 Por página", TAMANOS_PAGINA, index=1, key="explorador_tamano")
+
+    # Reiniciar la paginación si cambian los filtros o el tamaño de página
+    clave = (tuple(sorted(filtro.items())), tamano)
+    if st.session_state.get("explorador_clave") != clave:
+        st.session_state.explorador_clave = clave
+        st.session_state.explorador_cursores = [None]
+
+    cursores = st.session_state.explorador_cursores
+    documentos, siguiente = db_manager.listar_inquilinos_pagina(
+        cursores[-1], tamano, filtro or None, PROYECCION_EXPLORADOR
+    )
+
+    if not documentos:
+        st.info("⚠️ No hay inquilinos que cumplan los filtros.")
+        return
+
+    st.dataframe(pd.DataFrame(documentos), hide_index=True, use_container_width=True)
+
+    col_ant, col_pag, col_sig = st.columns([1, 2, 1])
+    if col_ant.button("◀ Anterior", disabled=len(cursores) == 1):
+        cursores.pop()
+        recargar_fragmento()
+    col_pag.markdown(
+        f"<p style='text-align:center;'>Página {len(cursores)} · IDs "
+        f"{documentos[0]['id_inquilino']}–{documentos[-1]['id_inquilino']}</p>",
+        unsafe_allow_html=True,
+    )
+    if col_sig.button("Siguiente ▶", disabled=siguiente is None):
+        cursores.append(siguiente)
+        recargar_fragmento()
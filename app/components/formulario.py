@@ -1,48 +1,21 @@
 # app/components/formulario.py
 import streamlit as st
 from datetime import datetime
-from app.core.inquilino_schema import Inquilino
+from app.core.inquilino_schema import Inquilino, calcular_compatible_regla_simple
 from app.core.database import db_manager
+from app.core.recomendaciones import agregar_a_recomendaciones
 
 
-def _generar_id_automatico() -> int:
-    """
-    Busca el mayor id_inquilino actual y devuelve el siguiente.
-    Si no hay registros, vuelve 1. Tiene un fallback seguro.
-    """
-    try:
-        datos = db_manager.obtener_todos_inquilinos()  # ✅ corregido
-        if not datos:
-            return 1
-        max_id = max(int(doc.get("id_inquilino", 0)) for doc in datos)
-        return max_id + 1
-    except Exception:
-        # Fallback simple si hubiera algún problema leyendo la DB
-        from time import time
-        return int(time()) % 1_000_000 or 1
-
-
-def _calcular_compatible_regla_simple(d: dict) -> int:
-    """
-    Misma regla del generador demo:
-    +1 si no fuma, +1 ordenada, +1 sin mascotas, +1 deporte, +1 madrugador.
-    Compatible = 1 si puntaje >= 3; si no, 0
-    """
-    puntaje = 0
-    puntaje += 1 if d.get("fumador") == "no" else 0
-    puntaje += 1 if d.get("orden") == "ordenada" else 0
-    puntaje += 1 if d.get("mascotas") == "sin mascotas" else 0
-    puntaje += 1 if d.get("deporte") == "si" else 0
-    puntaje += 1 if d.get("bioritmo") == "madrugador" else 0
-    return 1 if puntaje >= 3 else 0
-
-
-def mostrar_formulario_registro():
+@st.fragment
+def mostrar_formulario_registro(motor_ia=None):
     """
     📝 Formulario de registro de inquilinos con:
     - ID automático obligatorio
     - Edad 0–100
     - compatible calculado automáticamente
+    Es un fragmento: enviar el formulario solo re-ejecuta el formulario.
+    Depende de: db_manager (reserva de ID e inserción) y, si se pasa
+    motor_ia, de las recomendaciones precalculadas (se actualizan en O(N)).
     """
     st.markdown("## 📝 Registro Inteligente de Inquilinos")
     st.write("Completa la información del inquilino. El ID se genera automáticamente.")
@@ -76,12 +49,8 @@ def mostrar_formulario_registro():
 
         if submitted:
             try:
-                # Generar ID obligatorio
-                nuevo_id = _generar_id_automatico()
-
                 # Datos base (sin compatibles aún)
                 payload = {
-                    "id_inquilino": nuevo_id,
                     "nombre": nombre,
                     "cedula": int(cedula) if cedula else None,
                     "edad": edad,
@@ -101,17 +70,30 @@ def mostrar_formulario_registro():
                 }
 
                 # Calcular etiqueta compatible
-                payload["compatible"] = _calcular_compatible_regla_simple(payload)
+                payload["compatible"] = calcular_compatible_regla_simple(payload)
 
                 # Validar con Pydantic
                 nuevo_inquilino = Inquilino(**payload)
 
-                # Insertar en MongoDB
-                db_manager.insertar_inquilino(nuevo_inquilino.dict())  # ✅ corregido
+                # Insertar en MongoDB (el contador asigna el ID al insertar)
+                documento = nuevo_inquilino.dict()
+                if not db_manager.insertar_inquilino(documento):
+                    st.error("❌ No se pudo registrar el inquilino. Intenta de nuevo.")
+                    return
+                nuevo_id = documento["id_inquilino"]
                 st.success(
-                    f"🎉 Inquilino **{nuevo_inquilino.nombre}** registrado con ID **{nuevo_inquilino.id_inquilino}**. "
+                    f"🎉 Inquilino **{nuevo_inquilino.nombre}** registrado con ID **{nuevo_id}**. "
                     f"(compatible={nuevo_inquilino.compatible})"
                 )
 
+                # Mantener al día las listas top-K sin recalcularlas
+                if motor_ia and motor_ia.is_trained:
+                    actualizacion = agregar_a_recomendaciones(nuevo_id, motor_ia)
+                    if actualizacion:
+                        st.caption(
+                            f"🏆 Recomendaciones actualizadas "
+                            f"({actualizacion['listas_actualizadas']} listas incluyen al nuevo inquilino)"
+                        )
+
             except Exception as e:
                 st.error(f"❌ Error al registrar: {e}")
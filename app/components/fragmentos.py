@@ -0,0 +1,15 @@
+# app/components/fragmentos.py
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+
+def recargar_fragmento():
+    """
+    st.rerun acotado al fragmento actual. Si el fragmento se está ejecutando
+    dentro de una ejecución completa de la app (primera carga, navegación),
+    Streamlit no permite el scope "fragment" y se recarga la app entera.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
@@ -0,0 +1,65 @@
+# app/components/panel_trabajos.py
+import streamlit as st
+
+from app.core.trabajos import ESTADOS_ACTIVOS, obtener_gestor_trabajos
+
+# Cada cuántos segundos se consulta el estado de los trabajos
+INTERVALO_SONDEO = 2
+
+ICONOS_ESTADO = {
+    "pendiente": "⏳",
+    "ejecutando": "⚙️",
+    "completado": "✅",
+    "fallido": "❌",
+    "cancelado": "🛑",
+}
+
+
+def mostrar_panel_trabajos(motor_ia):
+    """
+    🛠️ Trabajos en segundo plano: entrenamiento, análisis de sesgos, recomendaciones.
+    Se ejecutan en el pool de procesos; esta página solo los encola y consulta.
+    """
+    st.markdown("## 🛠️ Trabajos en Segundo Plano")
+    gestor = obtener_gestor_trabajos()
+
+    col1, col2, col3 = st.columns(3)
+    if col1.button("🚀 Entrenar modelo", use_container_width=True):
+        gestor.enviar("entrenamiento")
+    if col2.button("⚖️ Analizar sesgos", use_container_width=True):
+        gestor.enviar("sesgos")
+    if col3.button("🏆 Precalcular recomendaciones", use_container_width=True):
+        gestor.enviar("recomendaciones")
+
+    st.markdown("---")
+    _lista_trabajos(motor_ia)
+
+
+@st.fragment(run_every=INTERVALO_SONDEO)
+def _lista_trabajos(motor_ia):
+    """Fragmento que se refresca solo cada INTERVALO_SONDEO segundos"""
+    gestor = obtener_gestor_trabajos()
+    trabajos = gestor.listar(limite=10)
+    if not trabajos:
+        st.info("No hay trabajos registrados.")
+        return
+
+    # main ya revisa en cada ejecución; aquí se repite porque el fragmento se refresca solo
+    if motor_ia and motor_ia.recargar_si_hay_version_nueva():
+        st.toast("🧠 Motor IA actualizado con el último entrenamiento")
+
+    for trabajo in trabajos:
+        icono = ICONOS_ESTADO.get(trabajo["estado"], "•")
+        creado = trabajo["creado"].strftime("%d/%m %H:%M:%S")
+        with st.container(border=True):
+            col_info, col_accion = st.columns([5, 1])
+            col_info.markdown(f"{icono} **{trabajo['tipo']}** · {trabajo['estado']} · {creado}")
+            col_info.progress(
+                float(trabajo.get("progreso", 0.0)),
+                text=f"Etapa: {trabajo.get('etapa') or '-'}",
+            )
+            if trabajo["estado"] in ESTADOS_ACTIVOS and not trabajo.get("cancelar"):
+                if col_accion.button("Cancelar", key=f"cancelar_{trabajo['_id']}"):
+                    gestor.cancelar(trabajo["_id"])
+            if trabajo.get("error"):
+                col_info.error(trabajo["error"])
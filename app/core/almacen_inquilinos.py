@@ -0,0 +1,249 @@
+# app/core/almacen_inquilinos.py
+"""
+Almacén columnar compacto de la población de inquilinos.
+
+Cada inquilino es una fila de arreglos NumPy de solo lectura:
+    id_inquilino   int32
+    edad           uint8   (SIN_EDAD = 0 si falta)
+    <categoría>    int8    código de TABLA_CATEGORIAS (SIN_VALOR = -1)
+    compatible     int8
+y `indice` (pd.Index sobre los mismos int32) resuelve id_inquilino → fila.
+Nombre, cédula, texto libre y fechas van en una tabla lateral aparte que solo
+se lee de la BD la primera vez que alguien la pide.
+
+`vista()` arma un DataFrame sin copiar los arreglos (las categorías como
+Categorical sobre los mismos códigos), que motor y chatbot usan igual que
+el DataFrame de documentos. Los cambios no modifican el almacén: `aplicar`
+devuelve uno nuevo, así que una vista publicada nunca cambia por debajo.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.inquilino_schema import TABLA_CATEGORIAS
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_CATEGORICOS = TABLA_CATEGORIAS.campos
+COLUMNAS_COMPACTAS = ["id_inquilino", "edad", *CAMPOS_CATEGORICOS, "compatible"]
+SIN_EDAD = 0
+TAMANO_LOTE = 50000
+
+_MAX_ID = np.iinfo(np.int32).max
+
+
+def normalizar_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte id_inquilino a int y descarta filas sin ID válido"""
+    if 'id_inquilino' in df.columns:
+        df['id_inquilino'] = pd.to_numeric(df['id_inquilino'], errors='coerce')
+        df = df.dropna(subset=['id_inquilino']).astype({'id_inquilino': int})
+    return df
+
+
+def _numerica(df: pd.DataFrame, campo: str, defecto: int) -> pd.Series:
+    if campo not in df.columns:
+        return pd.Series(defecto, index=df.index)
+    return pd.to_numeric(df[campo], errors="coerce").fillna(defecto)
+
+
+def _columnas_compactas(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """DataFrame de documentos (con id_inquilino ya normalizado) → arreglos compactos"""
+    ids = df["id_inquilino"].to_numpy()
+    if len(ids) and (ids.min() < 0 or ids.max() > _MAX_ID):
+        raise ValueError("id_inquilino fuera del rango de int32")
+    columnas = {
+        "id_inquilino": ids.astype(np.int32),
+        "edad": _numerica(df, "edad", SIN_EDAD).clip(0, 255).to_numpy().astype(np.uint8),
+    }
+    for campo in CAMPOS_CATEGORICOS:
+        columnas[campo] = (
+            TABLA_CATEGORIAS.codificar(campo, df[campo]) if campo in df.columns
+            else np.full(len(df), TABLA_CATEGORIAS.SIN_VALOR, dtype=np.int8)
+        )
+    columnas["compatible"] = _numerica(df, "compatible", 0).to_numpy().astype(np.int8)
+    return columnas
+
+
+def _solo_lectura(arreglo: np.ndarray) -> np.ndarray:
+    arreglo.flags.writeable = False
+    return arreglo
+
+
+class AlmacenInquilinos:
+    """Población en arreglos compactos + tabla lateral perezosa (ver docstring del módulo)"""
+
+    def __init__(self, columnas: Dict[str, np.ndarray], laterales: Optional[pd.DataFrame] = None, db=None):
+        self.columnas = {c: _solo_lectura(columnas[c]) for c in COLUMNAS_COMPACTAS}
+        self.indice = pd.Index(self.columnas["id_inquilino"], copy=False)
+        self.db = db
+        # Alineada por fila con las columnas compactas; None hasta que se cargue
+        self._laterales = laterales
+        self._lock = threading.Lock()
+
+    # =========================================================================
+    # 🏗️ CONSTRUCCIÓN
+    # =========================================================================
+    @classmethod
+    def vacio(cls, db=None) -> "AlmacenInquilinos":
+        return cls(_columnas_compactas(pd.DataFrame({"id_inquilino": np.array([], dtype=np.int64)})), db=db)
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, laterales: bool = True, db=None) -> "AlmacenInquilinos":
+        """
+        Almacén de un DataFrame de documentos. Con `laterales` se conservan sus
+        demás columnas como tabla lateral; si no, se leerán de la BD al pedirlas.
+        """
+        df = normalizar_ids(df.copy()).drop_duplicates(subset="id_inquilino", keep="last").reset_index(drop=True)
+        extra = None
+        if laterales:
+            extra = df.drop(columns=[c for c in [*COLUMNAS_COMPACTAS, "_id"] if c in df.columns])
+        return cls(_columnas_compactas(df), extra, db)
+
+    @classmethod
+    def desde_db(cls, db=None, tamano_lote: int = TAMANO_LOTE) -> "AlmacenInquilinos":
+        """Lee solo las columnas compactas de la colección, por lotes del cursor"""
+        if db is None:
+            from app.core.database import db_manager as db
+        proyeccion = {"_id": 0, **{c: 1 for c in COLUMNAS_COMPACTAS}}
+        partes: List[Dict[str, np.ndarray]] = []
+        lote: List[Dict] = []
+        for documento in db.inquilinos.iterar(proyeccion=proyeccion, orden=[("id_inquilino", 1)], tamano_lote=tamano_lote):
+            lote.append(documento)
+            if len(lote) >= tamano_lote:
+                partes.append(_columnas_compactas(normalizar_ids(pd.DataFrame(lote))))
+                lote = []
+        if lote:
+            partes.append(_columnas_compactas(normalizar_ids(pd.DataFrame(lote))))
+        if not partes:
+            return cls.vacio(db)
+        return cls({c: np.concatenate([p[c] for p in partes]) for c in COLUMNAS_COMPACTAS}, db=db)
+
+    def aplicar(self, documentos: List[Dict]) -> "AlmacenInquilinos":
+        """
+        Almacén nuevo con los documentos fusionados: los IDs conocidos se
+        actualizan en su fila y los nuevos se agregan al final. Si la tabla
+        lateral ya estaba cargada se actualiza con los mismos documentos.
+        """
+        delta = normalizar_ids(pd.DataFrame(documentos))
+        if delta.empty:
+            return self
+        delta = delta.drop_duplicates(subset="id_inquilino", keep="last").reset_index(drop=True)
+        nuevas = _columnas_compactas(delta)
+
+        posiciones = self.posiciones(nuevas["id_inquilino"])
+        existentes = posiciones >= 0
+        columnas = {}
+        for c in COLUMNAS_COMPACTAS:
+            columna = np.concatenate([self.columnas[c], nuevas[c][~existentes]])
+            columna[posiciones[existentes]] = nuevas[c][existentes]
+            columnas[c] = columna
+
+        laterales = None
+        if self._laterales is not None:
+            extra = delta.drop(columns=[c for c in [*COLUMNAS_COMPACTAS, "_id"] if c in delta.columns])
+            laterales = pd.concat([self._laterales, extra[~existentes]], ignore_index=True)
+            if existentes.any():
+                for columna in extra.columns:
+                    laterales.loc[posiciones[existentes], columna] = extra.loc[existentes, columna].to_numpy()
+        return AlmacenInquilinos(columnas, laterales, self.db)
+
+    def quitar(self, ids) -> "AlmacenInquilinos":
+        """Almacén nuevo sin las filas de `ids` (bajas); los que no están se ignoran"""
+        quedan = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        if quedan.all():
+            return self
+        columnas = {c: self.columnas[c][quedan] for c in COLUMNAS_COMPACTAS}
+        laterales = None
+        if self._laterales is not None:
+            laterales = self._laterales[quedan].reset_index(drop=True)
+        return AlmacenInquilinos(columnas, laterales, self.db)
+
+    # =========================================================================
+    # 🔎 CONSULTA
+    # =========================================================================
+    def __len__(self) -> int:
+        return len(self.indice)
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self.columnas["id_inquilino"]
+
+    def posicion(self, id_inquilino) -> int:
+        """Fila de un inquilino (-1 si no está)"""
+        return int(self.posiciones([id_inquilino])[0])
+
+    def posiciones(self, ids) -> np.ndarray:
+        """Fila de cada id (-1 si no está)"""
+        return self.indice.get_indexer(pd.to_numeric(pd.Index(ids), errors="coerce"))
+
+    def laterales(self) -> pd.DataFrame:
+        """Tabla lateral (nombre, cédula, texto libre...), alineada por fila. La carga la primera vez"""
+        with self._lock:
+            if self._laterales is None:
+                self._laterales = self._cargar_laterales()
+            return self._laterales
+
+    def _cargar_laterales(self) -> pd.DataFrame:
+        db = self.db
+        if db is None:
+            from app.core.database import db_manager as db
+        proyeccion = {"_id": 0, **{c: 0 for c in COLUMNAS_COMPACTAS if c != "id_inquilino"}}
+        documentos = list(db.inquilinos.iterar(proyeccion=proyeccion, tamano_lote=TAMANO_LOTE))
+        df = normalizar_ids(pd.DataFrame(documentos)) if documentos else pd.DataFrame({"id_inquilino": []})
+        df = df.drop_duplicates(subset="id_inquilino", keep="last").set_index("id_inquilino")
+        logger.info(f"🗂️ Tabla lateral cargada: {len(df):,} inquilinos, {len(df.columns)} columnas")
+        return df.reindex(self.ids).reset_index(drop=True)
+
+    def _leer_campos(self, campos: List[str]) -> pd.DataFrame:
+        """Solo `campos` de la tabla lateral, alineados por fila, sin cargarla entera"""
+        db = self.db
+        if db is None:
+            from app.core.database import db_manager as db
+        proyeccion = {"_id": 0, "id_inquilino": 1, **{c: 1 for c in campos}}
+        documentos = list(db.inquilinos.iterar(proyeccion=proyeccion, tamano_lote=TAMANO_LOTE))
+        df = normalizar_ids(pd.DataFrame(documentos)) if documentos else pd.DataFrame({"id_inquilino": []})
+        df = df.drop_duplicates(subset="id_inquilino", keep="last").set_index("id_inquilino")
+        return df.reindex(index=self.ids, columns=campos).reset_index(drop=True)
+
+    def _columna(self, campo: str):
+        """Columna para un DataFrame, sin copiar el arreglo"""
+        if campo in TABLA_CATEGORIAS.dtypes:
+            return pd.Categorical.from_codes(self.columnas[campo], dtype=TABLA_CATEGORIAS.dtypes[campo], validate=False)
+        return self.columnas[campo]
+
+    def vista(self, columnas: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        DataFrame de solo lectura con `columnas` (por defecto las compactas).
+        Las compactas no se copian; las demás salen de la tabla lateral si ya
+        está cargada y, si no, se leen solo esos campos de la BD (sin cargarla).
+        Las columnas que no existen se omiten.
+        """
+        columnas = COLUMNAS_COMPACTAS if columnas is None else columnas
+        otras = [c for c in columnas if c not in self.columnas]
+        laterales = self._laterales
+        if otras and laterales is None:
+            laterales = self._leer_campos(otras).dropna(axis=1, how="all")
+        datos = {}
+        for columna in columnas:
+            if columna in self.columnas:
+                datos[columna] = self._columna(columna)
+            elif columna in laterales.columns:
+                datos[columna] = laterales[columna].to_numpy()
+        return pd.DataFrame(datos, index=pd.RangeIndex(len(self)), copy=False)
+
+    def vista_completa(self) -> pd.DataFrame:
+        """Vista con las columnas compactas y todas las de la tabla lateral"""
+        laterales = self.laterales()
+        return self.vista([*COLUMNAS_COMPACTAS, *laterales.columns])
+
+    def memoria(self) -> Dict[str, int]:
+        """Bytes ocupados por columnas, índice y tabla lateral (0 si no se ha cargado)"""
+        laterales = self._laterales
+        return {
+            "columnas": sum(arreglo.nbytes for arreglo in self.columnas.values()),
+            "indice": int(self.indice.memory_usage(deep=True)),
+            "laterales": int(laterales.memory_usage(index=False, deep=True).sum()) if laterales is not None else 0,
+        }
@@ -0,0 +1,610 @@
+# app/core/almacenamiento.py
+"""
+Backends de almacenamiento intercambiables para RoomMatchAI.
+
+- MongoDB (pymongo) para producción.
+- SQLite embebido (`MONGO_URI=sqlite:///ruta/roommatch.db`) para máquinas de
+  build, benchmarks y pruebas de carga sin servidor Mongo.
+
+Ambos aceptan el mismo subconjunto del lenguaje de consultas de Mongo
+(igualdad, $in/$nin/$ne, $gt/$gte/$lt/$lte, $exists, $type, $or/$and), las mismas
+proyecciones y los operadores de actualización $set/$unset/$inc/$max/$currentDate.
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class ClaveDuplicadaError(Exception):
+    """Se intentó insertar un documento que viola un índice único"""
+
+    def __init__(self, mensaje: str, insertados: int = 0):
+        super().__init__(mensaje)
+        # En una inserción masiva ordenada: documentos insertados antes del duplicado
+        self.insertados = insertados
+
+
+# ============================================================================
+# 📐 INTERFAZ
+# ============================================================================
+class Coleccion(ABC):
+    """Colección de documentos con la API que usa DatabaseManager"""
+
+    @abstractmethod
+    def insertar(self, documento: Dict) -> None: ...
+
+    @abstractmethod
+    def insertar_muchos(self, documentos: List[Dict], ordenado: bool = False) -> int:
+        """
+        Inserta en bloque. Sin orden, los duplicados se omiten. Con orden se
+        detiene en el primer duplicado: los anteriores quedan insertados y se
+        lanza ClaveDuplicadaError (con `insertados`). Devuelve insertados.
+        """
+
+    @abstractmethod
+    def buscar(self, filtro=None, proyeccion=None, orden=None, limite=0, saltar=0) -> List[Dict]: ...
+
+    @abstractmethod
+    def iterar(self, filtro=None, proyeccion=None, orden=None, tamano_lote=1000) -> Iterator[Dict]:
+        """Recorre los resultados en streaming (memoria acotada al lote)"""
+
+    @abstractmethod
+    def contar(self, filtro=None) -> int: ...
+
+    @abstractmethod
+    def contar_estimado(self) -> int: ...
+
+    @abstractmethod
+    def agregar_conteos(self, grupos: Dict[str, List[str]], filtro=None) -> Dict[str, List[Dict]]:
+        """{faceta: [campos]} → {faceta: [{campo: valor, ..., "total": n}]}"""
+
+    @abstractmethod
+    def resumir(self, filtro=None, promedios: List[str] = ()) -> Dict:
+        """
+        Total y promedio de cada campo de `promedios` en una sola agregación:
+        {"total": n, campo: promedio}. El promedio ignora valores no numéricos
+        y es None si no hay ninguno.
+        """
+
+    @abstractmethod
+    def muestrear(self, n: int, filtro=None, proyeccion=None) -> List[Dict]:
+        """Hasta `n` documentos al azar entre los que cumplen `filtro`"""
+
+    @abstractmethod
+    def actualizar_muchos(self, filtro, actualizacion) -> int: ...
+
+    @abstractmethod
+    def buscar_y_actualizar(self, filtro, actualizacion, upsert=False) -> Optional[Dict]:
+        """Actualiza un documento de forma atómica y devuelve su versión nueva"""
+
+    @abstractmethod
+    def eliminar(self, filtro) -> int: ...
+
+    @abstractmethod
+    def crear_indice(self, campos, unico=False, nombre=None, parcial=None) -> None:
+        """`parcial`: filtro de los documentos que entran en el índice (p. ej. único solo si el campo tiene valor)"""
+
+    def buscar_uno(self, filtro=None, proyeccion=None, orden=None) -> Optional[Dict]:
+        resultado = self.buscar(filtro, proyeccion, orden=orden, limite=1)
+        return resultado[0] if resultado else None
+
+    def actualizar_uno(self, filtro, actualizacion, upsert=False) -> bool:
+        return self.buscar_y_actualizar(filtro, actualizacion, upsert=upsert) is not None
+
+
+class Almacenamiento(ABC):
+    """Conjunto de colecciones de un backend"""
+
+    tipo = ""
+
+    @abstractmethod
+    def coleccion(self, nombre: str) -> Coleccion: ...
+
+
+# ============================================================================
+# 🍃 MONGODB
+# ============================================================================
+class ColeccionMongo(Coleccion):
+    def __init__(self, collection):
+        # pymongo.Collection, accesible para operaciones específicas de Mongo
+        self.collection = collection
+
+    def insertar(self, documento):
+        try:
+            self.collection.insert_one(documento)
+        except DuplicateKeyError as e:
+            raise ClaveDuplicadaError(str(e)) from e
+
+    def insertar_muchos(self, documentos, ordenado=False):
+        if not documentos:
+            return 0
+        try:
+            return len(self.collection.insert_many(documentos, ordered=ordenado).inserted_ids)
+        except BulkWriteError as e:
+            if ordenado:
+                raise ClaveDuplicadaError(str(e), e.details.get("nInserted", 0)) from e
+            logger.warning(f"⚠️ {len(e.details.get('writeErrors', []))} documentos omitidos en inserción masiva")
+            return e.details.get("nInserted", 0)
+
+    def _cursor(self, filtro, proyeccion, orden, limite, saltar):
+        cursor = self.collection.find(filtro or {}, proyeccion)
+        if orden:
+            cursor = cursor.sort(orden)
+        if saltar:
+            cursor = cursor.skip(saltar)
+        if limite:
+            cursor = cursor.limit(limite)
+        return cursor
+
+    def buscar(self, filtro=None, proyeccion=None, orden=None, limite=0, saltar=0):
+        return list(self._cursor(filtro, proyeccion, orden, limite, saltar))
+
+    def iterar(self, filtro=None, proyeccion=None, orden=None, tamano_lote=1000):
+        yield from self._cursor(filtro, proyeccion, orden, 0, 0).batch_size(tamano_lote)
+
+    def contar(self, filtro=None):
+        return self.collection.count_documents(filtro or {})
+
+    def contar_estimado(self):
+        return self.collection.estimated_document_count()
+
+    def agregar_conteos(self, grupos, filtro=None):
+        facetas = {
+            nombre: [{"$group": {
+                "_id": {campo: f"${campo}" for campo in campos},
+                "total": {"$sum": 1},
+            }}]
+            for nombre, campos in grupos.items()
+        }
+        pipeline = [{"$match": filtro}] if filtro else []
+        pipeline.append({"$facet": facetas})
+
+        resultado = list(self.collection.aggregate(pipeline))
+        resultado = resultado[0] if resultado else {}
+        return {
+            nombre: [{**fila["_id"], "total": fila["total"]} for fila in resultado.get(nombre, [])]
+            for nombre in grupos
+        }
+
+    def resumir(self, filtro=None, promedios=()):
+        grupo = {"_id": None, "total": {"$sum": 1}, **{campo: {"$avg": f"${campo}"} for campo in promedios}}
+        pipeline = [{"$match": filtro}] if filtro else []
+        pipeline.append({"$group": grupo})
+        resultado = list(self.collection.aggregate(pipeline))
+        if not resultado:
+            return {"total": 0, **{campo: None for campo in promedios}}
+        return {"total": resultado[0]["total"], **{campo: resultado[0][campo] for campo in promedios}}
+
+    def muestrear(self, n, filtro=None, proyeccion=None):
+        pipeline = [{"$match": filtro}] if filtro else []
+        pipeline.append({"$sample": {"size": n}})
+        if proyeccion:
+            pipeline.append({"$project": proyeccion})
+        return list(self.collection.aggregate(pipeline))
+
+    def actualizar_muchos(self, filtro, actualizacion):
+        return self.collection.update_many(filtro, actualizacion).modified_count
+
+    def buscar_y_actualizar(self, filtro, actualizacion, upsert=False):
+        try:
+            return self.collection.find_one_and_update(
+                filtro, actualizacion, upsert=upsert, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError as e:
+            # Dos upserts simultáneos del mismo documento: uno de ellos pierde
+            raise ClaveDuplicadaError(str(e)) from e
+
+    def eliminar(self, filtro):
+        return self.collection.delete_many(filtro).deleted_count
+
+    def crear_indice(self, campos, unico=False, nombre=None, parcial=None):
+        opciones = {"unique": unico}
+        if nombre:
+            opciones["name"] = nombre
+        if parcial:
+            opciones["partialFilterExpression"] = parcial
+        self.collection.create_index(campos, **opciones)
+
+
+class AlmacenamientoMongo(Almacenamiento):
+    tipo = "mongo"
+
+    def __init__(self, uri: Optional[str], nombre_db: str):
+        self.client = MongoClient(uri)
+        self.db = self.client[nombre_db]
+
+    def coleccion(self, nombre):
+        return ColeccionMongo(self.db[nombre])
+
+
+# ============================================================================
+# 🪶 SQLITE EMBEBIDO
+# ============================================================================
+_PATRON_FECHA = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{6}$")
+
+
+def a_json(valor):
+    """Serializa valores no JSON (fechas como ISO con microsegundos: ordenan como texto)"""
+    if isinstance(valor, datetime):
+        return valor.isoformat(timespec="microseconds")
+    if hasattr(valor, "item"):  # escalares numpy
+        return valor.item()
+    return str(valor)
+
+
+def desde_json(documento):
+    """Inverso de a_json: las cadenas con formato de fecha vuelven a datetime"""
+    for clave, valor in documento.items():
+        if isinstance(valor, str) and _PATRON_FECHA.match(valor):
+            documento[clave] = datetime.fromisoformat(valor)
+    return documento
+
+
+def _valor_sql(valor):
+    """Convierte un valor de filtro al tipo con el que SQLite compara json_extract"""
+    if isinstance(valor, datetime):
+        return a_json(valor)
+    if isinstance(valor, bool):
+        return int(valor)
+    return valor
+
+
+def _ruta(campo: str) -> str:
+    return "$." + ".".join(f'"{parte}"' for parte in campo.split("."))
+
+
+def _extraer(campo: str) -> str:
+    return f"json_extract(doc, '{_ruta(campo)}')"
+
+
+# Alias de $type de Mongo → json_type de SQLite
+_TIPOS_JSON = {
+    "number": ("integer", "real"),
+    "string": ("text",),
+    "bool": ("true", "false"),
+    "object": ("object",),
+    "array": ("array",),
+}
+
+
+def _traducir_filtro(filtro) -> (str, list):
+    """Traduce un filtro estilo Mongo a una cláusula WHERE de SQLite"""
+    if not filtro:
+        return "1", []
+
+    clausulas, parametros = [], []
+    for clave, condicion in filtro.items():
+        if clave in ("$or", "$and"):
+            partes = [_traducir_filtro(sub) for sub in condicion]
+            union = " OR " if clave == "$or" else " AND "
+            clausulas.append("(" + union.join(sql for sql, _ in partes) + ")")
+            for _, params in partes:
+                parametros.extend(params)
+            continue
+
+        columna = _extraer(clave)
+        operadores = condicion if isinstance(condicion, dict) and condicion and \
+            all(k.startswith("$") for k in condicion) else {"$eq": condicion}
+
+        for operador, valor in operadores.items():
+            if operador == "$eq":
+                if valor is None:
+                    clausulas.append(f"{columna} IS NULL")
+                else:
+                    clausulas.append(f"{columna} = ?")
+                    parametros.append(_valor_sql(valor))
+            elif operador == "$ne":
+                if valor is None:
+                    clausulas.append(f"{columna} IS NOT NULL")
+                else:
+                    clausulas.append(f"({columna} IS NULL OR {columna} != ?)")
+                    parametros.append(_valor_sql(valor))
+            elif operador in ("$in", "$nin"):
+                valores = [_valor_sql(v) for v in valor if v is not None]
+                partes = []
+                if valores:
+                    partes.append(f"{columna} IN ({', '.join('?' * len(valores))})")
+                    parametros.extend(valores)
+                if any(v is None for v in valor):
+                    partes.append(f"{columna} IS NULL")
+                sql = "(" + " OR ".join(partes) + ")" if partes else "0"
+                clausulas.append(sql if operador == "$in" else f"NOT {sql}")
+            elif operador in ("$gt", "$gte", "$lt", "$lte"):
+                simbolo = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}[operador]
+                clausulas.append(f"{columna} {simbolo} ?")
+                parametros.append(_valor_sql(valor))
+            elif operador == "$type":
+                # Literales (sin parámetros): también sirve en el WHERE de un índice parcial
+                tipos = _TIPOS_JSON[valor]
+                clausulas.append(f"json_type(doc, '{_ruta(clave)}') IN ({', '.join(repr(t) for t in tipos)})")
+            elif operador == "$exists":
+                existe = f"json_type(doc, '{_ruta(clave)}') IS NOT NULL"
+                clausulas.append(existe if valor else f"NOT {existe}")
+            else:
+                raise ValueError(f"Operador no soportado por el backend SQLite: {operador}")
+
+    return " AND ".join(clausulas), parametros
+
+
+def _proyectar(documento, proyeccion):
+    if not proyeccion:
+        return documento
+    incluir = {k for k, v in proyeccion.items() if v and k != "_id"}
+    if incluir:
+        resultado = {k: documento[k] for k in incluir if k in documento}
+        if proyeccion.get("_id", 1) and "_id" in documento:
+            resultado["_id"] = documento["_id"]
+        return resultado
+    return {k: v for k, v in documento.items() if proyeccion.get(k, 1)}
+
+
+def _aplicar_actualizacion(documento, actualizacion):
+    for operador, cambios in actualizacion.items():
+        for campo, valor in cambios.items():
+            if operador == "$set":
+                documento[campo] = valor
+            elif operador == "$unset":
+                documento.pop(campo, None)
+            elif operador == "$inc":
+                documento[campo] = documento.get(campo, 0) + valor
+            elif operador == "$max":
+                if campo not in documento or documento[campo] is None or valor > documento[campo]:
+                    documento[campo] = valor
+            elif operador == "$currentDate":
+                documento[campo] = datetime.utcnow()
+            else:
+                raise ValueError(f"Operador de actualización no soportado: {operador}")
+    return documento
+
+
+class ColeccionSQLite(Coleccion):
+    """Colección guardada como tabla (rowid, doc JSON) con índices sobre json_extract"""
+
+    def __init__(self, almacenamiento: "AlmacenamientoSQLite", nombre: str):
+        self._alm = almacenamiento
+        self.nombre = nombre
+        self._tabla = f'"{nombre}"'
+        with self._alm.transaccion() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self._tabla} (doc TEXT NOT NULL)")
+            conn.execute(
+                f'CREATE UNIQUE INDEX IF NOT EXISTS "{nombre}__id" ON {self._tabla} ({_extraer("_id")})'
+            )
+
+    def _serializar(self, documento):
+        documento.setdefault("_id", uuid.uuid4().hex)
+        return json.dumps(documento, default=a_json, ensure_ascii=False)
+
+    def insertar(self, documento):
+        try:
+            with self._alm.transaccion() as conn:
+                conn.execute(f"INSERT INTO {self._tabla} (doc) VALUES (?)", (self._serializar(documento),))
+        except sqlite3.IntegrityError as e:
+            raise ClaveDuplicadaError(str(e)) from e
+
+    def insertar_muchos(self, documentos, ordenado=False):
+        insertados, duplicado = 0, None
+        with self._alm.transaccion() as conn:
+            for documento in documentos:
+                try:
+                    conn.execute(f"INSERT INTO {self._tabla} (doc) VALUES (?)", (self._serializar(documento),))
+                    insertados += 1
+                except sqlite3.IntegrityError as e:
+                    if ordenado:
+                        # Como Mongo con ordered=True: se confirman los anteriores y se detiene
+                        duplicado = e
+                        break
+        if duplicado is not None:
+            raise ClaveDuplicadaError(str(duplicado), insertados) from duplicado
+        if insertados < len(documentos):
+            logger.warning(f"⚠️ {len(documentos) - insertados} documentos omitidos en inserción masiva")
+        return insertados
+
+    def _select(self, columnas, filtro, orden=None, limite=0, saltar=0):
+        where, parametros = _traducir_filtro(filtro)
+        sql = f"SELECT {columnas} FROM {self._tabla} WHERE {where}"
+        if orden:
+            sql += " ORDER BY " + ", ".join(
+                f"{_extraer(campo)} {'DESC' if direccion < 0 else 'ASC'}" for campo, direccion in orden
+            )
+        if limite or saltar:
+            sql += " LIMIT ? OFFSET ?"
+            parametros += [limite or -1, saltar]
+        return sql, parametros
+
+    def buscar(self, filtro=None, proyeccion=None, orden=None, limite=0, saltar=0):
+        sql, parametros = self._select("doc", filtro, orden, limite, saltar)
+        with self._alm.lock:
+            filas = self._alm.conn.execute(sql, parametros).fetchall()
+        return [_proyectar(desde_json(json.loads(doc)), proyeccion) for (doc,) in filas]
+
+    def iterar(self, filtro=None, proyeccion=None, orden=None, tamano_lote=1000):
+        if self._alm.ruta == ":memory:":
+            # Otra conexión abriría una base en memoria distinta
+            yield from self.buscar(filtro, proyeccion, orden)
+            return
+        # Conexión propia: el cursor queda abierto entre lotes sin bloquear a los demás
+        sql, parametros = self._select("doc", filtro, orden)
+        conn = self._alm.conectar()
+        try:
+            cursor = conn.execute(sql, parametros)
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                for (doc,) in filas:
+                    yield _proyectar(desde_json(json.loads(doc)), proyeccion)
+        finally:
+            conn.close()
+
+    def contar(self, filtro=None):
+        sql, parametros = self._select("COUNT(*)", filtro)
+        with self._alm.lock:
+            return self._alm.conn.execute(sql, parametros).fetchone()[0]
+
+    def contar_estimado(self):
+        return self.contar()
+
+    def agregar_conteos(self, grupos, filtro=None):
+        where, parametros = _traducir_filtro(filtro)
+        resultado = {}
+        with self._alm.lock:
+            for nombre, campos in grupos.items():
+                columnas = ", ".join(_extraer(campo) for campo in campos)
+                filas = self._alm.conn.execute(
+                    f"SELECT {columnas}, COUNT(*) FROM {self._tabla} WHERE {where} "
+                    f"GROUP BY {', '.join(str(i + 1) for i in range(len(campos)))}",
+                    parametros,
+                ).fetchall()
+                resultado[nombre] = [
+                    {**dict(zip(campos, fila[:-1])), "total": fila[-1]} for fila in filas
+                ]
+        return resultado
+
+    def resumir(self, filtro=None, promedios=()):
+        where, parametros = _traducir_filtro(filtro)
+        # Como $avg: solo cuentan los valores numéricos
+        columnas = "".join(
+            f", AVG(CASE WHEN json_type(doc, '{_ruta(campo)}') IN ('integer', 'real') "
+            f"THEN {_extraer(campo)} END)"
+            for campo in promedios
+        )
+        with self._alm.lock:
+            fila = self._alm.conn.execute(
+                f"SELECT COUNT(*){columnas} FROM {self._tabla} WHERE {where}", parametros
+            ).fetchone()
+        return {"total": fila[0], **dict(zip(promedios, fila[1:]))}
+
+    def muestrear(self, n, filtro=None, proyeccion=None):
+        where, parametros = _traducir_filtro(filtro)
+        # El azar se elige sobre rowid (el índice del filtro basta); solo se leen los n elegidos
+        with self._alm.lock:
+            filas = self._alm.conn.execute(
+                f"SELECT doc FROM {self._tabla} WHERE rowid IN "
+                f"(SELECT rowid FROM {self._tabla} WHERE {where} ORDER BY random() LIMIT ?)",
+                parametros + [n],
+            ).fetchall()
+        return [_proyectar(desde_json(json.loads(doc)), proyeccion) for (doc,) in filas]
+
+    def actualizar_muchos(self, filtro, actualizacion):
+        sql, parametros = self._select("rowid, doc", filtro)
+        with self._alm.transaccion() as conn:
+            filas = conn.execute(sql, parametros).fetchall()
+            for rowid, doc in filas:
+                nuevo = _aplicar_actualizacion(desde_json(json.loads(doc)), actualizacion)
+                conn.execute(
+                    f"UPDATE {self._tabla} SET doc = ? WHERE rowid = ?",
+                    (json.dumps(nuevo, default=a_json, ensure_ascii=False), rowid),
+                )
+        return len(filas)
+
+    def buscar_y_actualizar(self, filtro, actualizacion, upsert=False):
+        sql, parametros = self._select("rowid, doc", filtro, limite=1)
+        with self._alm.transaccion() as conn:
+            fila = conn.execute(sql, parametros).fetchone()
+            if fila:
+                rowid, doc = fila
+                nuevo = _aplicar_actualizacion(desde_json(json.loads(doc)), actualizacion)
+                conn.execute(
+                    f"UPDATE {self._tabla} SET doc = ? WHERE rowid = ?",
+                    (json.dumps(nuevo, default=a_json, ensure_ascii=False), rowid),
+                )
+                return nuevo
+            if not upsert:
+                return None
+            # Upsert: partir de los campos de igualdad del filtro
+            nuevo = {k: v for k, v in (filtro or {}).items()
+                     if not k.startswith("$") and not isinstance(v, dict)}
+            nuevo = _aplicar_actualizacion(nuevo, actualizacion)
+            try:
+                conn.execute(f"INSERT INTO {self._tabla} (doc) VALUES (?)", (self._serializar(nuevo),))
+            except sqlite3.IntegrityError as e:
+                raise ClaveDuplicadaError(str(e)) from e
+            return nuevo
+
+    def eliminar(self, filtro):
+        where, parametros = _traducir_filtro(filtro)
+        with self._alm.transaccion() as conn:
+            return conn.execute(f"DELETE FROM {self._tabla} WHERE {where}", parametros).rowcount
+
+    def crear_indice(self, campos, unico=False, nombre=None, parcial=None):
+        nombre = nombre or "_".join(f"{campo}_{direccion}" for campo, direccion in campos)
+        columnas = ", ".join(
+            f"{_extraer(campo)} {'DESC' if direccion < 0 else 'ASC'}" for campo, direccion in campos
+        )
+        donde = ""
+        if parcial:
+            sql, parametros = _traducir_filtro(parcial)
+            if parametros:
+                raise ValueError("El filtro de un índice parcial no admite parámetros en SQLite")
+            donde = f" WHERE {sql}"
+        with self._alm.transaccion() as conn:
+            conn.execute(
+                f'CREATE {"UNIQUE " if unico else ""}INDEX IF NOT EXISTS "{self.nombre}_{nombre}" '
+                f"ON {self._tabla} ({columnas}){donde}"
+            )
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    tipo = "sqlite"
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.lock = threading.RLock()
+        self.conn = self.conectar()
+        self._colecciones: Dict[str, ColeccionSQLite] = {}
+
+    def conectar(self):
+        # isolation_level=None: transacciones explícitas con BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.ruta, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def transaccion(self):
+        return _Transaccion(self)
+
+    def coleccion(self, nombre):
+        if nombre not in self._colecciones:
+            self._colecciones[nombre] = ColeccionSQLite(self, nombre)
+        return self._colecciones[nombre]
+
+
+class _Transaccion:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK; atómica también entre procesos"""
+
+    def __init__(self, almacenamiento: AlmacenamientoSQLite):
+        self._alm = almacenamiento
+
+    def __enter__(self):
+        self._alm.lock.acquire()
+        self._alm.conn.execute("BEGIN IMMEDIATE")
+        return self._alm.conn
+
+    def __exit__(self, tipo, valor, traza):
+        try:
+            self._alm.conn.execute("ROLLBACK" if tipo else "COMMIT")
+        finally:
+            self._alm.lock.release()
+        return False
+
+
+# ============================================================================
+# FACTORY
+# ============================================================================
+def crear_almacenamiento(uri: Optional[str], nombre_db: str) -> Almacenamiento:
+    """`sqlite:///ruta.db` (o `sqlite://:memory:`) → SQLite embebido; cualquier otro URI → MongoDB"""
+    if uri and uri.startswith("sqlite://"):
+        ruta = uri[len("sqlite:///"):] if uri.startswith("sqlite:///") else uri[len("sqlite://"):]
+        return AlmacenamientoSQLite(ruta or ":memory:")
+    return AlmacenamientoMongo(uri, nombre_db)
@@ -0,0 +1,53 @@
+# app/core/archivos.py
+"""Lectura por bloques de archivos tabulares (CSV, JSONL, Parquet) para los procesos masivos"""
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+FORMATOS_ENTRADA = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+
+def formato_archivo(ruta: str, formatos: Dict[str, str]) -> str:
+    """Formato según la extensión; ValueError si no está en `formatos`"""
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension not in formatos:
+        raise ValueError(f"Formato no soportado: {extension} (use {', '.join(formatos)})")
+    return formatos[extension]
+
+
+def leer_bloques(ruta: str, tamano: int, saltar: int = 0, dtype: Optional[type] = None) -> Iterator[pd.DataFrame]:
+    """
+    Bloques de `tamano` filas a partir de la fila `saltar` (sin cargar el
+    archivo entero). En JSONL los objetos anidados se aplanan con "_"
+    ({"perfil1": {"edad": 20}} → perfil1_edad). `dtype` aplica al CSV.
+    """
+    formato = formato_archivo(ruta, FORMATOS_ENTRADA)
+
+    if formato == "csv":
+        yield from pd.read_csv(ruta, chunksize=tamano, skiprows=range(1, saltar + 1), dtype=dtype)
+
+    elif formato == "jsonl":
+        with open(ruta, "r", encoding="utf-8") as f:
+            lineas = (linea for linea in f if linea.strip())
+            for _ in islice(lineas, saltar):
+                pass
+            while True:
+                registros = [json.loads(linea) for linea in islice(lineas, tamano)]
+                if not registros:
+                    return
+                yield pd.json_normalize(registros, sep="_")
+
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Leer Parquet requiere pyarrow (pip install pyarrow)")
+        vistas = 0
+        for lote in pq.ParquetFile(ruta).iter_batches(batch_size=tamano):
+            df = lote.to_pandas()
+            if vistas + len(df) > saltar:
+                yield df.iloc[max(0, saltar - vistas):].reset_index(drop=True)
+            vistas += len(df)
@@ -0,0 +1,88 @@
+# app/core/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheTTL:
+    """
+    Caché LRU acotada por tamaño con expiración por TTL (segundos).
+    Segura entre hilos; lleva conteo de aciertos y fallos.
+
+    Para rellenar tras un fallo sin guardar un valor ya obsoleto: tomar
+    reserva = reservar(clave) antes de leer la fuente y pasarla a guardar();
+    si entretanto se invalidó la clave, el valor leído se descarta.
+    """
+
+    def __init__(self, max_entradas: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # clave → reserva del relleno en curso (solo mientras dura la lectura)
+        self._reservas: Dict[Hashable, object] = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave: Hashable) -> Optional[Any]:
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def reservar(self, clave: Hashable) -> object:
+        reserva = object()
+        with self._lock:
+            self._reservas[clave] = reserva
+        return reserva
+
+    def liberar(self, clave: Hashable, reserva: object):
+        """Abandona un relleno (la fuente falló o no tenía la clave)"""
+        with self._lock:
+            if self._reservas.get(clave) is reserva:
+                del self._reservas[clave]
+
+    def guardar(self, clave: Hashable, valor: Any, reserva: Optional[object] = None):
+        if self.max_entradas <= 0:
+            return
+        with self._lock:
+            if reserva is not None:
+                if self._reservas.get(clave) is not reserva:
+                    return  # invalidada (u otra lectura más reciente) durante el relleno
+                del self._reservas[clave]
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def invalidar(self, clave: Hashable):
+        with self._lock:
+            self._datos.pop(clave, None)
+            self._reservas.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self._reservas.clear()
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "ttl": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            }
@@ -22,9 +22,29 @@ class Config:
     TEST_SIZE: float = float(os.getenv("TEST_SIZE", 0.2))
     CV_FOLDS: int = int(os.getenv("CV_FOLDS", 5))
 
+    # Modelo destilado: árboles pocos y poco profundos que imitan al bosque en
+    # las rutas interactivas; solo se usa si coincide con él en DESTILADO_FIDELIDAD_MIN
+    DESTILADO_ARBOLES: int = int(os.getenv("DESTILADO_ARBOLES", 20))
+    DESTILADO_PROFUNDIDAD: int = int(os.getenv("DESTILADO_PROFUNDIDAD", 3))
+    DESTILADO_FIDELIDAD_MIN: float = float(os.getenv("DESTILADO_FIDELIDAD_MIN", 0.95))
+
     # Rendimiento
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", 3600))
+    CACHE_MAX_INQUILINOS: int = int(os.getenv("CACHE_MAX_INQUILINOS", 10000))
+    # Corto: la invalidación es local y no ve escrituras de otros procesos (API, trabajos, scripts)
+    CACHE_INQUILINOS_TTL: float = float(os.getenv("CACHE_INQUILINOS_TTL", 30))
     MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", 4))
+    RECOMENDACIONES_TOP_K: int = int(os.getenv("RECOMENDACIONES_TOP_K", 10))
+    # Ventana que se relee en cada sincronización incremental (relojes desfasados)
+    SINCRONIZACION_SOLAPE_S: float = float(os.getenv("SINCRONIZACION_SOLAPE_S", 5))
+    # Cada cuánto el gestor de trabajos marca como vivos los trabajos que encoló
+    TRABAJOS_LATIDO_S: float = float(os.getenv("TRABAJOS_LATIDO_S", 30))
+
+    # API HTTP de puntuación
+    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT: int = int(os.getenv("API_PORT", 8000))
+    API_VENTANA_LOTE_MS: float = float(os.getenv("API_VENTANA_LOTE_MS", 5))
+    API_MAX_LOTE: int = int(os.getenv("API_MAX_LOTE", 256))
 
     # Debug / Logs
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
@@ -1,55 +1,453 @@
 import logging
-from pymongo import MongoClient, ASCENDING
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING
 from dotenv import load_dotenv
 import os
 
+from app.core.almacenamiento import ClaveDuplicadaError, crear_almacenamiento
+from app.core.cache import CacheTTL
+from app.core.config import config
+
 load_dotenv()
 logger = logging.getLogger("app.core.database")
 
+# Documento contador para la asignación atómica de id_inquilino
+CONTADOR_ID_INQUILINO = "id_inquilino"
+
+# Campos de estilo de vida por los que filtra el chatbot (índices compuestos)
+CAMPOS_ESTILO_VIDA = ["fumador", "deporte", "orden", "bioritmo", "mascotas"]
+
+def _id_nativo(id_inquilino):
+    """IDs que vienen de pandas/numpy (np.int64) a tipo nativo de Python"""
+    return id_inquilino.item() if hasattr(id_inquilino, "item") else id_inquilino
+
+
 class DatabaseManager:
     def __init__(self):
+        # Caché read-through de documentos por id_inquilino (se invalida al escribir;
+        # el TTL acota lo desactualizado frente a escrituras de otros procesos)
+        self.cache = CacheTTL(config.CACHE_MAX_INQUILINOS, config.CACHE_INQUILINOS_TTL)
+        # (uri, base, colección): lo necesario para abrir la misma colección en otro proceso
+        self.conexion = (os.getenv("MONGO_URI"), os.getenv("MONGO_DB"), os.getenv("MONGO_COLLECTION"))
         try:
-            self.client = MongoClient(os.getenv("MONGO_URI"))
-            self.db = self.client[os.getenv("MONGO_DB")]
-            self.inquilinos_collection = self.db[os.getenv("MONGO_COLLECTION")]
+            # Backend según MONGO_URI: mongodb://... o sqlite:///ruta.db (embebido)
+            self.almacenamiento = crear_almacenamiento(*self.conexion[:2])
+            self.inquilinos = self.almacenamiento.coleccion(self.conexion[2])
+            self.contadores = self.almacenamiento.coleccion("contadores")
+
+            # Acceso directo a pymongo (solo backend Mongo) para scripts de mantenimiento
+            self.inquilinos_collection = getattr(self.inquilinos, "collection", None)
 
             # Crear índices
-            self.inquilinos_collection.create_index([("id_inquilino", ASCENDING)], unique=True)
+            self.asegurar_indices()
             logger.info("📇 Índices creados exitosamente")
-            logger.info(f"✅ Conectado a MongoDB: {os.getenv('MONGO_DB')}.{os.getenv('MONGO_COLLECTION')}")
+            logger.info(
+                f"✅ Conectado a {self.almacenamiento.tipo}: "
+                f"{os.getenv('MONGO_DB')}.{os.getenv('MONGO_COLLECTION')}"
+            )
+        except Exception as e:
+            logger.error(f"❌ Error conectando a la base de datos: {e}")
+
+    def asegurar_indices(self):
+        """
+        Crea (si no existen) los índices de la colección:
+        - id_inquilino único y updated_at para la sincronización incremental
+        - (campo, compatible, id_inquilino) por cada campo de estilo de vida,
+          para los filtros del chatbot (igualdad en campo y `compatible`)
+        - (campo, id_inquilino) por cada campo de estilo de vida, para las
+          páginas por clave del explorador: sin igualdad en `compatible` el
+          índice anterior no da el orden por ID y Mongo ordenaría en memoria
+        - cedula única (parcial: solo documentos con cédula numérica)
+        """
+        self.inquilinos.crear_indice([("id_inquilino", ASCENDING)], unico=True)
+        self.inquilinos.crear_indice([("updated_at", ASCENDING)])
+        self.inquilinos.crear_indice(
+            [("compatible", ASCENDING), ("id_inquilino", ASCENDING)], nombre="idx_compatible"
+        )
+        for campo in CAMPOS_ESTILO_VIDA:
+            self.inquilinos.crear_indice(
+                [(campo, ASCENDING), ("compatible", ASCENDING), ("id_inquilino", ASCENDING)],
+                nombre=f"idx_{campo}_compatible",
+            )
+            self.inquilinos.crear_indice(
+                [(campo, ASCENDING), ("id_inquilino", ASCENDING)], nombre=f"idx_{campo}_id"
+            )
+        try:
+            # Una cédula, un inquilino (reimportar un archivo no duplica). Solo
+            # las cédulas con valor: el formulario permite dejarla vacía
+            self.inquilinos.crear_indice(
+                [("cedula", ASCENDING)], unico=True, nombre="idx_cedula", parcial={"cedula": {"$type": "number"}}
+            )
         except Exception as e:
-            logger.error(f"❌ Error conectando a MongoDB: {e}")
+            logger.warning(f"⚠️ Índice único de cédula no creado (¿cédulas repetidas en la BD?): {e}")
 
     def insertar_inquilino(self, inquilino, log_individual=False):
         try:
             if not isinstance(inquilino, dict):
                 inquilino = inquilino.dict()
+            inquilino.setdefault("updated_at", datetime.utcnow())
+            if inquilino.get("id_inquilino") is None:
+                # El ID se reserva al insertar (el dict queda con el ID asignado)
+                inquilino["id_inquilino"] = self.siguiente_id_inquilino()
 
-            self.inquilinos_collection.insert_one(inquilino)
+            self.inquilinos.insertar(inquilino)
+            self.cache.invalidar(inquilino.get("id_inquilino"))
 
             if log_individual:
                 logger.info(f"✅ Inquilino insertado: {inquilino.get('nombre')}")
+            return True
+        except ClaveDuplicadaError as e:
+            # Cédula ya registrada, o el contador quedó por detrás de los datos
+            # (p. ej. importación externa): resembrarlo no hace daño en ningún caso
+            logger.error(f"❌ id_inquilino o cédula duplicados, resembrando contador: {e}")
+            self.recuperar_contador_ids()
+            return False
         except Exception as e:
             logger.error(f"❌ Error insertando inquilino: {e}")
+            return False
+
+    def insertar_inquilinos(self, inquilinos, lanzar_errores: bool = False):
+        """
+        Inserción masiva sin orden (los duplicados se omiten sin detener el
+        lote). Los documentos sin id_inquilino reciben un bloque contiguo del
+        contador. Devuelve cuántos se insertaron; ante un error devuelve 0, o
+        lo relanza con `lanzar_errores` (el importador manda el lote a cuarentena).
+        """
+        try:
+            ahora = datetime.utcnow()
+            documentos = []
+            for inquilino in inquilinos:
+                if not isinstance(inquilino, dict):
+                    inquilino = inquilino.dict()
+                inquilino.setdefault("updated_at", ahora)
+                documentos.append(inquilino)
+
+            sin_id = [d for d in documentos if d.get("id_inquilino") is None]
+            if sin_id:
+                primer_id = self.reservar_ids_inquilino(len(sin_id))
+                for desplazamiento, documento in enumerate(sin_id):
+                    documento["id_inquilino"] = primer_id + desplazamiento
+
+            insertados = self.inquilinos.insertar_muchos(documentos, ordenado=False)
+            for documento in documentos:
+                self.cache.invalidar(documento.get("id_inquilino"))
+            return insertados
+        except Exception as e:
+            logger.error(f"❌ Error en inserción masiva de inquilinos: {e}")
+            if lanzar_errores:
+                raise
+            return 0
 
     def buscar_inquilino(self, filtro):
+        if isinstance(filtro, dict) and list(filtro) == ["id_inquilino"] \
+                and not isinstance(filtro["id_inquilino"], dict):
+            return self.obtener_inquilino_por_id(filtro["id_inquilino"])
         try:
-            return self.inquilinos_collection.find_one(filtro)
+            return self.inquilinos.buscar_uno(filtro)
         except Exception as e:
             logger.error(f"❌ Error buscando inquilino: {e}")
             return None
 
+    # =========================================================================
+    # ⚡ CACHÉ POR ID
+    # =========================================================================
+    def obtener_inquilino_por_id(self, id_inquilino):
+        """🔹 Documento del inquilino vía caché (O(1) en acierto); None si no existe"""
+        id_inquilino = _id_nativo(id_inquilino)
+        doc = self.cache.obtener(id_inquilino)
+        if doc is None:
+            # Una escritura que invalide durante la lectura anula el relleno
+            reserva = self.cache.reservar(id_inquilino)
+            try:
+                doc = self.inquilinos.buscar_uno({"id_inquilino": id_inquilino})
+            except Exception as e:
+                logger.error(f"❌ Error buscando inquilino {id_inquilino}: {e}")
+                doc = None
+            if doc is None:
+                self.cache.liberar(id_inquilino, reserva)
+                return None
+            self.cache.guardar(id_inquilino, doc, reserva)
+        return dict(doc)
+
+    def obtener_inquilinos_por_ids(self, ids):
+        """🔹 {id: documento} para varios IDs; los fallos de caché se piden en una sola consulta"""
+        resultado, faltantes = {}, []
+        for id_inquilino in map(_id_nativo, ids):
+            doc = self.cache.obtener(id_inquilino)
+            if doc is None:
+                faltantes.append(id_inquilino)
+            else:
+                resultado[id_inquilino] = dict(doc)
+        if faltantes:
+            reservas = {id_inquilino: self.cache.reservar(id_inquilino) for id_inquilino in faltantes}
+            try:
+                for doc in self.inquilinos.buscar({"id_inquilino": {"$in": faltantes}}):
+                    if doc["id_inquilino"] in reservas:
+                        self.cache.guardar(doc["id_inquilino"], doc, reservas[doc["id_inquilino"]])
+                    resultado[doc["id_inquilino"]] = dict(doc)
+            except Exception as e:
+                logger.error(f"❌ Error buscando inquilinos por ID: {e}")
+            for id_inquilino, reserva in reservas.items():
+                self.cache.liberar(id_inquilino, reserva)
+        return resultado
+
+    def actualizar_inquilino(self, id_inquilino, cambios):
+        """Aplica `cambios` ($set) a un inquilino y lo saca de la caché"""
+        id_inquilino = _id_nativo(id_inquilino)
+        try:
+            return self.inquilinos.actualizar_uno(
+                {"id_inquilino": id_inquilino},
+                {"$set": cambios, "$currentDate": {"updated_at": True}},
+            )
+        except Exception as e:
+            logger.error(f"❌ Error actualizando inquilino {id_inquilino}: {e}")
+            return False
+        finally:
+            self.cache.invalidar(id_inquilino)
+
+    def eliminar_inquilino(self, id_inquilino):
+        id_inquilino = _id_nativo(id_inquilino)
+        try:
+            return self.inquilinos.eliminar({"id_inquilino": id_inquilino}) > 0
+        except Exception as e:
+            logger.error(f"❌ Error eliminando inquilino {id_inquilino}: {e}")
+            return False
+        finally:
+            self.cache.invalidar(id_inquilino)
+
+    def estadisticas_cache(self):
+        """Entradas, aciertos, fallos y tasa de aciertos de la caché por ID"""
+        return self.cache.estadisticas()
+
+    def buscar_inquilinos(self, filtro=None, proyeccion=None, limite=0, orden=None):
+        """🔹 Consulta filtrada en el servidor con proyección, orden y límite"""
+        try:
+            return self.inquilinos.buscar(filtro, proyeccion, orden=orden, limite=limite)
+        except Exception as e:
+            logger.error(f"❌ Error buscando inquilinos: {e}")
+            return []
+
+    def muestrear_inquilinos(self, filtro=None, n=100, proyeccion=None):
+        """🔹 Hasta `n` inquilinos al azar entre los que cumplen `filtro` ($sample en MongoDB)"""
+        try:
+            return self.inquilinos.muestrear(n, filtro, proyeccion)
+        except Exception as e:
+            logger.error(f"❌ Error muestreando inquilinos: {e}")
+            return []
+
+    def resumir_busqueda(self, filtro):
+        """🔹 Total y edad promedio de los inquilinos que cumplen `filtro` (una agregación)"""
+        try:
+            resumen = self.inquilinos.resumir(filtro, promedios=["edad"])
+            return {"total": resumen["total"], "edad_promedio": resumen["edad"] or 0.0}
+        except Exception as e:
+            logger.error(f"❌ Error resumiendo búsqueda: {e}")
+            return {"total": 0, "edad_promedio": 0.0}
+
+    def agregar_conteos(self, grupos, filtro=None):
+        """
+        🔹 Conteos agrupados en una sola agregación ($facet en MongoDB).
+        `grupos` = {nombre_faceta: [campos]}; devuelve {nombre_faceta: [{campo: valor, ..., "total": n}]}
+        """
+        try:
+            return self.inquilinos.agregar_conteos(grupos, filtro)
+        except Exception as e:
+            logger.error(f"❌ Error agregando conteos: {e}")
+            return {nombre: [] for nombre in grupos}
+
+    # =========================================================================
+    # 📄 PAGINACIÓN POR CLAVE (KEYSET)
+    # =========================================================================
+    def listar_inquilinos_pagina(self, despues_de=None, tamano=20, filtro=None, proyeccion=None):
+        """
+        🔹 Una página de inquilinos ordenada por id_inquilino, empezando después
+        de `despues_de` (None = primera página). Devuelve (documentos, cursor);
+        `cursor` es el id_inquilino a pasar para la página siguiente, o None si
+        no hay más. El costo depende del tamaño de página, no de la colección
+        (usa el índice de id_inquilino en lugar de saltar documentos).
+        """
+        condiciones = [filtro] if filtro else []
+        if despues_de is not None:
+            condiciones.append({"id_inquilino": {"$gt": _id_nativo(despues_de)}})
+        consulta = condiciones[0] if len(condiciones) == 1 else ({"$and": condiciones} if condiciones else {})
+
+        if proyeccion and any(proyeccion.values()) and not proyeccion.get("id_inquilino"):
+            # El cursor necesita el id_inquilino aunque la proyección no lo pida
+            proyeccion = {**proyeccion, "id_inquilino": 1}
+        try:
+            documentos = self.inquilinos.buscar(
+                consulta, proyeccion, orden=[("id_inquilino", ASCENDING)], limite=tamano + 1
+            )
+        except Exception as e:
+            logger.error(f"❌ Error listando página de inquilinos: {e}")
+            return [], None
+
+        hay_mas = len(documentos) > tamano
+        documentos = documentos[:tamano]
+        cursor = documentos[-1]["id_inquilino"] if hay_mas and documentos else None
+        return documentos, cursor
+
+    def recorrer_inquilinos(self, filtro=None, proyeccion=None, tamano=1000):
+        """🔹 Recorre la colección página a página (memoria acotada a `tamano` documentos)"""
+        cursor = None
+        while True:
+            documentos, cursor = self.listar_inquilinos_pagina(cursor, tamano, filtro, proyeccion)
+            if documentos:
+                yield documentos
+            if cursor is None:
+                break
+
     def obtener_todos_inquilinos(self):
         """🔹 Devuelve todos los inquilinos de la colección"""
         try:
-            return list(self.inquilinos_collection.find({}))
+            return self.inquilinos.buscar({})
         except Exception as e:
             logger.error(f"❌ Error obteniendo inquilinos: {e}")
             return []
 
+    # =========================================================================
+    # 🔄 SINCRONIZACIÓN INCREMENTAL
+    # =========================================================================
+    def obtener_cambios_desde(self, marca=None):
+        """
+        Devuelve (documentos, nueva_marca) con los inquilinos cuyo updated_at
+        es >= marca - SINCRONIZACION_SOLAPE_S (una consulta sobre el índice de
+        updated_at). Sin marca devuelve la colección completa.
+        La nueva marca es el mayor updated_at devuelto, y releer la ventana de
+        solape cubre escrituras con relojes distintos (utcnow del cliente y
+        $currentDate/$$NOW del servidor). Los documentos se repiten entre
+        llamadas: el consumidor debe aplicarlos de forma idempotente.
+        Los documentos sin updated_at solo llegan con la carga completa;
+        completar_updated_at se lo asigna.
+        """
+        try:
+            filtro = {}
+            if marca is not None:
+                filtro = {"updated_at": {"$gte": marca - timedelta(seconds=config.SINCRONIZACION_SOLAPE_S)}}
+            documentos = self.inquilinos.buscar(filtro)
+
+            nueva_marca = marca
+            for doc in documentos:
+                # created_at solo cuenta en la carga completa de documentos antiguos
+                fecha = doc.get("updated_at") or doc.get("created_at")
+                if isinstance(fecha, datetime) and (nueva_marca is None or fecha > nueva_marca):
+                    nueva_marca = fecha
+            return documentos, nueva_marca
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo cambios: {e}")
+            return [], marca
+
+    def completar_updated_at(self):
+        """
+        Asigna updated_at (fecha del servidor) a los documentos que no lo
+        tienen, p. ej. insertados antes de la sincronización incremental o por
+        herramientas externas. Devuelve cuántos se actualizaron.
+        """
+        try:
+            actualizados = self.inquilinos.actualizar_muchos(
+                {"updated_at": None}, {"$currentDate": {"updated_at": True}}
+            )
+            self.cache.limpiar()
+            return actualizados
+        except Exception as e:
+            logger.error(f"❌ Error completando updated_at: {e}")
+            return 0
+
+    def contar_inquilinos(self, filtro=None, exacto: bool = False):
+        """
+        Número de inquilinos. Sin filtro usa los metadatos de la colección (O(1),
+        puede ser aproximado en Mongo); con filtro o `exacto` cuenta en el
+        servidor apoyándose en los índices.
+        """
+        try:
+            if filtro or exacto:
+                return self.inquilinos.contar(filtro)
+            return self.inquilinos.contar_estimado()
+        except Exception as e:
+            logger.error(f"❌ Error contando inquilinos: {e}")
+            return 0
+
+    def ids_por_cedula(self, cedulas):
+        """{cédula: id_inquilino} de las cédulas ya registradas (sobre el índice de cédula)"""
+        cedulas = [c for c in set(cedulas) if c is not None]
+        if not cedulas:
+            return {}
+        try:
+            return {
+                doc["cedula"]: doc.get("id_inquilino")
+                for doc in self.inquilinos.buscar(
+                    # $type repite el filtro del índice parcial: sin él SQLite no lo usa
+                    {"cedula": {"$in": cedulas, "$type": "number"}},
+                    proyeccion={"_id": 0, "cedula": 1, "id_inquilino": 1},
+                )
+            }
+        except Exception as e:
+            logger.error(f"❌ Error buscando cédulas registradas: {e}")
+            return {}
+
+    def ids_inquilinos(self):
+        """id_inquilino de cada documento (solo esa columna); None si falla la consulta"""
+        try:
+            return [
+                doc.get("id_inquilino")
+                for doc in self.inquilinos.iterar(proyeccion={"_id": 0, "id_inquilino": 1}, tamano_lote=50000)
+            ]
+        except Exception as e:
+            logger.error(f"❌ Error leyendo los IDs de inquilinos: {e}")
+            return None
+
+    # =========================================================================
+    # 🔢 ASIGNACIÓN DE IDS
+    # =========================================================================
+    def recuperar_contador_ids(self):
+        """
+        Siembra el contador con el max(id_inquilino) actual. Usa $max, así que
+        nunca lo hace retroceder aunque varios procesos lo llamen a la vez.
+        """
+        ultimo = self.inquilinos.buscar_uno(
+            {"id_inquilino": {"$ne": None}},
+            proyeccion={"id_inquilino": 1},
+            orden=[("id_inquilino", DESCENDING)],
+        )
+        max_actual = int(ultimo["id_inquilino"]) if ultimo else 0
+        try:
+            self.contadores.actualizar_uno(
+                {"_id": CONTADOR_ID_INQUILINO}, {"$max": {"valor": max_actual}}, upsert=True
+            )
+        except ClaveDuplicadaError:
+            # Otro proceso creó el contador a la vez: aplicar el $max sobre el suyo
+            self.contadores.actualizar_uno({"_id": CONTADOR_ID_INQUILINO}, {"$max": {"valor": max_actual}})
+        logger.info(f"🔢 Contador de IDs sembrado en {max_actual}")
+
+    def reservar_ids_inquilino(self, cantidad=1):
+        """
+        Reserva de forma atómica un bloque contiguo de `cantidad` IDs y
+        devuelve el primero. El costo no depende del tamaño de la colección.
+        """
+        try:
+            doc = self.contadores.buscar_y_actualizar(
+                {"_id": CONTADOR_ID_INQUILINO}, {"$inc": {"valor": cantidad}}
+            )
+            if doc is None:
+                # Primer uso: sembrar desde los datos existentes y reintentar
+                self.recuperar_contador_ids()
+                doc = self.contadores.buscar_y_actualizar(
+                    {"_id": CONTADOR_ID_INQUILINO}, {"$inc": {"valor": cantidad}}
+                )
+            return int(doc["valor"]) - cantidad + 1
+        except Exception as e:
+            logger.error(f"❌ Error reservando IDs: {e}")
+            raise
+
+    def siguiente_id_inquilino(self):
+        """Devuelve un id_inquilino nuevo, único entre procesos y sesiones"""
+        return self.reservar_ids_inquilino(1)
+
     def limpiar_inquilinos(self):
         try:
-            self.inquilinos_collection.delete_many({})
+            self.inquilinos.eliminar({})
+            self.contadores.eliminar({"_id": CONTADOR_ID_INQUILINO})
+            self.cache.limpiar()
             logger.info("🧹 Colección limpiada correctamente")
         except Exception as e:
             logger.error(f"❌ Error limpiando colección: {e}")
@@ -0,0 +1,145 @@
+# app/core/database_async.py
+import asyncio
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from app.core.config import config
+from app.core.database import DatabaseManager, db_manager
+
+logger = logging.getLogger(__name__)
+
+# Métodos de DatabaseManager expuestos como corrutinas con el mismo nombre
+METODOS_ASINCRONOS = [
+    "insertar_inquilino",
+    "buscar_inquilino",
+    "buscar_inquilinos",
+    "resumir_busqueda",
+    "agregar_conteos",
+    "obtener_todos_inquilinos",
+    "obtener_cambios_desde",
+    "contar_inquilinos",
+    "reservar_ids_inquilino",
+    "siguiente_id_inquilino",
+    "limpiar_inquilinos",
+]
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    """Pool de hilos compartido (MAX_WORKERS) para las llamadas bloqueantes al backend"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=config.MAX_WORKERS, thread_name_prefix="db")
+    return _executor
+
+
+class AsyncDatabaseManager:
+    """
+    Variante asyncio de DatabaseManager: los mismos métodos como corrutinas.
+    Cada llamada corre en el pool de hilos, así que varias consultas
+    independientes esperan a la base de datos a la vez en lugar de en serie.
+    Funciona con cualquier backend (MongoDB o SQLite embebido).
+    """
+
+    def __init__(self, db: Optional[DatabaseManager] = None, executor: Optional[ThreadPoolExecutor] = None):
+        self.db = db or db_manager
+        self._executor = executor or _obtener_executor()
+
+    async def ejecutar(self, funcion: Callable, *args, **kwargs) -> Any:
+        """Ejecuta una función bloqueante en el pool sin bloquear el event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(funcion, *args, **kwargs))
+
+    async def obtener_inquilinos_df(self, particiones: Optional[int] = None, proyeccion=None) -> pd.DataFrame:
+        """
+        🔹 Carga la colección como DataFrame leyendo rangos de id_inquilino en
+        paralelo; cada hilo arma su DataFrame mientras los demás esperan a la BD.
+        Si los rangos no cubren todos los documentos (IDs no numéricos o
+        faltantes) se recurre a una lectura completa.
+        """
+        particiones = particiones or config.MAX_WORKERS
+        solo_id = {"id_inquilino": 1, "_id": 0}
+        primero, ultimo, total = await asyncio.gather(
+            self.buscar_inquilinos({"id_inquilino": {"$gte": 0}}, solo_id, 1, [("id_inquilino", 1)]),
+            self.buscar_inquilinos({"id_inquilino": {"$gte": 0}}, solo_id, 1, [("id_inquilino", -1)]),
+            self.contar_inquilinos(),
+        )
+        if not primero or not ultimo:
+            return await self.ejecutar(self._leer_df, {}, proyeccion)
+
+        minimo, maximo = primero[0]["id_inquilino"], ultimo[0]["id_inquilino"]
+        if not all(isinstance(v, int) for v in (minimo, maximo)):
+            return await self.ejecutar(self._leer_df, {}, proyeccion)
+
+        paso = max(1, math.ceil((maximo - minimo + 1) / particiones))
+        rangos = [
+            {"id_inquilino": {"$gte": inicio, "$lt": inicio + paso}}
+            for inicio in range(minimo, maximo + 1, paso)
+        ]
+        partes = await asyncio.gather(*(self.ejecutar(self._leer_df, f, proyeccion) for f in rangos))
+
+        if sum(len(p) for p in partes) != total:
+            logger.info("🔄 Rangos de ID incompletos, leyendo la colección completa")
+            return await self.ejecutar(self._leer_df, {}, proyeccion)
+
+        partes = [p for p in partes if not p.empty]
+        if not partes:
+            return pd.DataFrame()
+        return pd.concat(partes, ignore_index=True)
+
+    def _leer_df(self, filtro, proyeccion) -> pd.DataFrame:
+        return pd.DataFrame(self.db.buscar_inquilinos(filtro, proyeccion))
+
+
+def _corrutina_para(nombre: str):
+    metodo_sync = getattr(DatabaseManager, nombre)
+
+    async def metodo(self, *args, **kwargs):
+        return await self.ejecutar(getattr(self.db, nombre), *args, **kwargs)
+
+    metodo.__name__ = nombre
+    metodo.__doc__ = metodo_sync.__doc__
+    return metodo
+
+
+for _nombre in METODOS_ASINCRONOS:
+    setattr(AsyncDatabaseManager, _nombre, _corrutina_para(_nombre))
+
+
+# ============================================================================
+# FACHADA SÍNCRONA
+# ============================================================================
+def ejecutar_sync(corrutina):
+    """Corre una corrutina desde código síncrono (script de Streamlit, scripts CLI)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(corrutina)
+    # Ya hay un event loop en este hilo: correrla en un hilo aparte
+    with ThreadPoolExecutor(max_workers=1) as ejecutor:
+        return ejecutor.submit(asyncio.run, corrutina).result()
+
+
+def reunir(**consultas: Callable[[], Any]) -> Dict[str, Any]:
+    """
+    Ejecuta en paralelo funciones independientes (sin argumentos) y devuelve
+    {nombre: resultado}. Ej: reunir(estadisticas=calcular_estadisticas,
+    total=db_manager.contar_inquilinos)
+    """
+    async def _reunir():
+        adb = AsyncDatabaseManager()
+        resultados = await asyncio.gather(*(adb.ejecutar(f) for f in consultas.values()))
+        return dict(zip(consultas, resultados))
+
+    return ejecutar_sync(_reunir())
+
+
+def cargar_inquilinos_df(particiones: Optional[int] = None, proyeccion=None) -> pd.DataFrame:
+    """Versión síncrona de AsyncDatabaseManager.obtener_inquilinos_df"""
+    return ejecutar_sync(AsyncDatabaseManager().obtener_inquilinos_df(particiones, proyeccion))
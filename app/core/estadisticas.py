@@ -0,0 +1,124 @@
+# app/core/estadisticas.py
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.database import db_manager
+from app.core.inquilino_schema import TABLA_CATEGORIAS
+
+logger = logging.getLogger(__name__)
+
+# Categorías con desglose de conteos (dashboard + chatbot)
+CATEGORIAS_ESTADISTICAS = [
+    "fumador", "mascotas", "orden", "deporte", "bioritmo", "nivel_educativo", "personalidad"
+]
+
+# Indicadores binarios para el mapa de correlaciones: campo → valor "positivo"
+INDICADORES_CORRELACION = {
+    "fumador": "si",
+    "mascotas": "con mascotas",
+    "orden": "ordenada",
+    "deporte": "si",
+}
+
+BINS_HISTOGRAMA_EDAD = 15
+
+
+def calcular_estadisticas(db=None) -> Dict:
+    """
+    📊 Estadísticas de la población en una única agregación $facet.
+
+    Devuelve un dict compacto (tamaño independiente del número de inquilinos):
+    total, edad (promedio/mediana/min/max/histograma), conteos por categoría,
+    reparto de `compatible` y matriz de correlaciones de los indicadores.
+    """
+    db = db or db_manager
+
+    grupos = {campo: [campo] for campo in CATEGORIAS_ESTADISTICAS}
+    grupos["edad"] = ["edad"]
+    grupos["compatible"] = ["compatible"]
+    grupos["combinaciones"] = list(INDICADORES_CORRELACION)
+
+    conteos = db.agregar_conteos(grupos)
+    total = sum(fila["total"] for fila in conteos["compatible"])
+
+    return {
+        "total": total,
+        "edad": _resumir_edades(conteos["edad"]),
+        "categorias": {
+            campo: _ordenar_conteos(conteos[campo], campo) for campo in CATEGORIAS_ESTADISTICAS
+        },
+        "compatible": {
+            "compatibles": sum(f["total"] for f in conteos["compatible"] if f.get("compatible") == 1),
+            "no_compatibles": sum(f["total"] for f in conteos["compatible"] if f.get("compatible") == 0),
+        },
+        "correlaciones": _correlaciones(conteos["combinaciones"]),
+        "generado": datetime.utcnow().isoformat(),
+    }
+
+
+def _ordenar_conteos(filas: List[Dict], campo: str) -> Dict[str, int]:
+    """Equivalente a value_counts(): sin nulos y de mayor a menor"""
+    pares = [(str(f[campo]), f["total"]) for f in filas if f.get(campo) is not None]
+    return dict(sorted(pares, key=lambda x: x[1], reverse=True))
+
+
+def _resumir_edades(filas: List[Dict]) -> Dict:
+    """Promedio, mediana, rango e histograma a partir de los conteos por edad"""
+    filas = [f for f in filas if isinstance(f.get("edad"), (int, float))]
+    if not filas:
+        return {"promedio": 0.0, "mediana": 0.0, "min": 0, "max": 0,
+                "histograma": {"bordes": [], "conteos": []}}
+
+    edades = np.array([f["edad"] for f in filas], dtype=float)
+    pesos = np.array([f["total"] for f in filas], dtype=int)
+    orden = np.argsort(edades)
+    edades, pesos = edades[orden], pesos[orden]
+
+    # Mediana ponderada (promedio de los dos centrales si el total es par)
+    acumulado = np.cumsum(pesos)
+    n = int(acumulado[-1])
+    bajo = edades[np.searchsorted(acumulado, (n - 1) // 2 + 1)]
+    alto = edades[np.searchsorted(acumulado, n // 2 + 1)]
+
+    conteos_hist, bordes = np.histogram(edades, bins=BINS_HISTOGRAMA_EDAD, weights=pesos)
+    return {
+        "promedio": float(np.average(edades, weights=pesos)),
+        "mediana": float((bajo + alto) / 2),
+        "min": float(edades[0]),
+        "max": float(edades[-1]),
+        "histograma": {
+            "bordes": [float(b) for b in bordes],
+            "conteos": [int(c) for c in conteos_hist],
+        },
+    }
+
+
+def _correlaciones(filas: List[Dict]) -> Dict:
+    """Correlación de Pearson de los indicadores binarios usando las combinaciones como pesos"""
+    campos = list(INDICADORES_CORRELACION)
+    if not filas:
+        return {"campos": campos, "matriz": []}
+
+    # Códigos de la tabla de categorías: las variantes ("Sí", "SI") cuentan como el valor canónico
+    codigo = TABLA_CATEGORIAS.codigo
+    positivos = {campo: codigo(campo, valor) for campo, valor in INDICADORES_CORRELACION.items()}
+    X = np.array([
+        [1.0 if codigo(campo, f.get(campo)) == positivos[campo] else 0.0 for campo in campos]
+        for f in filas
+    ])
+    pesos = np.array([f["total"] for f in filas], dtype=int)
+    if pesos.sum() < 2:
+        return {"campos": campos, "matriz": []}
+
+    covarianza = np.atleast_2d(np.cov(X, rowvar=False, fweights=pesos))
+    desviacion = np.sqrt(np.diag(covarianza))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matriz = covarianza / np.outer(desviacion, desviacion)
+
+    return {
+        "campos": campos,
+        "matriz": [[None if np.isnan(v) else float(v) for v in fila] for fila in matriz],
+    }
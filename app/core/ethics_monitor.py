@@ -3,9 +3,6 @@ import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple
 import logging
-from sklearn.metrics import confusion_matrix
-from fairlearn.metrics import MetricFrame, selection_rate
-from fairlearn.metrics import demographic_parity_difference, equalized_odds_difference
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +24,9 @@ class EthicsMonitor:
         """
         Analiza sesgos en predicciones por grupos demográficos
         """
+        # fairlearn se carga al primer análisis, no al importar el módulo
+        from fairlearn.metrics import demographic_parity_difference, equalized_odds_difference
+
         bias_report = {
             'overall_accuracy': (y_true == y_pred).mean(),
             'groups_analysis': {},
@@ -142,6 +142,8 @@ class EthicsMonitor:
     def _calculate_equity_metrics(self, y_true: np.ndarray, y_pred: np.ndarray,
                                  demographics: Dict[str, np.ndarray]) -> Dict:
         """Calcula métricas de equidad detalladas"""
+        from fairlearn.metrics import MetricFrame
+
         equity_metrics = {}
         
         for feature_name, feature_values in demographics.items():
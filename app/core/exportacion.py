@@ -0,0 +1,261 @@
+# app/core/exportacion.py
+"""
+Exportación y restauración de la colección de inquilinos.
+
+La exportación recorre la colección con un cursor por lotes y la escribe en
+partes JSONL comprimidas (gzip, o zstd si está instalado `zstandard`):
+    <destino>/manifiesto.json
+    <destino>/inquilinos-00000.jsonl.gz
+    ...
+Cada línea es el documento sin `_id`, con claves ordenadas y fechas en ISO
+(el mismo formato del backend SQLite). El manifiesto guarda, por parte, el
+número de documentos y el sha256 del archivo, y para la colección entera una
+suma de verificación independiente del orden (suma de los sha256 de cada
+línea), que permite comprobar el contenido después de restaurar.
+La restauración verifica cada parte y la inserta en paralelo, en bloques sin orden.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.almacenamiento import a_json, crear_almacenamiento, desde_json
+from app.core.config import config
+from app.core.inquilino_schema import CAMPOS_PII
+
+logger = logging.getLogger(__name__)
+
+MANIFIESTO = "manifiesto.json"
+EXTENSIONES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+TAMANO_LOTE = 5000
+MODULO_SUMA = 2 ** 64
+
+# Colecciones abiertas por cada proceso trabajador de la restauración, por conexión
+_colecciones_trabajador: Dict[tuple, object] = {}
+
+
+# ============================================================================
+# 🗜️ ARCHIVOS COMPRIMIDOS
+# ============================================================================
+def _abrir(ruta: str, modo: str, compresion: str):
+    """Abre una parte en modo texto ("rt"/"wt") con su compresión"""
+    if compresion == "gzip":
+        return gzip.open(ruta, modo, encoding="utf-8", compresslevel=6) if "w" in modo \
+            else gzip.open(ruta, modo, encoding="utf-8")
+    if compresion == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("La compresión zstd requiere zstandard (pip install zstandard)")
+        return zstandard.open(ruta, modo, encoding="utf-8")
+    raise ValueError(f"Compresión no soportada: {compresion} (use {', '.join(EXTENSIONES)})")
+
+
+def _sha256_archivo(ruta: str) -> str:
+    digesto = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            digesto.update(bloque)
+    return digesto.hexdigest()
+
+
+def _linea(documento: Dict) -> str:
+    return json.dumps(documento, sort_keys=True, default=a_json, ensure_ascii=False)
+
+
+def _suma_linea(linea: str) -> int:
+    return int.from_bytes(hashlib.sha256(linea.encode("utf-8")).digest()[:8], "big")
+
+
+def suma_coleccion(coleccion, proyeccion: Optional[Dict] = None) -> Dict:
+    """Conteo y suma de verificación del contenido actual de la colección"""
+    total, suma = 0, 0
+    for documento in coleccion.iterar(proyeccion=proyeccion or {"_id": 0}, tamano_lote=TAMANO_LOTE):
+        total += 1
+        suma = (suma + _suma_linea(_linea(documento))) % MODULO_SUMA
+    return {"documentos": total, "suma": f"{suma:016x}"}
+
+
+# ============================================================================
+# 📤 EXPORTACIÓN
+# ============================================================================
+def exportar_inquilinos(destino: str, documentos_por_parte: int = 100000, sin_pii: bool = False,
+                        compresion: str = "gzip", db=None) -> Dict:
+    """
+    Exporta la colección a `destino` en partes de `documentos_por_parte`.
+    Con `sin_pii` se excluyen CAMPOS_PII (nombre, cédula) en la consulta.
+    La memoria queda acotada a un lote del cursor.
+    """
+    if db is None:
+        from app.core.database import db_manager as db
+    if compresion not in EXTENSIONES:
+        raise ValueError(f"Compresión no soportada: {compresion} (use {', '.join(EXTENSIONES)})")
+
+    os.makedirs(destino, exist_ok=True)
+    proyeccion = {"_id": 0, **({campo: 0 for campo in CAMPOS_PII} if sin_pii else {})}
+    inicio = time.monotonic()
+    partes: List[Dict] = []
+    archivo, total, suma = None, 0, 0
+
+    def cerrar_parte():
+        archivo.close()
+        ruta = os.path.join(destino, partes[-1]["archivo"])
+        partes[-1].update(bytes=os.path.getsize(ruta), sha256=_sha256_archivo(ruta))
+
+    try:
+        cursor = db.inquilinos.iterar(proyeccion=proyeccion, orden=[("id_inquilino", 1)], tamano_lote=TAMANO_LOTE)
+        for documento in cursor:
+            if archivo is None or partes[-1]["documentos"] >= documentos_por_parte:
+                if archivo is not None:
+                    cerrar_parte()
+                    logger.info(f"📤 {total:,} documentos exportados · {total / (time.monotonic() - inicio):,.0f} docs/s")
+                nombre = f"inquilinos-{len(partes):05d}{EXTENSIONES[compresion]}"
+                partes.append({"archivo": nombre, "documentos": 0})
+                archivo = _abrir(os.path.join(destino, nombre), "wt", compresion)
+            linea = _linea(documento)
+            archivo.write(linea + "\n")
+            partes[-1]["documentos"] += 1
+            total += 1
+            suma = (suma + _suma_linea(linea)) % MODULO_SUMA
+        if archivo is not None:
+            cerrar_parte()
+    finally:
+        if archivo is not None and not archivo.closed:
+            archivo.close()
+
+    segundos = time.monotonic() - inicio
+    manifiesto = {
+        "coleccion": "inquilinos",
+        "creado": datetime.now().isoformat(),
+        "compresion": compresion,
+        "sin_pii": sin_pii,
+        "campos_excluidos": CAMPOS_PII if sin_pii else [],
+        "documentos": total,
+        "suma": f"{suma:016x}",
+        "partes": partes,
+        "segundos": round(segundos, 2),
+    }
+    with open(os.path.join(destino, MANIFIESTO), "w") as f:
+        json.dump(manifiesto, f, indent=2)
+
+    logger.info(
+        f"✅ Exportación completa: {total:,} documentos en {len(partes)} partes "
+        f"({sum(p['bytes'] for p in partes) / 1024 ** 2:.1f} MB) en {segundos:.1f}s"
+    )
+    return manifiesto
+
+
+# ============================================================================
+# 📥 RESTAURACIÓN
+# ============================================================================
+def _coleccion_trabajador(conexion: tuple):
+    """Colección de destino dentro de un proceso trabajador (se abre una vez por conexión)"""
+    if conexion not in _colecciones_trabajador:
+        uri, nombre_db, coleccion = conexion
+        _colecciones_trabajador[conexion] = crear_almacenamiento(uri, nombre_db).coleccion(coleccion)
+    return _colecciones_trabajador[conexion]
+
+
+def _importar_parte(tarea, coleccion=None) -> Dict:
+    """
+    Verifica e inserta una parte en `coleccion`; en un proceso trabajador
+    (coleccion=None) se abre la de la conexión que viene en la tarea.
+    """
+    ruta, parte, compresion, conexion = tarea
+    coleccion = coleccion or _coleccion_trabajador(conexion)
+
+    if _sha256_archivo(ruta) != parte["sha256"]:
+        raise ValueError(f"sha256 no coincide en {parte['archivo']}: archivo dañado o incompleto")
+
+    leidos = insertados = suma = 0
+    lote: List[Dict] = []
+    with _abrir(ruta, "rt", compresion) as archivo:
+        for linea in archivo:
+            linea = linea.rstrip("\n")
+            if not linea:
+                continue
+            suma = (suma + _suma_linea(linea)) % MODULO_SUMA
+            lote.append(desde_json(json.loads(linea)))
+            leidos += 1
+            if len(lote) >= TAMANO_LOTE:
+                insertados += coleccion.insertar_muchos(lote, ordenado=False)
+                lote = []
+    if lote:
+        insertados += coleccion.insertar_muchos(lote, ordenado=False)
+
+    if leidos != parte["documentos"]:
+        raise ValueError(f"{parte['archivo']}: {leidos} documentos leídos, el manifiesto indica {parte['documentos']}")
+    return {"archivo": parte["archivo"], "leidos": leidos, "insertados": insertados, "suma": suma}
+
+
+def restaurar_inquilinos(origen: str, procesos: Optional[int] = None, limpiar: bool = False,
+                         verificar: bool = True, db=None) -> Dict:
+    """
+    Restaura una exportación de `origen`. Las partes se insertan en paralelo
+    (un proceso por parte, hasta `procesos`). Con `limpiar` se vacía antes la
+    colección; si queda vacía, `verificar` compara conteo y suma del contenido
+    restaurado con el manifiesto.
+    """
+    if db is None:
+        from app.core.database import db_manager as db
+    with open(os.path.join(origen, MANIFIESTO)) as f:
+        manifiesto = json.load(f)
+
+    if limpiar:
+        db.limpiar_inquilinos()
+    coleccion_vacia = db.inquilinos.contar() == 0
+    procesos = procesos or config.MAX_WORKERS
+    # Los trabajadores abren la colección de `db` con sus datos de conexión
+    conexion = getattr(db, "conexion", None)
+    if conexion is None or ":memory:" in (conexion[0] or ""):
+        procesos = 1
+    tareas = [(os.path.join(origen, p["archivo"]), p, manifiesto["compresion"], conexion) for p in manifiesto["partes"]]
+
+    inicio = time.monotonic()
+    leidos = insertados = suma = 0
+
+    def registrar(resultado: Dict):
+        nonlocal leidos, insertados, suma
+        leidos += resultado["leidos"]
+        insertados += resultado["insertados"]
+        suma = (suma + resultado["suma"]) % MODULO_SUMA
+        logger.info(
+            f"📥 {resultado['archivo']}: {resultado['insertados']:,} insertados · "
+            f"{leidos:,}/{manifiesto['documentos']:,} · {leidos / (time.monotonic() - inicio):,.0f} docs/s"
+        )
+
+    if procesos <= 1 or len(tareas) <= 1:
+        for tarea in tareas:
+            registrar(_importar_parte(tarea, db.inquilinos))
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(tareas)),
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            for resultado in pool.map(_importar_parte, tareas):
+                registrar(resultado)
+
+    # Los IDs importados pueden superar al contador; la caché puede tener versiones viejas
+    db.recuperar_contador_ids()
+    db.cache.limpiar()
+
+    if f"{suma:016x}" != manifiesto["suma"]:
+        raise ValueError("La suma de verificación de las partes no coincide con el manifiesto")
+
+    resumen = {
+        "documentos": manifiesto["documentos"],
+        "insertados": insertados,
+        "omitidos": leidos - insertados,
+        "segundos": round(time.monotonic() - inicio, 2),
+    }
+    if verificar and coleccion_vacia:
+        restaurado = suma_coleccion(db.inquilinos)
+        resumen["verificado"] = restaurado == {"documentos": manifiesto["documentos"], "suma": manifiesto["suma"]}
+        if not resumen["verificado"]:
+            logger.error(f"❌ El contenido restaurado no coincide con la exportación: {restaurado}")
+    logger.info(f"✅ Restauración completa: {resumen}")
+    return resumen
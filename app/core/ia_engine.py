@@ -1,37 +1,38 @@
 # app/core/ia_engine.py
+import copy
+import io
 import os
 import joblib
 import json
 import logging
+import threading
+import time
+import tracemalloc
 import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
-
-# Machine Learning
-from sklearn.preprocessing import OneHotEncoder, StandardScaler, LabelEncoder
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.cluster import KMeans
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
-    silhouette_score,
-)
-from sklearn.decomposition import PCA
+from typing import Callable, Dict, List, Tuple, Optional
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from functools import wraps
+from threadpoolctl import threadpool_limits
+
+# Machine Learning: sklearn se importa en cada método al usarse (el arranque
+# de la app y de los scripts no paga su carga; ver medir_tiempo_importacion.py)
 
 # Core
-from app.core.database import DatabaseManager
+from app.core.database_async import cargar_inquilinos_df
+from app.core.inquilino_schema import TABLA_CATEGORIAS
+from app.core.inquilinos_frame import perfil_inquilino
 from app.core.config import config
 from app.core.ethics_monitor import EthicsMonitor
 from app.core.model_explainer import ModelExplainer
 
 logger = logging.getLogger(__name__)
 
+# Columnas de identificación / sistema que nunca se usan como features
+COLUMNAS_NO_FEATURES = ["_id", "id_inquilino", "nombre", "created_at", "updated_at"]
+
 
 # ============================================================================
 # 📊 CLASES DE DATOS
@@ -49,9 +50,153 @@ class ModelMetrics:
     model_version: str = "2.0"
 
 
+@dataclass(frozen=True, eq=False)
+class ModelosServicio:
+    """
+    Modelos ajustados de una versión y sus metadatos. No se modifica: entrenar
+    o recargar arma uno nuevo y lo publica cambiando una sola referencia, así
+    que la puntuación lo lee sin lock y nunca mezcla piezas de dos versiones.
+    Quien codifica y después puntúa pasa el mismo objeto (`motor.modelos`) a
+    ambas llamadas para no cruzar un cambio de versión.
+    """
+    encoder: object = None
+    scaler: object = None
+    compatibility_model: object = None
+    modelo_destilado: object = None
+    satisfaction_model: object = None
+    clustering_model: object = None
+    dimensionality_reducer: object = None
+    metrics: ModelMetrics = field(default_factory=ModelMetrics)
+    feature_names: list = field(default_factory=list)
+    feature_importance: dict = field(default_factory=dict)
+    reporte_entrenamiento: dict = field(default_factory=dict)
+    reporte_destilado: dict = field(default_factory=dict)
+    is_trained: bool = False
+
+
 # ============================================================================
 # 🧠 MOTOR DE IA
 # ============================================================================
+# Etapas que reporta entrenar_modelo_completo(progreso=...)
+ETAPAS_ENTRENAMIENTO = ["datos", "preparacion", "modelos", "evaluacion", "etica", "guardado"]
+
+# Partes del entrenamiento que se pueden elegir con entrenar_modelo_completo(etapas=...)
+ETAPAS_MODELO = ["compatibilidad", "satisfaccion", "clustering", "pca", "cv", "sesgos", "explicador", "destilado"]
+
+# Filas máximas del conjunto de transferencia con que se entrena el modelo destilado
+MAX_TRANSFERENCIA = 60000
+
+# Memoria máxima de la matriz combinada (pares × features) que puntuar_lote
+# pasa al modelo de una vez; lotes mayores se puntúan por tramos
+MEMORIA_LOTE = 64 * 1024 ** 2
+
+# Cada cuántos segundos, como mucho, se mira si otro proceso guardó modelos nuevos
+INTERVALO_REVISION_MODELOS = 5.0
+
+
+def _marca_modelos(model_path: str) -> Optional[float]:
+    """Fecha de modificación de metadata.json (se escribe al final de cada guardado)"""
+    for nombre in ("metadata.json", "modelo.pkl"):
+        try:
+            return os.stat(os.path.join(model_path, nombre)).st_mtime
+        except OSError:
+            continue
+    return None
+
+
+class MedidorEtapas:
+    """Tiempo y pico de memoria (tracemalloc) de cada etapa del entrenamiento"""
+
+    def __init__(self):
+        self.etapas: List[Dict] = []
+        self._iniciado = False
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciado = True
+        return self
+
+    def __exit__(self, *exc):
+        if self._iniciado:
+            tracemalloc.stop()
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        yield
+        self.etapas.append({
+            "etapa": nombre,
+            "segundos": round(time.perf_counter() - inicio, 3),
+            "memoria_pico_mb": round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1),
+        })
+
+
+def _muestra_estratificada(df: pd.DataFrame, muestra: float) -> pd.DataFrame:
+    """`muestra` <= 1 es una fracción; > 1, un número de filas. Estratifica por `compatible`"""
+    from sklearn.model_selection import train_test_split
+
+    tamano = int(round(muestra * len(df))) if muestra <= 1 else int(muestra)
+    if tamano >= len(df):
+        return df
+    estratos = None
+    if "compatible" in df.columns and df["compatible"].nunique() > 1:
+        estratos = df["compatible"]
+    submuestra, _ = train_test_split(df, train_size=tamano, stratify=estratos, random_state=42)
+    return submuestra.reset_index(drop=True)
+
+
+def _con_pares(X: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Filas de X más el mismo número de promedios de pares al azar: el modelo
+    puntúa (X1 + X2) / 2, y el escalado es afín, así que se promedia ya escalado
+    """
+    i, j = rng.integers(0, len(X), (2, len(X)))
+    return np.vstack([X, (X[i] + X[j]) / 2])
+
+
+def _latencia_ms(predecir: Callable, X: np.ndarray, repeticiones: int = 50) -> float:
+    """Mediana en ms de una llamada con una sola fila (el caso interactivo)"""
+    tiempos = []
+    for k in range(repeticiones):
+        inicio = time.perf_counter()
+        predecir(X[k % len(X)][None, :])
+        tiempos.append(time.perf_counter() - inicio)
+    return round(float(np.median(tiempos)) * 1000, 3)
+
+
+def _tamano_bytes(modelo) -> int:
+    buffer = io.BytesIO()
+    joblib.dump(modelo, buffer)
+    return buffer.tell()
+
+
+def _como_texto(X: pd.DataFrame) -> pd.DataFrame:
+    """Features como texto para el OneHotEncoder (acepta las vistas categóricas del AlmacenInquilinos)"""
+    categoricas = X.select_dtypes("category").columns
+    if len(categoricas):
+        X = X.astype({columna: object for columna in categoricas})
+    return X.fillna("desconocido").astype(str)
+
+
+def _sincronizado(metodo):
+    """
+    Serializa explicaciones y análisis éticos: el explainer SHAP se configura
+    de forma perezosa y no es seguro ante llamadas concurrentes. La puntuación
+    no pasa por aquí: lee el ModelosServicio vigente sin lock.
+    """
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        with self._lock_explicador:
+            return metodo(self, *args, **kwargs)
+    return envoltura
+
+
+def _cargar_si_existe(ruta: str):
+    return joblib.load(ruta) if os.path.exists(ruta) else None
+
+
 class RoomMatchIAEngine:
     """
     🎯 Motor de Inteligencia Artificial RoomMatchAI v2.0
@@ -64,12 +209,24 @@ class RoomMatchIAEngine:
          # Logger propio
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
-        
+        # Locks: publicar/recargar modelos, un entrenamiento a la vez y el
+        # explainer. Ninguno se toma al puntuar
+        self._lock = threading.RLock()
+        self._lock_entrenamiento = threading.Lock()
+        self._lock_explicador = threading.RLock()
+
+        # Modelos vigentes (inmutables); los atributos de abajo los reflejan
+        # (ver _publicar) y son el estado de trabajo de un entrenamiento
+        self._modelos = ModelosServicio()
+        # Guardado de MODEL_PATH que se cargó (ver recargar_si_hay_version_nueva)
+        self._marca_cargada: Optional[float] = None
+        self._proxima_revision = 0.0
+
         # ML Models
         self.encoder = None
-        self.scaler = StandardScaler()
-        self.label_encoder = LabelEncoder()
+        self.scaler = None
         self.compatibility_model = None
+        self.modelo_destilado = None  # estudiante del bosque para las rutas interactivas
         self.satisfaction_model = None
         self.clustering_model = None
         self.dimensionality_reducer = None
@@ -79,6 +236,8 @@ class RoomMatchIAEngine:
         self.is_trained = False
         self.feature_names = []
         self.feature_importance = {}
+        self.reporte_entrenamiento = {}
+        self.reporte_destilado = {}
 
         # Nuevos componentes para SENASoft 2025
         self.ethics_monitor = EthicsMonitor()
@@ -106,69 +265,156 @@ class RoomMatchIAEngine:
     # 🔥 OBTENER DATASET
     # =========================================================================
     def obtener_dataset(self) -> pd.DataFrame:
-        db = DatabaseManager()
-        data = db.obtener_todos_inquilinos()
-        return pd.DataFrame(data)
+        # Rangos de id_inquilino leídos en paralelo (ver database_async)
+        return cargar_inquilinos_df()
 
 
     # =========================================================================
     # 🚀 ENTRENAMIENTO
     # =========================================================================
-    def entrenar_modelo_completo(self) -> Dict:
-        """Entrena el modelo híbrido completo usando la BD - VERSIÓN MEJORADA"""
-        df = self.obtener_dataset()
-        if df.empty:
-            return {"error": "No hay datos suficientes"}
-
-        start_time = datetime.now()
-        logger.info(f"📊 Dataset cargado: {len(df)} registros")
-
-        # Preparar datos
-        X, y, feature_names = self._preparar_datos(df)
-        self.feature_names = feature_names
-
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=config.TEST_SIZE, random_state=42, stratify=y
-        )
-
-        # Modelos
-        self._entrenar_compatibility_model(X_train, y_train)
-        self._entrenar_satisfaction_model(X_train, y_train)
-        self._entrenar_encoder(df)
-        self._entrenar_clustering(X)
-        self._entrenar_dimensionality_reduction(X)
-
-        # Evaluar
-        self._evaluar_modelos(X_test, y_test, X, y)
-
-        # **NUEVO: Configurar componentes de explicabilidad y ética**
-        self.model_explainer.model = self.compatibility_model
-        self.model_explainer.feature_names = self.feature_names
-        self.model_explainer.initialize_explainer(X_train)
-
-        # **NUEVO: Análisis de sesgos post-entrenamiento**
-        sensitive_features = {}
-        if 'genero' in df.columns:
-            sensitive_features['genero'] = df['genero'].values
-        if 'edad' in df.columns:
-            age_groups = pd.cut(df['edad'], bins=[0, 25, 35, 100], labels=['<25', '25-35', '>35'])
-            sensitive_features['grupo_edad'] = age_groups.astype(str).values
+    def entrenar_modelo_completo(
+        self,
+        progreso: Optional[Callable[[str, float], None]] = None,
+        muestra: Optional[float] = None,
+        n_jobs: Optional[int] = None,
+        etapas: Optional[List[str]] = None,
+    ) -> Dict:
+        """
+        Entrena el modelo híbrido completo usando la BD - VERSIÓN MEJORADA.
+        `progreso(etapa, fraccion)` se llama al terminar cada etapa de ETAPAS_ENTRENAMIENTO
+        (puede lanzar una excepción para cancelar el entrenamiento).
+        `muestra`: fracción (<= 1) o número de inquilinos, estratificado por `compatible`.
+        `n_jobs`: límite de núcleos (bosque y BLAS/OpenMP). `etapas`: subconjunto de
+        ETAPAS_MODELO (compatibilidad es obligatoria). El tiempo y el pico de memoria
+        de cada etapa quedan en metadata.json ("entrenamiento").
+        El ajuste se hace en un motor aparte (encoder y scaler nuevos): mientras
+        dura, las sesiones siguen puntuando con los modelos vigentes, y al
+        terminar se publican los nuevos de una sola vez.
+        """
+        with self._lock_entrenamiento:
+            entrenador = RoomMatchIAEngine()
+            entrenador.model_config = copy.deepcopy(self.model_config)
+            resultado = entrenador._entrenar(progreso, muestra, n_jobs, etapas)
+            if "error" not in resultado:
+                with self._lock:
+                    self._publicar(entrenador._empaquetar(), entrenador.model_explainer)
+                    self._marca_cargada = _marca_modelos(config.MODEL_PATH)
+            return resultado
+
+    def _entrenar(self, progreso, muestra, n_jobs, etapas) -> Dict:
+        """Cuerpo de entrenar_modelo_completo; modifica este motor (el entrenador)"""
+        from sklearn.model_selection import train_test_split
+
+        progreso = progreso or (lambda etapa, fraccion: None)
+        etapas = list(ETAPAS_MODELO if etapas is None else etapas)
+        desconocidas = [e for e in etapas if e not in ETAPAS_MODELO]
+        if desconocidas:
+            return {"error": f"Etapas desconocidas: {', '.join(desconocidas)} (use {', '.join(ETAPAS_MODELO)})"}
+        if "compatibilidad" not in etapas:
+            return {"error": "La etapa compatibilidad es obligatoria"}
+        if n_jobs is not None:
+            self.model_config["rf_params"]["n_jobs"] = n_jobs
+
+        medidor = MedidorEtapas()
+        with medidor, threadpool_limits(limits=n_jobs if n_jobs and n_jobs > 0 else None):
+            with medidor.etapa("datos"):
+                df = self.obtener_dataset()
+                total_inquilinos = len(df)
+                if muestra is not None and not df.empty:
+                    df = _muestra_estratificada(df, muestra)
+            if df.empty:
+                return {"error": "No hay datos suficientes"}
 
-        y_pred = self.compatibility_model.predict(X)
-        bias_analysis = self.ethics_monitor.analyze_bias(y, y_pred, sensitive_features)
+            start_time = datetime.now()
+            logger.info(f"📊 Dataset cargado: {len(df)} registros (de {total_inquilinos})")
+            progreso("datos", 1.0)
 
-        # Guardar
-        self._guardar_modelos()
+            # Preparar datos
+            with medidor.etapa("preparacion"):
+                X, y, feature_names = self._preparar_datos(df)
+                self.feature_names = feature_names
+                self._entrenar_encoder(df)
 
-        self.is_trained = True
-        self.metrics.training_time = (datetime.now() - start_time).total_seconds()
-        self.metrics.last_training = datetime.now().isoformat()
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=config.TEST_SIZE, random_state=42, stratify=y
+                )
+            progreso("preparacion", 1.0)
+
+            # Modelos (los que no se entrenan no se guardan con esta versión)
+            with medidor.etapa("compatibilidad"):
+                self._entrenar_compatibility_model(X_train, y_train)
+            progreso("modelos", 0.4)
+            self.satisfaction_model = self.clustering_model = self.dimensionality_reducer = None
+            if "satisfaccion" in etapas:
+                with medidor.etapa("satisfaccion"):
+                    self._entrenar_satisfaction_model(X_train, y_train)
+            progreso("modelos", 0.7)
+            if "clustering" in etapas:
+                with medidor.etapa("clustering"):
+                    self._entrenar_clustering(X)
+            if "pca" in etapas:
+                with medidor.etapa("pca"):
+                    self._entrenar_dimensionality_reduction(X)
+            progreso("modelos", 1.0)
+
+            # Evaluar
+            with medidor.etapa("evaluacion"):
+                self._evaluar_modelos(X_test, y_test)
+            if "cv" in etapas:
+                with medidor.etapa("cv"):
+                    self._validacion_cruzada(X, y)
+            else:
+                self.metrics.cross_val_mean = self.metrics.cross_val_std = 0.0
+            self.modelo_destilado, self.reporte_destilado = None, {}
+            if "destilado" in etapas:
+                with medidor.etapa("destilado"):
+                    self._destilar_modelo(X_train, X_test)
+            progreso("evaluacion", 1.0)
+
+            # **NUEVO: Configurar componentes de explicabilidad y ética**
+            if "explicador" in etapas:
+                with medidor.etapa("explicador"):
+                    self.model_explainer.model = self.compatibility_model
+                    self.model_explainer.feature_names = self.feature_names
+                    self.model_explainer.initialize_explainer(X_train)
+
+            # **NUEVO: Análisis de sesgos post-entrenamiento**
+            bias_analysis = None
+            if "sesgos" in etapas:
+                with medidor.etapa("sesgos"):
+                    sensitive_features = {}
+                    if 'genero' in df.columns:
+                        sensitive_features['genero'] = df['genero'].values
+                    if 'edad' in df.columns:
+                        age_groups = pd.cut(df['edad'], bins=[0, 25, 35, 100], labels=['<25', '25-35', '>35'])
+                        sensitive_features['grupo_edad'] = age_groups.astype(str).values
+
+                    y_pred = self.compatibility_model.predict(X)
+                    bias_analysis = self.ethics_monitor.analyze_bias(y, y_pred, sensitive_features)
+            progreso("etica", 1.0)
+
+            # Guardar (con la fecha de este entrenamiento y el reporte de etapas en metadata.json)
+            self.metrics.training_time = (datetime.now() - start_time).total_seconds()
+            self.metrics.last_training = datetime.now().isoformat()
+            self.reporte_entrenamiento = {
+                "inquilinos": len(df),
+                "inquilinos_totales": total_inquilinos,
+                "n_jobs": self.model_config["rf_params"]["n_jobs"],
+                "etapas_elegidas": etapas,
+                "etapas": medidor.etapas,
+                "memoria_pico_mb": max(e["memoria_pico_mb"] for e in medidor.etapas),
+            }
+            self.is_trained = True
+            self._guardar_modelos()
+            progreso("guardado", 1.0)
 
         # **NUEVO: Incluir métricas de ética en el resultado**
         result = self._get_metrics_dict()
         result['ethics_analysis'] = bias_analysis
-        result['explainability_ready'] = True
+        result['explainability_ready'] = "explicador" in etapas
         result['privacy_compliant'] = not self.ethics_monitor.privacy_check(df).get('pii_detected', False)
+        result['entrenamiento'] = self.reporte_entrenamiento
+        result['destilado'] = self.reporte_destilado
 
         return result
 
@@ -176,13 +422,15 @@ class RoomMatchIAEngine:
         self, df: pd.DataFrame
     ) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """Prepara features y labels"""
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
         feature_cols = [
-            col for col in df.columns if col not in ["_id", "id_inquilino", "nombre", "created_at"]
+            col for col in df.columns if col not in COLUMNAS_NO_FEATURES
         ]
         if not feature_cols:
             raise ValueError("No hay columnas válidas para entrenar")
 
-        X = df[feature_cols].fillna("desconocido").astype(str)
+        X = _como_texto(df[feature_cols])
 
         # OneHot
         if self.encoder is None:
@@ -192,6 +440,8 @@ class RoomMatchIAEngine:
             X_encoded = self.encoder.transform(X)
 
         # Escalado
+        if self.scaler is None:
+            self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X_encoded)
 
         # Labels → basado en campo compatible o reglas
@@ -204,23 +454,22 @@ class RoomMatchIAEngine:
         return X_scaled, y, feature_names
 
     def _generar_labels_reglas(self, df: pd.DataFrame) -> np.ndarray:
-        """Genera etiquetas basadas en reglas simples"""
-        labels = []
-        for _, row in df.iterrows():
-            score = 0
-            if str(row.get("fumador", "")).lower() == "no":
-                score += 1
-            if str(row.get("orden", "")).lower() == "ordenada":
-                score += 1
-            if str(row.get("mascotas", "")).lower() == "sin mascotas":
-                score += 1
-            labels.append(1 if score >= 2 else 0)
-        return np.array(labels)
+        """Genera etiquetas basadas en reglas simples (comparando códigos de categoría)"""
+        codigos = TABLA_CATEGORIAS.codificar_frame(df, ["fumador", "orden", "mascotas"])
+        codigo = TABLA_CATEGORIAS.codigo
+        score = (
+            (codigos["fumador"] == codigo("fumador", "no")).astype(int)
+            + (codigos["orden"] == codigo("orden", "ordenada"))
+            + (codigos["mascotas"] == codigo("mascotas", "sin mascotas"))
+        )
+        return (score >= 2).astype(int).to_numpy()
 
     # =========================================================================
     # 🗃️ ENTRENAR SUB-MODELOS
     # =========================================================================
     def _entrenar_compatibility_model(self, X_train, y_train):
+        from sklearn.ensemble import RandomForestClassifier
+
         self.compatibility_model = RandomForestClassifier(**self.model_config["rf_params"])
         self.compatibility_model.fit(X_train, y_train)
         self.feature_importance = dict(
@@ -228,88 +477,242 @@ class RoomMatchIAEngine:
         )
 
     def _entrenar_satisfaction_model(self, X_train, y_train):
+        from sklearn.ensemble import GradientBoostingClassifier
+
         self.satisfaction_model = GradientBoostingClassifier(**self.model_config["gb_params"])
         self.satisfaction_model.fit(X_train, y_train)
 
     def _entrenar_encoder(self, df: pd.DataFrame):
+        from sklearn.preprocessing import OneHotEncoder
+
         feature_cols = [
-            col for col in df.columns if col not in ["_id", "id_inquilino", "nombre", "created_at"]
+            col for col in df.columns if col not in COLUMNAS_NO_FEATURES
         ]
-        X = df[feature_cols].fillna("desconocido").astype(str)
+        X = _como_texto(df[feature_cols])
         if self.encoder is None:
             self.encoder = OneHotEncoder(handle_unknown="ignore", sparse_output=False)
             self.encoder.fit(X)
 
     def _entrenar_clustering(self, X: np.ndarray):
+        from sklearn.cluster import KMeans
+
         self.clustering_model = KMeans(**self.model_config["kmeans_params"])
         self.clustering_model.fit(X)
 
     def _entrenar_dimensionality_reduction(self, X: np.ndarray):
+        from sklearn.decomposition import PCA
+
         self.dimensionality_reducer = PCA(n_components=2, random_state=42)
         self.dimensionality_reducer.fit(X)
 
-    def _evaluar_modelos(self, X_test, y_test, X_full, y_full):
+    def _evaluar_modelos(self, X_test, y_test):
+        from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
         y_pred = self.compatibility_model.predict(X_test)
         self.metrics.accuracy = accuracy_score(y_test, y_pred)
         self.metrics.precision = precision_score(y_test, y_pred, average="weighted", zero_division=0)
         self.metrics.recall = recall_score(y_test, y_pred, average="weighted", zero_division=0)
         self.metrics.f1_score = f1_score(y_test, y_pred, average="weighted", zero_division=0)
 
+    def _validacion_cruzada(self, X_full, y_full):
+        from sklearn.model_selection import cross_val_score
+
         cv_scores = cross_val_score(self.compatibility_model, X_full, y_full, cv=config.CV_FOLDS)
         self.metrics.cross_val_mean = cv_scores.mean()
         self.metrics.cross_val_std = cv_scores.std()
 
+    def _destilar_modelo(self, X_train, X_test):
+        """
+        Entrena un estudiante compacto (DESTILADO_ARBOLES árboles de profundidad
+        DESTILADO_PROFUNDIDAD) que imita la probabilidad del bosque sobre filas
+        y pares de entrenamiento. La fidelidad se mide en pares de test; el
+        estudiante solo se usa si acierta el mismo lado de 0.5 que el bosque en
+        al menos DESTILADO_FIDELIDAD_MIN de ellos.
+        """
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        rng = np.random.default_rng(42)
+        transferencia = _con_pares(X_train, rng)
+        if len(transferencia) > MAX_TRANSFERENCIA:
+            transferencia = transferencia[rng.choice(len(transferencia), MAX_TRANSFERENCIA, replace=False)]
+        estudiante = GradientBoostingRegressor(
+            n_estimators=config.DESTILADO_ARBOLES,
+            max_depth=config.DESTILADO_PROFUNDIDAD,
+            learning_rate=0.3,
+            subsample=0.5,
+            random_state=42,
+        )
+        estudiante.fit(transferencia, self.compatibility_model.predict_proba(transferencia)[:, -1])
+
+        # Fidelidad en puntos de compatibilidad: la probabilidad pesa 0.5 en el puntaje (0-100)
+        prueba = _con_pares(X_test, rng)
+        profesor = self.compatibility_model.predict_proba(prueba)[:, -1]
+        alumno = np.clip(estudiante.predict(prueba), 0.0, 1.0)
+        diferencia = 50 * np.abs(alumno - profesor)
+        acuerdo = float(((alumno >= 0.5) == (profesor >= 0.5)).mean())
+
+        latencia = {
+            "bosque": _latencia_ms(self.compatibility_model.predict_proba, prueba),
+            "estudiante": _latencia_ms(estudiante.predict, prueba),
+        }
+        tamano = {"bosque": _tamano_bytes(self.compatibility_model), "estudiante": _tamano_bytes(estudiante)}
+        en_uso = acuerdo >= config.DESTILADO_FIDELIDAD_MIN
+        self.modelo_destilado = estudiante if en_uso else None
+        self.reporte_destilado = {
+            "arboles": config.DESTILADO_ARBOLES,
+            "profundidad": config.DESTILADO_PROFUNDIDAD,
+            "filas_transferencia": len(transferencia),
+            "fidelidad": {
+                "acuerdo": round(acuerdo, 4),
+                "error_medio_puntos": round(float(diferencia.mean()), 3),
+                "error_p95_puntos": round(float(np.percentile(diferencia, 95)), 3),
+                "pares_prueba": len(prueba),
+            },
+            "latencia_ms": latencia,
+            "aceleracion": round(latencia["bosque"] / max(latencia["estudiante"], 1e-6), 1),
+            "tamano_bytes": tamano,
+            "reduccion_tamano": round(tamano["bosque"] / max(tamano["estudiante"], 1), 1),
+            "en_uso": en_uso,
+        }
+        if en_uso:
+            logger.info(f"🎓 Modelo destilado: acuerdo {acuerdo:.1%}, {self.reporte_destilado['aceleracion']}x más rápido, "
+                        f"{self.reporte_destilado['reduccion_tamano']}x más pequeño")
+        else:
+            logger.warning(f"⚠️ Modelo destilado descartado: acuerdo {acuerdo:.1%} < {config.DESTILADO_FIDELIDAD_MIN:.0%}")
+
     # =========================================================================
     # 🔮 COMPATIBILIDAD
     # =========================================================================
     def calcular_compatibilidad_avanzada(
-        self, id1: int, id2: int, df: pd.DataFrame
+        self, id1: int, id2: int, df: Optional[pd.DataFrame] = None
     ) -> Dict:
         try:
-            row1 = df[df["id_inquilino"] == id1].iloc[0]
-            row2 = df[df["id_inquilino"] == id2].iloc[0]
-
-            similitud = self._calcular_similitud_coseno(row1, row2, df)
-            pred_ml = self._predecir_satisfaccion(row1, row2)
-
-            compat = (0.5 * similitud + 0.5 * pred_ml) * 100
-            compat = max(10.0, min(95.0, compat))
-
-            return {
-                "compatibilidad_porcentaje": round(compat, 1),
-                "similitud_coseno": round(similitud * 100, 1),
-                "prediccion_satisfaccion": round(pred_ml * 100, 1),
-                "recomendacion": "✅ Buena combinación" if compat >= 60 else "⚠️ Poca compatibilidad",
-            }
+            row1 = perfil_inquilino(id1, df)
+            row2 = perfil_inquilino(id2, df)
+            if row1 is None or row2 is None:
+                raise ValueError(f"Inquilino no encontrado: {id1 if row1 is None else id2}")
+            return self.calcular_compatibilidad_filas(row1, row2)
         except Exception as e:
             logger.error(f"Error compatibilidad: {e}")
             return {"error": str(e)}
 
-    def _calcular_similitud_coseno(self, row1, row2, df) -> float:
-        if not self.encoder:
+    def calcular_compatibilidad_filas(self, row1: pd.Series, row2: pd.Series) -> Dict:
+        """Compatibilidad entre dos perfiles ya cargados (sin buscar por ID)"""
+        modelos = self._modelos
+        similitud = self._calcular_similitud_coseno(modelos, row1, row2)
+        pred_ml = self._predecir_satisfaccion(modelos, row1, row2)
+
+        compat = (0.5 * similitud + 0.5 * pred_ml) * 100
+        compat = max(10.0, min(95.0, compat))
+
+        return {
+            "compatibilidad_porcentaje": round(compat, 1),
+            "similitud_coseno": round(similitud * 100, 1),
+            "prediccion_satisfaccion": round(pred_ml * 100, 1),
+            "recomendacion": "✅ Buena combinación" if compat >= 60 else "⚠️ Poca compatibilidad",
+        }
+
+    @staticmethod
+    def _codificar_filas(modelos: ModelosServicio, *filas) -> np.ndarray:
+        """One-hot de unas pocas filas (sin codificar todo el dataset)"""
+        columnas = getattr(modelos.encoder, "feature_names_in_", None)
+        if columnas is None:
+            columnas = [col for col in filas[0].index if col not in COLUMNAS_NO_FEATURES]
+        df_temp = pd.DataFrame([fila.reindex(columnas) for fila in filas])
+        return modelos.encoder.transform(df_temp.fillna("desconocido").astype(str))
+
+    # =========================================================================
+    # 📦 PUNTUACIÓN POR LOTES
+    # =========================================================================
+    @property
+    def modelos(self) -> ModelosServicio:
+        """Modelos vigentes (inmutables)"""
+        return self._modelos
+
+    def codificar_poblacion(self, df: pd.DataFrame, modelos: Optional[ModelosServicio] = None) -> np.ndarray:
+        """One-hot denso de un DataFrame completo (una fila por inquilino)"""
+        encoder = (modelos or self._modelos).encoder
+        if not encoder:
+            raise ValueError("El modelo no está entrenado")
+        columnas = getattr(encoder, "feature_names_in_", None)
+        if columnas is None:
+            columnas = [col for col in df.columns if col not in COLUMNAS_NO_FEATURES]
+        X = encoder.transform(_como_texto(df.reindex(columns=columnas)))
+        return X.toarray() if hasattr(X, "toarray") else np.asarray(X)
+
+    @staticmethod
+    def _probabilidad(modelos: ModelosServicio, X_escalado: np.ndarray, interactivo: bool = True) -> np.ndarray:
+        """
+        P(compatible) de filas ya escaladas. Las rutas interactivas usan el
+        modelo destilado si lo hay; los procesos por lotes (interactivo=False)
+        usan siempre el bosque completo.
+        """
+        if interactivo and modelos.modelo_destilado is not None:
+            return np.clip(modelos.modelo_destilado.predict(X_escalado), 0.0, 1.0)
+        return modelos.compatibility_model.predict_proba(X_escalado)[:, -1]
+
+    def puntuar_lote(self, X_base: np.ndarray, X_candidatos: np.ndarray, interactivo: bool = True,
+                     modelos: Optional[ModelosServicio] = None) -> np.ndarray:
+        """
+        Matriz de compatibilidad (%) de cada fila de X_base contra cada fila de
+        X_candidatos, ambas ya codificadas con codificar_poblacion. Es la misma
+        fórmula que calcular_compatibilidad_filas (sin redondear), pero con una
+        sola llamada al modelo por tramo de pares en lugar de una por par: los
+        tramos (bases × candidatos) se eligen para que la matriz combinada no
+        pase de MEMORIA_LOTE, aunque una sola base contra todos la supere.
+        Con interactivo=False se usa el bosque completo (ver _probabilidad);
+        `modelos` debe ser el mismo con que se codificaron las filas.
+        """
+        modelos = modelos or self._modelos
+        # Coseno sin copiar X_candidatos normalizado (cosine_similarity lo haría)
+        normas = np.sqrt(np.einsum('ij,ij->i', X_base, X_base))[:, None] \
+            * np.sqrt(np.einsum('ij,ij->i', X_candidatos, X_candidatos))[None, :]
+        similitud = np.divide(X_base @ X_candidatos.T, normas, out=np.zeros(normas.shape), where=normas > 0)
+        if modelos.compatibility_model is None:
+            prediccion = np.full(similitud.shape, 0.5)
+        else:
+            prediccion = np.empty(similitud.shape)
+            n_features = X_base.shape[1]
+            pares = max(1, MEMORIA_LOTE // max(1, n_features * 8))
+            paso_bases = max(1, min(len(X_base), pares))
+            paso_candidatos = max(1, pares // paso_bases)
+            for i in range(0, len(X_base), paso_bases):
+                bases = X_base[i:i + paso_bases]
+                for j in range(0, len(X_candidatos), paso_candidatos):
+                    candidatos = X_candidatos[j:j + paso_candidatos]
+                    combinados = ((bases[:, None, :] + candidatos[None, :, :]) / 2).reshape(-1, n_features)
+                    prediccion[i:i + len(bases), j:j + len(candidatos)] = self._probabilidad(
+                        modelos, modelos.scaler.transform(combinados), interactivo
+                    ).reshape(len(bases), len(candidatos))
+        return np.clip((0.5 * similitud + 0.5 * prediccion) * 100, 10.0, 95.0)
+
+    def puntuar_pares(self, X1: np.ndarray, X2: np.ndarray, interactivo: bool = True,
+                      modelos: Optional[ModelosServicio] = None) -> np.ndarray:
+        """Compatibilidad (%) fila a fila: el par i es (X1[i], X2[i])"""
+        modelos = modelos or self._modelos
+        normas = np.linalg.norm(X1, axis=1) * np.linalg.norm(X2, axis=1)
+        similitud = np.divide((X1 * X2).sum(axis=1), normas, out=np.zeros(len(X1)), where=normas > 0)
+        if modelos.compatibility_model is None:
+            prediccion = np.full(len(X1), 0.5)
+        else:
+            prediccion = self._probabilidad(modelos, modelos.scaler.transform((X1 + X2) / 2), interactivo)
+        return np.clip((0.5 * similitud + 0.5 * prediccion) * 100, 10.0, 95.0)
+
+    def _calcular_similitud_coseno(self, modelos: ModelosServicio, row1, row2) -> float:
+        if not modelos.encoder:
             return 0.5
-        feature_cols = [
-            col for col in df.columns if col not in ["_id", "id_inquilino", "nombre", "created_at"]
-        ]
-        X = df[feature_cols].fillna("desconocido").astype(str)
-        X_encoded = self.encoder.transform(X)
+        from sklearn.metrics.pairwise import cosine_similarity
 
-        idx1 = row1.name
-        idx2 = row2.name
-        return cosine_similarity([X_encoded[idx1]], [X_encoded[idx2]])[0][0]
+        X_encoded = self._codificar_filas(modelos, row1, row2)
+        return cosine_similarity(X_encoded[:1], X_encoded[1:])[0][0]
 
-    def _predecir_satisfaccion(self, row1, row2) -> float:
-        if not self.compatibility_model:
+    def _predecir_satisfaccion(self, modelos: ModelosServicio, row1, row2) -> float:
+        if not modelos.compatibility_model or not modelos.encoder:
             return 0.5
-        feature_cols = [
-            col for col in row1.index if col not in ["_id", "id_inquilino", "nombre", "created_at"]
-        ]
-        df_temp = pd.DataFrame([row1[feature_cols], row2[feature_cols]])
-        X_enc = self.encoder.transform(df_temp.fillna("desconocido").astype(str))
+        X_enc = self._codificar_filas(modelos, row1, row2)
         combined = X_enc.mean(axis=0)
-        combined_scaled = self.scaler.transform([combined])[0]
-        prob = self.compatibility_model.predict_proba([combined_scaled])[0][-1]
-        return float(prob)
+        combined_scaled = modelos.scaler.transform([combined])
+        return float(self._probabilidad(modelos, combined_scaled)[0])
 
     # =========================================================================
     # 💾 MODELOS
@@ -321,19 +724,25 @@ class RoomMatchIAEngine:
                 "encoder.pkl": self.encoder,
                 "scaler.pkl": self.scaler,
                 "compatibility_model.pkl": self.compatibility_model,
+                "modelo_destilado.pkl": self.modelo_destilado,
                 "satisfaction_model.pkl": self.satisfaction_model,
                 "clustering_model.pkl": self.clustering_model,
                 "dimensionality_reducer.pkl": self.dimensionality_reducer,
             }
             for filename, model in models.items():
+                ruta = os.path.join(config.MODEL_PATH, filename)
                 if model is not None:
-                    joblib.dump(model, os.path.join(config.MODEL_PATH, filename))
+                    joblib.dump(model, ruta)
+                elif os.path.exists(ruta):
+                    os.remove(ruta)  # de un entrenamiento anterior: no corresponde a esta versión
 
             metadata = {
                 "metrics": self._get_metrics_dict(),
                 "feature_names": self.feature_names,
                 "feature_importance": self.feature_importance,
                 "is_trained": self.is_trained,
+                "entrenamiento": self.reporte_entrenamiento,
+                "destilado": self.reporte_destilado,
             }
             with open(os.path.join(config.MODEL_PATH, "metadata.json"), "w") as f:
                 json.dump(metadata, f, indent=2)
@@ -342,27 +751,76 @@ class RoomMatchIAEngine:
             logger.error(f"Error guardando modelos: {e}")
             return False
 
+    def _empaquetar(self) -> ModelosServicio:
+        """Estado actual de este motor (p. ej. recién entrenado) como ModelosServicio"""
+        return ModelosServicio(**{campo.name: getattr(self, campo.name) for campo in fields(ModelosServicio)})
+
+    def _publicar(self, modelos: ModelosServicio, explicador: Optional[ModelExplainer] = None):
+        """
+        Hace vigentes `modelos` con una sola asignación (la puntuación en curso
+        termina con los anteriores) y refleja sus campos en los atributos del
+        motor. El explainer se cambia por el del entrenamiento o por uno nuevo.
+        """
+        with self._lock, self._lock_explicador:
+            self._modelos = modelos
+            for campo in fields(ModelosServicio):
+                setattr(self, campo.name, getattr(modelos, campo.name))
+            self.model_explainer = explicador or ModelExplainer()
+
     def cargar_modelos(self) -> bool:
-        try:
-            model_path = config.MODEL_PATH
-
-            # Nuevo formato (archivos separados)
-            encoder_path = os.path.join(model_path, "encoder.pkl")
-            modelo_path = os.path.join(model_path, "compatibility_model.pkl")
-
-            if os.path.exists(encoder_path) and os.path.exists(modelo_path):
-                self.encoder = joblib.load(encoder_path)
-                self.compatibility_model = joblib.load(modelo_path)
-
-    # Restaurar metadata
-            metadata_path = os.path.join(model_path, "metadata.json")
-            if os.path.exists(metadata_path):
-                with open(metadata_path, "r") as f:
-                    metadata = json.load(f)
-                    self.feature_names = metadata.get("feature_names", [])
-                    self.feature_importance = metadata.get("feature_importance", {})
-                    metricas_dict = metadata.get("metrics", {})
-                    self.metrics = ModelMetrics(
+        """Lee los modelos de MODEL_PATH y los publica (ver _publicar)"""
+        with self._lock:
+            try:
+                # La marca se toma antes de leer: un guardado a mitad de la
+                # lectura cambia la marca y se vuelve a cargar en la revisión siguiente
+                marca = _marca_modelos(config.MODEL_PATH)
+                modelos = self._leer_modelos(config.MODEL_PATH)
+                if modelos is None:
+                    self.logger.warning("⚠️ No se encontró modelo entrenado")
+                    return False
+                self._publicar(modelos)
+                self._marca_cargada = marca
+                return True
+            except Exception as e:
+                self.logger.error(f"❌ Error cargando modelo: {e}")
+                return False
+
+    def recargar_si_hay_version_nueva(self) -> bool:
+        """
+        Carga los modelos de MODEL_PATH si otro proceso (un trabajo de
+        entrenamiento, un script) guardó unos nuevos. Solo consulta la fecha de
+        metadata.json, y como mucho cada INTERVALO_REVISION_MODELOS segundos.
+        True si se publicaron modelos nuevos.
+        """
+        ahora = time.monotonic()
+        if ahora < self._proxima_revision:
+            return False
+        self._proxima_revision = ahora + INTERVALO_REVISION_MODELOS
+        marca = _marca_modelos(config.MODEL_PATH)
+        if marca is None or marca == self._marca_cargada:
+            return False
+        with self._lock:
+            if _marca_modelos(config.MODEL_PATH) == self._marca_cargada:
+                return False  # otra sesión ya la cargó
+            self.logger.info("🔄 Modelos nuevos en MODEL_PATH: recargando")
+            return self.cargar_modelos()
+
+    def _leer_modelos(self, model_path: str) -> Optional[ModelosServicio]:
+        # Nuevo formato (archivos separados + metadata)
+        encoder_path = os.path.join(model_path, "encoder.pkl")
+        modelo_path = os.path.join(model_path, "compatibility_model.pkl")
+        metadata_path = os.path.join(model_path, "metadata.json")
+
+        if os.path.exists(encoder_path) and os.path.exists(modelo_path) and os.path.exists(metadata_path):
+            with open(metadata_path, "r") as f:
+                metadata = json.load(f)
+            metricas_dict = metadata.get("metrics", {})
+            modelos = ModelosServicio(
+                encoder=joblib.load(encoder_path),
+                scaler=_cargar_si_existe(os.path.join(model_path, "scaler.pkl")),
+                compatibility_model=joblib.load(modelo_path),
+                modelo_destilado=_cargar_si_existe(os.path.join(model_path, "modelo_destilado.pkl")),
+                metrics=ModelMetrics(
                     accuracy=metricas_dict.get("accuracy", 0.0),
                     precision=metricas_dict.get("precision", 0.0),
                     recall=metricas_dict.get("recall", 0.0),
@@ -371,45 +829,42 @@ class RoomMatchIAEngine:
                     cross_val_std=metricas_dict.get("cross_val_std", 0.0),
                     training_time=metricas_dict.get("training_time", 0.0),
                     last_training=metricas_dict.get("last_training"),
+                ),
+                feature_names=metadata.get("feature_names", []),
+                feature_importance=metadata.get("feature_importance", {}),
+                reporte_entrenamiento=metadata.get("entrenamiento", {}),
+                reporte_destilado=metadata.get("destilado", {}),
+                is_trained=True,
+            )
+            self.logger.info("✅ Modelos cargados en formato nuevo con metadata")
+            return modelos
+
+        # 🔄 Compatibilidad retro con modelo.pkl
+        legacy_path = os.path.join(model_path, "modelo.pkl")
+        if os.path.exists(legacy_path):
+            paquete = joblib.load(legacy_path)
+
+            # 🔧 Normalizamos metricas: siempre usar ModelMetrics
+            metricas_dict = paquete.get("metricas", {})
+            metricas = ModelMetrics()
+            if isinstance(metricas_dict, dict):
+                metricas = ModelMetrics(
+                    accuracy=metricas_dict.get("accuracy", 0.0),
+                    precision=metricas_dict.get("precision", 0.0),
+                    recall=metricas_dict.get("recall", 0.0),
+                    f1_score=metricas_dict.get("f1_score", 0.0),
+                    cross_val_mean=metricas_dict.get("cross_val", 0.0),
+                    cross_val_std=0.0,
                 )
+            self.logger.info("✅ Modelo cargado desde modelo.pkl (formato antiguo)")
+            return ModelosServicio(
+                compatibility_model=paquete.get("modelo"),
+                metrics=metricas,
+                feature_names=paquete.get("features", []),
+                is_trained=True,
+            )
 
-                self.is_trained = True
-                self.logger.info("✅ Modelos cargados en formato nuevo con metadata")
-                return True
-
-
-            # 🔄 Compatibilidad retro con modelo.pkl
-            legacy_path = os.path.join(model_path, "modelo.pkl")
-            if os.path.exists(legacy_path):
-                paquete = joblib.load(legacy_path)
-                self.compatibility_model = paquete.get("modelo")
-                self.encoder = None
-                self.feature_names = paquete.get("features", [])
-
-                # 🔧 Normalizamos metricas: siempre usar ModelMetrics
-                metricas_dict = paquete.get("metricas", {})
-                if isinstance(metricas_dict, dict):
-                    self.metrics = ModelMetrics(
-                        accuracy=metricas_dict.get("accuracy", 0.0),
-                        precision=metricas_dict.get("precision", 0.0),
-                        recall=metricas_dict.get("recall", 0.0),
-                        f1_score=metricas_dict.get("f1_score", 0.0),
-                        cross_val_mean=metricas_dict.get("cross_val", 0.0),
-                        cross_val_std=0.0,
-                    )
-                else:
-                    self.metrics = ModelMetrics()
-
-                self.is_trained = True
-                self.logger.info("✅ Modelo cargado desde modelo.pkl (formato antiguo)")
-                return True
-
-            self.logger.warning("⚠️ No se encontró modelo entrenado")
-            return False
-
-        except Exception as e:
-            self.logger.error(f"❌ Error cargando modelo: {e}")
-            return False
+        return None
 
 
     # =========================================================================
@@ -435,6 +890,7 @@ class RoomMatchIAEngine:
     # 🛡️ NUEVOS MÉTODOS PARA SENASOFT 2025
     # =========================================================================
     
+    @_sincronizado
     def obtener_explicacion_prediccion(self, inquilino_data: Dict) -> Dict:
         """
         Obtiene explicación detallada de una predicción
@@ -444,18 +900,19 @@ class RoomMatchIAEngine:
                 return {'error': 'Modelo no entrenado'}
                 
             # Preparar datos para predicción
+            modelos = self._modelos
             df_temp = pd.DataFrame([inquilino_data])
-            feature_cols = [col for col in df_temp.columns if col not in ["_id", "id_inquilino", "nombre", "created_at"]]
+            feature_cols = [col for col in df_temp.columns if col not in COLUMNAS_NO_FEATURES]
             X_temp = df_temp[feature_cols].fillna("desconocido").astype(str)
             
-            if self.encoder:
-                X_encoded = self.encoder.transform(X_temp)
-                X_scaled = self.scaler.transform(X_encoded)
+            if modelos.encoder:
+                X_encoded = modelos.encoder.transform(X_temp)
+                X_scaled = modelos.scaler.transform(X_encoded)
                 
                 # Configurar explainer si no está listo
                 if self.model_explainer.model is None:
-                    self.model_explainer.model = self.compatibility_model
-                    self.model_explainer.feature_names = self.feature_names
+                    self.model_explainer.model = modelos.compatibility_model
+                    self.model_explainer.feature_names = modelos.feature_names
                     
                 # Obtener explicación
                 explicacion = self.model_explainer.explain_prediction(X_scaled[0], inquilino_data)
@@ -467,6 +924,7 @@ class RoomMatchIAEngine:
             logger.error(f"Error obteniendo explicación: {e}")
             return {'error': str(e)}
 
+    @_sincronizado
     def analizar_sesgos_modelo(self, df: pd.DataFrame = None) -> Dict:
         """
         Analiza sesgos del modelo en el dataset actual
@@ -478,9 +936,11 @@ class RoomMatchIAEngine:
             if df.empty or not self.is_trained:
                 return {'error': 'Sin datos o modelo no entrenado'}
                 
-            # Preparar datos para análisis
-            X, y, _ = self._preparar_datos(df)
-            y_pred = self.compatibility_model.predict(X)
+            # Preparar datos con los modelos vigentes (sin reajustar el scaler)
+            modelos = self._modelos
+            X = modelos.scaler.transform(self.codificar_poblacion(df, modelos))
+            y = df["compatible"].astype(int).values if "compatible" in df.columns else self._generar_labels_reglas(df)
+            y_pred = modelos.compatibility_model.predict(X)
             
             # Características sensibles para análisis de sesgos
             sensitive_features = {}
@@ -504,6 +964,7 @@ class RoomMatchIAEngine:
             logger.error(f"Error en análisis de sesgos: {e}")
             return {'error': str(e)}
 
+    @_sincronizado
     def obtener_metricas_eticas(self) -> Dict:
         """
         Obtiene métricas éticas actuales del modelo
@@ -535,14 +996,13 @@ class RoomMatchIAEngine:
             logger.error(f"Error obteniendo métricas éticas: {e}")
             return {'error': str(e)}
 
+    @_sincronizado
     def explicar_compatibilidad_detallada(self, id1: int, id2: int, df: pd.DataFrame = None) -> Dict:
         """
         Explicación detallada de compatibilidad entre dos inquilinos
         """
         try:
-            if df is None:
-                df = self.obtener_dataset()
-                
+            # Los perfiles se resuelven por la caché de id_inquilino; `df` es opcional
             # Configurar explainer
             if self.model_explainer.feature_names != self.feature_names:
                 self.model_explainer.feature_names = self.feature_names
@@ -0,0 +1,165 @@
+# app/core/importacion.py
+"""
+Importación masiva de inquilinos desde archivos de agencias (CSV o JSONL).
+
+El archivo se lee por bloques y cada bloque pasa por:
+    1. validación columna a columna contra el esquema de `Inquilino`
+       (validar_lote: sin crear un modelo por fila); las categorías se
+       normalizan al vocabulario canónico (tildes, mayúsculas y alias)
+    2. descarte de cédulas repetidas (en el archivo o ya registradas): volver
+       a importar el mismo archivo no duplica inquilinos
+    3. reserva de un bloque contiguo de IDs e inserción masiva sin orden
+Las filas inválidas, repetidas o que no se pudieron insertar van a un archivo
+de cuarentena JSONL con el registro original, su número de fila y el motivo.
+"""
+import json
+import logging
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.archivos import leer_bloques
+from app.core.inquilino_schema import a_documentos, compatible_regla_simple_lote, validar_lote
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# ✅ VALIDACIÓN DE UN BLOQUE
+# ============================================================================
+def preparar_bloque(bloque: pd.DataFrame):
+    """
+    Valida un bloque con validar_lote y completa `compatible` con la regla
+    simple donde no venía. Devuelve (documentos sin id, posición de cada uno
+    en el bloque, {posición: motivo}).
+    """
+    bloque = bloque.reset_index(drop=True)
+    if "compatible" in bloque.columns:
+        sin_compatible = (bloque["compatible"].isna() | (bloque["compatible"].astype(str).str.strip() == "")).to_numpy()
+    else:
+        sin_compatible = np.ones(len(bloque), dtype=bool)
+
+    validos, motivos = validar_lote(bloque)
+    faltantes = sin_compatible[validos.index]
+    if faltantes.any():
+        validos.loc[faltantes, "compatible"] = compatible_regla_simple_lote(validos[faltantes])
+    return a_documentos(validos), validos.index.tolist(), motivos
+
+
+def descartar_duplicados(documentos, posiciones, motivos, db):
+    """
+    Quita las cédulas ya registradas en la BD o repetidas dentro del bloque
+    (se queda la primera); sus filas pasan a `motivos`. Devuelve (documentos, posiciones).
+    """
+    registradas = db.ids_por_cedula(d.get("cedula") for d in documentos)
+    vistas = set()
+    quedan_documentos, quedan_posiciones = [], []
+    for documento, posicion in zip(documentos, posiciones):
+        cedula = documento.get("cedula")
+        if cedula in registradas:
+            motivos[posicion] = f"cedula: ya registrada (inquilino {registradas[cedula]})"
+        elif cedula is not None and cedula in vistas:
+            motivos[posicion] = "cedula: repetida en el archivo"
+        else:
+            vistas.add(cedula)
+            quedan_documentos.append(documento)
+            quedan_posiciones.append(posicion)
+    return quedan_documentos, quedan_posiciones
+
+
+def insertar_bloque(documentos, posiciones, motivos, db) -> int:
+    """
+    Inserta el bloque (ya con IDs). Las filas que no quedaron en la BD, por un
+    duplicado concurrente o porque falló el lote, pasan a `motivos`.
+    Devuelve cuántas se insertaron.
+    """
+    try:
+        insertadas = db.insertar_inquilinos(documentos, lanzar_errores=True)
+        if insertadas == len(documentos):
+            return insertadas
+        motivo = "cedula o id_inquilino duplicados al insertar"
+    except Exception as e:
+        motivo = f"error al insertar el bloque: {e}"
+    guardados = db.obtener_inquilinos_por_ids([d["id_inquilino"] for d in documentos])
+    for documento, posicion in zip(documentos, posiciones):
+        if documento["id_inquilino"] not in guardados:
+            motivos[posicion] = motivo
+    return len(guardados)
+
+
+# ============================================================================
+# 📥 ARCHIVO COMPLETO
+# ============================================================================
+class Cuarentena:
+    """Archivo JSONL con las filas rechazadas (registro original + fila + motivo)"""
+
+    def __init__(self, ruta: Optional[str]):
+        self.ruta = ruta
+        self.archivo = open(ruta, "w", encoding="utf-8") if ruta else None
+        self.total = 0
+
+    def escribir(self, bloque: pd.DataFrame, motivos: Dict[int, str], inicio: int):
+        self.total += len(motivos)
+        if self.archivo is None or not motivos:
+            return
+        originales = bloque.astype(object).where(bloque.notna(), None)
+        for posicion in sorted(motivos):
+            registro = {"fila": inicio + posicion, "motivo": motivos[posicion],
+                        "registro": originales.iloc[posicion].to_dict()}
+            self.archivo.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        self.archivo.flush()
+
+    def cerrar(self):
+        if self.archivo is not None:
+            self.archivo.close()
+
+
+def importar_archivo(ruta: str, cuarentena: Optional[str] = None, tamano_bloque: int = 5000,
+                     db=None) -> Dict:
+    """
+    Importa todos los inquilinos válidos de `ruta`. Las filas rechazadas se
+    escriben en `cuarentena` (JSONL) si se indica. Devuelve un resumen.
+    """
+    if db is None:
+        from app.core.database import db_manager as db
+
+    rechazos = Cuarentena(cuarentena)
+    leidas = insertadas = 0
+    inicio_tiempo = time.monotonic()
+
+    try:
+        # CSV como texto: la validación decide los tipos y la cuarentena guarda el valor original
+        for bloque in leer_bloques(ruta, tamano_bloque, dtype=str):
+            bloque = bloque.reset_index(drop=True)
+            documentos, posiciones, motivos = preparar_bloque(bloque)
+            documentos, posiciones = descartar_duplicados(documentos, posiciones, motivos, db)
+
+            if documentos:
+                primer_id = db.reservar_ids_inquilino(len(documentos))
+                for desplazamiento, documento in enumerate(documentos):
+                    documento["id_inquilino"] = primer_id + desplazamiento
+                insertadas += insertar_bloque(documentos, posiciones, motivos, db)
+
+            rechazos.escribir(bloque, motivos, leidas)
+            leidas += len(bloque)
+            velocidad = leidas / max(time.monotonic() - inicio_tiempo, 1e-9)
+            logger.info(
+                f"⏱️ {leidas:,} filas leídas · {insertadas:,} importadas · "
+                f"{rechazos.total:,} en cuarentena · {velocidad:,.0f} filas/s"
+            )
+    finally:
+        rechazos.cerrar()
+
+    segundos = time.monotonic() - inicio_tiempo
+    resumen = {
+        "filas": leidas,
+        "importadas": insertadas,
+        "cuarentena": rechazos.total,
+        "omitidas": leidas - insertadas - rechazos.total,
+        "segundos": round(segundos, 2),
+        "filas_por_segundo": round(leidas / segundos, 1) if segundos > 0 else 0.0,
+    }
+    logger.info(f"✅ Importación completa: {resumen}")
+    return resumen
@@ -1,18 +1,173 @@
-import itertools
 import random
+import re
+import typing
+import unicodedata
 from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
 from pydantic import BaseModel, Field
 
-# 🔥 Generador global de IDs incrementales desde 1000
-_id_generator = itertools.count(1)
+# Datos personales que identifican al inquilino (se excluyen de exportaciones anonimizadas)
+CAMPOS_PII = ["nombre", "cedula"]
+
+# ==============================
+# 🔹 Vocabularios de las categorías
+# ==============================
+# Valores canónicos de cada campo categórico (los que usan el formulario,
+# el generador demo y el modelo)
+VOCABULARIOS = {
+    "genero": ["masculino", "femenino", "otro"],
+    "fumador": ["si", "no"],
+    "mascotas": ["con mascotas", "sin mascotas"],
+    "orden": ["ordenada", "desordenada"],
+    "deporte": ["si", "no"],
+    "bioritmo": ["madrugador", "nocturno"],
+    "nivel_educativo": ["secundaria", "universitaria", "posgrado"],
+    "visitas": ["si", "no"],
+    "instrumento": ["si", "no"],
+}
+
+_ALIAS_SI_NO = {
+    "sí": "si", "s": "si", "yes": "si", "y": "si", "true": "si", "verdadero": "si", "1": "si",
+    "n": "no", "false": "no", "falso": "no", "0": "no",
+}
+
+# Variantes frecuentes en archivos externos → valor canónico
+ALIAS = {
+    "genero": {"m": "masculino", "hombre": "masculino", "f": "femenino", "mujer": "femenino"},
+    "fumador": _ALIAS_SI_NO,
+    "mascotas": {"con": "con mascotas", "si": "con mascotas", "sin": "sin mascotas", "no": "sin mascotas"},
+    "orden": {"ordenado": "ordenada", "organizado": "ordenada", "organizada": "ordenada",
+              "desordenado": "desordenada"},
+    "deporte": _ALIAS_SI_NO,
+    "bioritmo": {"madrugadora": "madrugador", "manana": "madrugador", "nocturna": "nocturno",
+                 "noche": "nocturno"},
+    "nivel_educativo": {"bachillerato": "secundaria", "universidad": "universitaria",
+                        "pregrado": "universitaria", "postgrado": "posgrado", "maestria": "posgrado"},
+    "visitas": _ALIAS_SI_NO,
+    "instrumento": _ALIAS_SI_NO,
+}
+
+
+def _clave_categoria(valor) -> str:
+    """Minúsculas, sin tildes y sin espacios repetidos ("  Sí " → "si")"""
+    texto = unicodedata.normalize("NFKD", str(valor).strip().lower())
+    return " ".join("".join(c for c in texto if not unicodedata.combining(c)).split())
+
+
+@lru_cache(maxsize=None)
+def _mapa_categoria(campo: str) -> dict:
+    mapa = {_clave_categoria(alias): canonico for alias, canonico in ALIAS.get(campo, {}).items()}
+    mapa.update({_clave_categoria(v): v for v in VOCABULARIOS[campo]})
+    return mapa
+
+
+def normalizar_categoria(campo: str, valor):
+    """Valor canónico de `valor` en el vocabulario de `campo` (None si no se reconoce)"""
+    return _mapa_categoria(campo).get(_clave_categoria(valor))
+
+
+def calcular_compatible_regla_simple(d: dict) -> int:
+    """
+    Misma regla del generador demo:
+    +1 si no fuma, +1 ordenada, +1 sin mascotas, +1 deporte, +1 madrugador.
+    Compatible = 1 si puntaje >= 3; si no, 0
+    """
+    puntaje = 0
+    puntaje += 1 if d.get("fumador") == "no" else 0
+    puntaje += 1 if d.get("orden") == "ordenada" else 0
+    puntaje += 1 if d.get("mascotas") == "sin mascotas" else 0
+    puntaje += 1 if d.get("deporte") == "si" else 0
+    puntaje += 1 if d.get("bioritmo") == "madrugador" else 0
+    return 1 if puntaje >= 3 else 0
+
+# ==============================
+# 🔹 Tabla de categorías (códigos enteros)
+# ==============================
+class TablaCategorias:
+    """
+    Vocabularios compilados a códigos int8: el código de un valor es su
+    posición en VOCABULARIOS[campo] y SIN_VALOR (-1) marca vacío o desconocido.
+    Motor, chatbot y dashboard comparan estos enteros en lugar de strings.
+    Los dtypes categóricos usan el mismo orden, así que `serie.cat.codes`
+    coincide con los códigos de la tabla.
+    """
+    SIN_VALOR = -1
+
+    def __init__(self, vocabularios: Dict[str, list]):
+        self.valores = {campo: list(valores) for campo, valores in vocabularios.items()}
+        self.dtypes = {campo: pd.CategoricalDtype(valores) for campo, valores in self.valores.items()}
+        self._codigos = {campo: {v: i for i, v in enumerate(valores)} for campo, valores in self.valores.items()}
+
+    @property
+    def campos(self):
+        return list(self.valores)
+
+    def codigo(self, campo: str, valor) -> int:
+        """Código de un valor (acepta alias y variantes de mayúsculas/tildes)"""
+        if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+            return self.SIN_VALOR
+        return self._codigos[campo].get(normalizar_categoria(campo, valor), self.SIN_VALOR)
+
+    def codificar(self, campo: str, valores) -> np.ndarray:
+        """Columna completa → códigos int8. Cada valor distinto se normaliza una sola vez"""
+        serie = valores if isinstance(valores, pd.Series) else pd.Series(valores, dtype=object)
+        if isinstance(serie.dtype, pd.CategoricalDtype) and serie.dtype == self.dtypes[campo]:
+            return serie.cat.codes.to_numpy(dtype=np.int8)
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        traduccion = np.array([self.codigo(campo, v) for v in unicos] + [self.SIN_VALOR], dtype=np.int8)
+        return traduccion[codigos]
+
+    def codificar_frame(self, df: pd.DataFrame, campos=None) -> pd.DataFrame:
+        """Códigos de varias columnas (las que faltan quedan en SIN_VALOR)"""
+        campos = campos or self.campos
+        return pd.DataFrame({
+            campo: self.codificar(campo, df[campo]) if campo in df.columns
+            else np.full(len(df), self.SIN_VALOR, dtype=np.int8)
+            for campo in campos
+        }, index=df.index)
+
+    def decodificar(self, campo: str, codigos) -> np.ndarray:
+        """Códigos → valores canónicos (None en SIN_VALOR)"""
+        valores = np.array(self.valores[campo] + [None], dtype=object)
+        return valores[np.asarray(codigos, dtype=np.int64)]
+
+    def categorizar(self, df: pd.DataFrame, campos=None) -> pd.DataFrame:
+        """Copia de `df` con las columnas del vocabulario como Categorical (1 byte por fila)"""
+        df = df.copy()
+        for campo in campos or self.campos:
+            if campo in df.columns:
+                df[campo] = pd.Categorical.from_codes(self.codificar(campo, df[campo]), dtype=self.dtypes[campo])
+        return df
+
+
+TABLA_CATEGORIAS = TablaCategorias(VOCABULARIOS)
+
+
+def compatible_regla_simple_lote(df: pd.DataFrame) -> np.ndarray:
+    """calcular_compatible_regla_simple sobre un DataFrame completo, con códigos"""
+    codigos = TABLA_CATEGORIAS.codificar_frame(df, ["fumador", "orden", "mascotas", "deporte", "bioritmo"])
+    c = TABLA_CATEGORIAS.codigo
+    puntaje = (
+        (codigos["fumador"] == c("fumador", "no")).astype(int)
+        + (codigos["orden"] == c("orden", "ordenada"))
+        + (codigos["mascotas"] == c("mascotas", "sin mascotas"))
+        + (codigos["deporte"] == c("deporte", "si"))
+        + (codigos["bioritmo"] == c("bioritmo", "madrugador"))
+    )
+    return (puntaje >= 3).astype(int).to_numpy()
+
 
 def generar_cedula():
     """Genera una cédula simulada de 8 a 10 dígitos"""
     return random.randint(10_000_000, 9_999_999_999)
 
 class Inquilino(BaseModel):
-    # Identificación
-    id_inquilino: int = Field(default_factory=lambda: next(_id_generator))
+    # Identificación (None hasta insertarlo: lo asigna el contador de la BD)
+    id_inquilino: int | None = None
     cedula: int = Field(default_factory=generar_cedula)
 
     # Datos personales
@@ -39,45 +194,196 @@ class Inquilino(BaseModel):
     compatible: int = 0
     rol: str = "inquilino"
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# ==============================
+# 🔹 Validación por lotes (columna a columna)
+# ==============================
+def _tipo_base(anotacion):
+    """int | None → int; str → str"""
+    argumentos = [a for a in typing.get_args(anotacion) if a is not type(None)]
+    return argumentos[0] if argumentos else anotacion
+
+
+# Zona horaria al final de una hora ISO 8601 ("10:00Z", "10:00:00.5+02:00")
+_PATRON_ZONA = re.compile(r"\d:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:[zZ]|[+-]\d{2}(?::?\d{2})?)$")
+
+
+def _fechas_utc(valores: pd.Series) -> pd.Series:
+    """
+    Fechas con las mismas reglas que `Inquilino`: ISO 8601 (con o sin hora y
+    zona) o segundos/milisegundos Unix. Se devuelven en UTC sin zona horaria,
+    como las guarda datetime.utcnow(); NaT donde no son válidas.
+    """
+    valores = valores.astype(object)
+    resultado = pd.Series(pd.NaT, index=valores.index, dtype="datetime64[ns]")
+    es_fecha = valores.map(lambda v: isinstance(v, datetime)).to_numpy(dtype=bool)
+    es_bool = valores.map(lambda v: isinstance(v, (bool, np.bool_))).to_numpy(dtype=bool)
+    numeros = pd.to_numeric(valores.where(~(es_fecha | es_bool)), errors="coerce")
+    unix = numeros.notna().to_numpy()
+    if unix.any():
+        # Como pydantic: por encima de 2e10 son milisegundos
+        segundos = numeros[unix].where(numeros[unix].abs() <= 2e10, numeros[unix] / 1000)
+        resultado[unix] = pd.to_datetime(segundos, unit="s", utc=True, errors="coerce").dt.tz_convert(None)
+    texto = ~(unix | es_bool) & valores.notna().to_numpy()
+    # Con y sin zona por separado: en una misma llamada pandas aplica la zona
+    # de una fecha a las fechas sin zona que le siguen
+    con_zona = valores.map(
+        lambda v: v.tzinfo is not None if isinstance(v, datetime) else bool(_PATRON_ZONA.search(str(v).strip()))
+    ).to_numpy(dtype=bool)
+    for grupo in (texto & con_zona, texto & ~con_zona):
+        if grupo.any():
+            fechas = pd.to_datetime(valores[grupo], format="ISO8601", utc=True, errors="coerce")
+            resultado[grupo] = fechas.dt.tz_convert(None)
+    return resultado
+
+
+def validar_lote(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[int, str]]:
+    """
+    Valida un DataFrame completo contra el esquema de `Inquilino` columna a
+    columna (sin crear un modelo por fila). Las categorías se normalizan con
+    TABLA_CATEGORIAS y los campos vacíos opcionales reciben el default del modelo.
+    id_inquilino no se valida: se asigna después, en bloque.
+
+    Devuelve (validos, errores): `validos` con las columnas del modelo y el
+    índice de posición original; `errores` {posición: motivo} (el primero por fila).
+    """
+    df = df.reset_index(drop=True)
+    n = len(df)
+    errores: Dict[int, str] = {}
+    columnas = {}
+    ahora = datetime.utcnow()
+
+    def rechazar(mascara, motivo):
+        for posicion in np.flatnonzero(np.asarray(mascara)):
+            errores.setdefault(int(posicion), motivo(int(posicion)))
+
+    for nombre, campo in Inquilino.model_fields.items():
+        if nombre == "id_inquilino":
+            continue
+        original = df[nombre] if nombre in df.columns else pd.Series([None] * n, dtype=object)
+        vacios = (original.isna() | (original.astype(str).str.strip() == "")).to_numpy()
+        tipo = _tipo_base(campo.annotation)
+
+        if campo.is_required():
+            rechazar(vacios, lambda p, nombre=nombre: f"{nombre}: campo obligatorio")
+
+        if nombre in TABLA_CATEGORIAS.valores:
+            codigos = TABLA_CATEGORIAS.codificar(nombre, original)
+            rechazar(~vacios & (codigos == TablaCategorias.SIN_VALOR),
+                     lambda p, nombre=nombre: f"{nombre}: valor no reconocido '{original.iat[p]}'")
+            valores = pd.Series(TABLA_CATEGORIAS.decodificar(nombre, codigos), dtype=object)
+        elif tipo is int:
+            numeros = pd.to_numeric(original, errors="coerce")
+            invalidos = ~vacios & (numeros.isna() | (numeros % 1 != 0)).to_numpy()
+            rechazar(invalidos, lambda p, nombre=nombre: f"{nombre}: debe ser un entero ('{original.iat[p]}')")
+            valores = numeros.where(~(vacios | invalidos))
+        elif tipo is datetime:
+            fechas = _fechas_utc(original)
+            rechazar(~vacios & fechas.isna().to_numpy(),
+                     lambda p, nombre=nombre: f"{nombre}: fecha inválida ('{original.iat[p]}')")
+            valores = fechas
+        else:
+            valores = original.astype(object).where(~vacios, None)
+            valores = valores.map(lambda v: v if v is None or isinstance(v, str) else str(v))
+
+        # Defaults del modelo para los vacíos
+        faltantes = pd.isna(valores).to_numpy()
+        if faltantes.any() and not campo.is_required():
+            if campo.default_factory is generar_cedula:
+                valores = valores.copy()
+                valores[faltantes] = [generar_cedula() for _ in range(int(faltantes.sum()))]
+            elif campo.default_factory is not None:
+                valores = valores.where(~faltantes, ahora if tipo is datetime else campo.default_factory())
+            elif campo.default is not None:
+                valores = valores.where(~faltantes, campo.default)
+        columnas[nombre] = valores
+
+    validos = pd.DataFrame(columnas)
+    validos = validos.drop(index=list(errores))
+    for nombre, campo in Inquilino.model_fields.items():
+        if nombre in validos.columns and _tipo_base(campo.annotation) is int and validos[nombre].notna().all():
+            validos[nombre] = validos[nombre].astype("int64")
+    return validos, errores
+
+
+def a_documentos(validos: pd.DataFrame) -> list:
+    """Filas validadas → dicts con tipos nativos de Python (listos para insertar)"""
+    columnas = list(validos.columns)
+    listas = []
+    for nombre in columnas:
+        serie = validos[nombre]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            # Suelen repetirse (default del lote): cada fecha distinta se convierte una vez
+            codigos, unicas = pd.factorize(serie)
+            fechas = [f.to_pydatetime() for f in unicas] + [None]
+            listas.append([fechas[c] for c in codigos])
+        else:
+            listas.append([None if pd.isna(v) else v for v in serie.tolist()])
+    return [dict(zip(columnas, fila)) for fila in zip(*listas)]
 
 
 # ==============================
 # 🔹 Generador de inquilinos demo
 # ==============================
-def generar_inquilino_demo():
-    nombres = [
-        "Andrés", "Camila", "Juan", "Valentina", "Mateo", "Laura", "Isabella", "Sofía",
-        "Mariana", "Sebastián", "Carlos", "Paula", "Gabriela", "Martín", "Lucía", "Diana",
-        "José", "Miguel", "Felipe", "Daniela", "Adriana", "Natalia", "Santiago", "Tomás"
-    ]
-    apellidos = [
-        "García", "Martínez", "Rodríguez", "López", "Hernández", "Gómez", "Díaz",
-        "Ramírez", "Torres", "Álvarez", "Castro", "Ortiz", "Jiménez", "Morales",
-        "Ruiz", "Cruz", "Mendoza", "Guerrero", "Pérez", "Fernández"
-    ]
+_NOMBRES_DEMO = [
+    "Andrés", "Camila", "Juan", "Valentina", "Mateo", "Laura", "Isabella", "Sofía",
+    "Mariana", "Sebastián", "Carlos", "Paula", "Gabriela", "Martín", "Lucía", "Diana",
+    "José", "Miguel", "Felipe", "Daniela", "Adriana", "Natalia", "Santiago", "Tomás"
+]
+_APELLIDOS_DEMO = [
+    "García", "Martínez", "Rodríguez", "López", "Hernández", "Gómez", "Díaz",
+    "Ramírez", "Torres", "Álvarez", "Castro", "Ortiz", "Jiménez", "Morales",
+    "Ruiz", "Cruz", "Mendoza", "Guerrero", "Pérez", "Fernández"
+]
+
+# Opciones de cada campo en los datos demo
+_OPCIONES_DEMO = {
+    "genero": VOCABULARIOS["genero"],
+    "fumador": VOCABULARIOS["fumador"],
+    "mascotas": VOCABULARIOS["mascotas"],
+    "orden": VOCABULARIOS["orden"],
+    "deporte": VOCABULARIOS["deporte"],
+    "bioritmo": VOCABULARIOS["bioritmo"],
+    "nivel_educativo": VOCABULARIOS["nivel_educativo"] + [None],
+    "musica_tipo": ["rock", "pop", "salsa", "vallenato", "reggaeton", None],
+    "plan_perfecto": ["cine", "leer", "salir con amigos", "hacer deporte", None],
+    "visitas": VOCABULARIOS["visitas"],
+    "personalidad": ["introvertido", "extrovertido", "equilibrado", None],
+    "instrumento": VOCABULARIOS["instrumento"],
+    "compatible": [0, 1],  # demo simple
+}
 
+
+def generar_inquilino_demo(id_inquilino=None):
     # 🔹 Nombre completo con probabilidad de doble nombre/apellido
-    nombre = random.choice(nombres)
+    nombre = random.choice(_NOMBRES_DEMO)
     if random.random() > 0.5:
-        nombre += f" {random.choice(nombres)}"
-    apellido = f"{random.choice(apellidos)} {random.choice(apellidos)}"
+        nombre += f" {random.choice(_NOMBRES_DEMO)}"
+    apellido = f"{random.choice(_APELLIDOS_DEMO)} {random.choice(_APELLIDOS_DEMO)}"
     nombre_completo = f"{nombre} {apellido}"
 
-    # Construcción del objeto Inquilino
+    # Construcción del objeto Inquilino (sin ID: se asigna al insertarlo)
     return Inquilino(
+        id_inquilino=id_inquilino,
         nombre=nombre_completo,
         edad=random.randint(15, 99),
-        genero=random.choice(["masculino", "femenino", "otro"]),
-        fumador=random.choice(["si", "no"]),
-        mascotas=random.choice(["con mascotas", "sin mascotas"]),
-        orden=random.choice(["ordenada", "desordenada"]),
-        deporte=random.choice(["si", "no"]),
-        bioritmo=random.choice(["madrugador", "nocturno"]),
-        nivel_educativo=random.choice(["secundaria", "universitaria", "posgrado", None]),
-        musica_tipo=random.choice(["rock", "pop", "salsa", "vallenato", "reggaeton", None]),
-        plan_perfecto=random.choice(["cine", "leer", "salir con amigos", "hacer deporte", None]),
-        visitas=random.choice(["si", "no"]),
-        personalidad=random.choice(["introvertido", "extrovertido", "equilibrado", None]),
-        instrumento=random.choice(["si", "no"]),
-        compatible=random.choice([0, 1])  # demo simple
+        **{campo: random.choice(opciones) for campo, opciones in _OPCIONES_DEMO.items()},
     )
+
+
+def generar_inquilinos_demo(cantidad: int, semilla: Optional[int] = None) -> pd.DataFrame:
+    """Versión por columnas de generar_inquilino_demo (sin IDs; validar con validar_lote)"""
+    rng = np.random.default_rng(semilla)
+    nombres = rng.choice(_NOMBRES_DEMO, cantidad)
+    segundos = np.where(rng.random(cantidad) > 0.5, np.char.add(" ", rng.choice(_NOMBRES_DEMO, cantidad)), "")
+    apellidos = np.char.add(np.char.add(rng.choice(_APELLIDOS_DEMO, cantidad), " "), rng.choice(_APELLIDOS_DEMO, cantidad))
+    columnas = {
+        "nombre": np.char.add(np.char.add(np.char.add(nombres, segundos), " "), apellidos).astype(object),
+        "edad": rng.integers(15, 100, cantidad),
+        "cedula": rng.integers(10_000_000, 10_000_000_000, cantidad),
+    }
+    for campo, opciones in _OPCIONES_DEMO.items():
+        columnas[campo] = np.array(opciones, dtype=object)[rng.integers(0, len(opciones), cantidad)]
+    return pd.DataFrame(columnas)
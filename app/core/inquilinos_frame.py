@@ -0,0 +1,188 @@
+# app/core/inquilinos_frame.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.almacen_inquilinos import AlmacenInquilinos, normalizar_ids
+from app.core.config import config
+from app.core.database import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+def perfil_inquilino(id_inquilino, df: Optional[pd.DataFrame] = None, db=None) -> Optional[pd.Series]:
+    """
+    Perfil de un inquilino como Series. Se resuelve por la caché de
+    id_inquilino del DatabaseManager (O(1) en acierto); `df` solo se recorre
+    si el inquilino no está en la BD. None si no se encuentra.
+    """
+    doc = (db or db_manager).obtener_inquilino_por_id(id_inquilino)
+    if doc is not None:
+        return pd.Series(doc)
+    if df is not None and 'id_inquilino' in df.columns:
+        filas = df[df['id_inquilino'] == id_inquilino]
+        if not filas.empty:
+            return filas.iloc[0]
+    return None
+
+
+class InquilinosFrame:
+    """
+    Población de inquilinos en memoria que se mantiene al día aplicando
+    solo los cambios (deltas) desde la última marca de agua, en lugar de
+    releer la colección completa.
+
+    Se guarda en un AlmacenInquilinos (arreglos compactos con índice
+    id_inquilino → fila); cada delta produce un almacén nuevo, de modo que
+    el anterior puede seguir publicado en una instantánea.
+    """
+
+    def __init__(self, db=None):
+        self.db = db or db_manager
+        self.almacen = AlmacenInquilinos.vacio(self.db)
+        self.marca: Optional[datetime] = None
+        self.ultima_sincronizacion: Optional[datetime] = None
+        # id_inquilino → updated_at ya aplicado, dentro de la ventana de solape
+        self._vistos: dict = {}
+        # Documentos de la BD que no pueden estar en el almacén (id inválido o
+        # repetido), medidos en la última conciliación
+        self._sobrantes = 0
+
+    def sincronizar(self) -> int:
+        """Trae y aplica los cambios desde la última marca. Devuelve cuántos llegaron"""
+        documentos, self.marca = self.db.obtener_cambios_desde(self.marca)
+
+        # La ventana de solape repite documentos ya aplicados: solo pasan los que cambiaron
+        documentos = [d for d in documentos if self._vistos.get(d.get('id_inquilino')) != d.get('updated_at')]
+        self._recordar(documentos)
+        if documentos:
+            self._aplicar(documentos)
+
+        # Las bajas no dejan marca. El conteo exacto es solo una pista (puede
+        # cruzarse con inserciones recientes): si no cuadra se concilian los ids
+        if self.db.contar_inquilinos(exacto=True) - len(self.almacen) != self._sobrantes:
+            self._conciliar()
+
+        self.ultima_sincronizacion = datetime.utcnow()
+        return len(documentos)
+
+    def recargar(self) -> int:
+        """Descarta el estado local y carga la colección completa"""
+        documentos, self.marca = self.db.obtener_cambios_desde(None)
+        self.almacen = AlmacenInquilinos.vacio(self.db)
+        self._vistos = {}
+        self._recordar(documentos)
+        if documentos:
+            self._aplicar(documentos)
+        self.ultima_sincronizacion = datetime.utcnow()
+        return len(documentos)
+
+    def _conciliar(self):
+        """
+        Compara los ids del almacén con los de la BD (solo esa columna): quita
+        las bajas y trae los documentos que faltan, sin releer la colección
+        """
+        ids_bd = self.db.ids_inquilinos()
+        if ids_bd is None:
+            return
+        validos = np.unique(normalizar_ids(pd.DataFrame({"id_inquilino": ids_bd}))["id_inquilino"].to_numpy())
+        bajas = np.setdiff1d(self.almacen.ids, validos)
+        faltantes = np.setdiff1d(validos, self.almacen.ids)
+        if len(bajas):
+            self.almacen = self.almacen.quitar(bajas)
+        if len(faltantes):
+            documentos = list(self.db.obtener_inquilinos_por_ids(faltantes.tolist()).values())
+            self._recordar(documentos)
+            if documentos:
+                self._aplicar(documentos)
+        self._sobrantes = len(ids_bd) - len(validos)
+        if len(bajas) or len(faltantes):
+            logger.info(f"🔄 Conciliación de inquilinos: {len(bajas)} bajas, {len(faltantes)} faltantes")
+
+    def _recordar(self, documentos):
+        """Anota los updated_at aplicados y olvida los que ya quedaron fuera de la ventana"""
+        if self.marca is None:
+            return
+        limite = self.marca - timedelta(seconds=config.SINCRONIZACION_SOLAPE_S)
+        for documento in documentos:
+            fecha = documento.get('updated_at')
+            if isinstance(fecha, datetime) and fecha >= limite:
+                self._vistos[documento.get('id_inquilino')] = fecha
+        self._vistos = {i: fecha for i, fecha in self._vistos.items() if fecha >= limite}
+
+    def _aplicar(self, documentos):
+        """Fusiona un lote de documentos: actualiza filas existentes y agrega las nuevas"""
+        self.almacen = self.almacen.aplicar(documentos)
+
+
+@dataclass(frozen=True)
+class Instantanea:
+    """
+    Versión inmutable de la población. `almacen.vista()` da las columnas
+    compactas sin copiar; `df` es la vista completa (carga la tabla lateral
+    la primera vez). Ambas son de solo lectura: no modificarlas.
+    """
+    version: int
+    almacen: AlmacenInquilinos
+    generado: datetime
+
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        return self.almacen.vista_completa()
+
+
+class RegistroInstantaneas:
+    """
+    Población de inquilinos compartida por todo el proceso. Un único
+    InquilinosFrame se sincroniza por deltas y cada cambio publica una nueva
+    Instantanea con número de versión; las sesiones guardan solo ese número.
+    Se conservan las últimas `retener` versiones para que una sesión termine
+    de trabajar con la suya aunque llegue una nueva.
+    """
+
+    def __init__(self, db=None, retener: int = 3, intervalo: float = 1.0):
+        self._frame = InquilinosFrame(db)
+        self._lock = threading.Lock()
+        self._versiones: "OrderedDict[int, Instantanea]" = OrderedDict()
+        self._retener = retener
+        self._intervalo = intervalo
+        self._ultima_revision = 0.0
+
+    def actual(self) -> Instantanea:
+        """Última instantánea; consulta la BD como mucho una vez por `intervalo` segundos"""
+        with self._lock:
+            ahora = time.monotonic()
+            if self._versiones and ahora - self._ultima_revision < self._intervalo:
+                return next(reversed(self._versiones.values()))
+            self._ultima_revision = ahora
+
+            almacen_anterior = self._frame.almacen
+            self._frame.sincronizar()
+            if not self._versiones or self._frame.almacen is not almacen_anterior:
+                self._publicar(self._frame.almacen)
+            return next(reversed(self._versiones.values()))
+
+    def obtener(self, version: Optional[int]) -> Instantanea:
+        """Instantánea de `version` si aún se conserva; si no, la actual"""
+        with self._lock:
+            instantanea = self._versiones.get(version)
+        return instantanea if instantanea is not None else self.actual()
+
+    def _publicar(self, almacen: AlmacenInquilinos):
+        version = next(reversed(self._versiones), 0) + 1
+        self._versiones[version] = Instantanea(version, almacen, datetime.utcnow())
+        while len(self._versiones) > self._retener:
+            self._versiones.popitem(last=False)
+        logger.info(f"📸 Población v{version}: {len(almacen)} inquilinos")
+
+
+# ✅ Instancia global compartida por todas las sesiones
+registro_poblacion = RegistroInstantaneas()
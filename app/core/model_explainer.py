@@ -2,9 +2,10 @@
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Tuple
-import shap
 import logging
 
+from app.core.inquilinos_frame import perfil_inquilino
+
 logger = logging.getLogger(__name__)
 
 class ModelExplainer:
@@ -25,6 +26,9 @@ class ModelExplainer:
             return False
             
         try:
+            # shap (y con él matplotlib) se carga solo al crear el explicador
+            import shap
+
             if hasattr(self.model, 'estimators_'):
                 self.explainer = shap.TreeExplainer(self.model)
             else:
@@ -180,11 +184,13 @@ class ModelExplainer:
         clean_name = feature_name.replace('_', ' ').title()
         return clean_name
 
-    def explain_compatibility_factors(self, id1: int, id2: int, df: pd.DataFrame) -> Dict:
+    def explain_compatibility_factors(self, id1: int, id2: int, df: pd.DataFrame = None) -> Dict:
         """Explica factores específicos de compatibilidad entre dos inquilinos"""
         try:
-            row1 = df[df['id_inquilino'] == id1].iloc[0]
-            row2 = df[df['id_inquilino'] == id2].iloc[0]
+            row1 = perfil_inquilino(id1, df)
+            row2 = perfil_inquilino(id2, df)
+            if row1 is None or row2 is None:
+                raise ValueError(f"Inquilino no encontrado: {id1 if row1 is None else id2}")
             
             compatibility_factors = {
                 'inquilino_1': {'id': id1, 'nombre': row1.get('nombre', 'Inquilino 1')},
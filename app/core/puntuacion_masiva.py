@@ -0,0 +1,248 @@
+# app/core/puntuacion_masiva.py
+"""
+Puntuación masiva de pares fuera de línea.
+
+La entrada (CSV, JSONL o Parquet) se lee por bloques. Cada fila es un par:
+    - por ID:     columnas id1, id2 (id_inquilino en la BD)
+    - en línea:   columnas perfil1_<campo> y perfil2_<campo>; en JSONL también
+                  objetos anidados {"perfil1": {...}, "perfil2": {...}}
+Los bloques se puntúan con el camino vectorizado del motor (puntuar_pares,
+con el bosque completo, no el destilado) en un pool de procesos y se
+escriben en orden, en streaming, a CSV o JSONL.
+Tras cada bloque escrito se guarda un checkpoint (filas de entrada y bytes
+de salida) para reanudar después de una interrupción.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.archivos import formato_archivo, leer_bloques
+from app.core.database_async import cargar_inquilinos_df
+from app.core.ia_engine import MotorIA
+from app.core.inquilinos_frame import normalizar_ids
+
+logger = logging.getLogger(__name__)
+
+FORMATOS_SALIDA = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+PREFIJOS_PERFIL = ("perfil1_", "perfil2_")
+
+
+# ============================================================================
+# 🧮 PUNTUACIÓN DE UN BLOQUE
+# ============================================================================
+class PoblacionCodificada:
+    """Población de la BD codificada una vez; las filas se buscan por id_inquilino"""
+
+    def __init__(self, motor, df: Optional[pd.DataFrame] = None):
+        df = normalizar_ids(cargar_inquilinos_df() if df is None else df).reset_index(drop=True)
+        self.indice = pd.Index(df['id_inquilino'])
+        self.X = motor.codificar_poblacion(df)
+
+    def posiciones(self, ids: pd.Series) -> np.ndarray:
+        """Fila de cada id en X (-1 si no existe)"""
+        return self.indice.get_indexer(pd.to_numeric(ids, errors="coerce"))
+
+
+def _perfiles_en_linea(bloque: pd.DataFrame, prefijo: str) -> pd.DataFrame:
+    columnas = [c for c in bloque.columns if c.startswith(prefijo)]
+    return bloque[columnas].rename(columns=lambda c: c[len(prefijo):])
+
+
+def puntuar_bloque(motor, bloque: pd.DataFrame, poblacion: Optional[PoblacionCodificada] = None,
+                   inicio: int = 0) -> pd.DataFrame:
+    """
+    Compatibilidad de cada par del bloque. Devuelve fila, id1/id2 (si vienen),
+    compatibilidad (NaN si no se pudo puntuar) y error.
+    """
+    resultado = pd.DataFrame({"fila": np.arange(inicio, inicio + len(bloque))})
+    for columna in ("id1", "id2"):
+        if columna in bloque.columns:
+            resultado[columna] = bloque[columna].to_numpy()
+    compatibilidad = np.full(len(bloque), np.nan)
+    errores = np.full(len(bloque), "", dtype=object)
+
+    if any(c.startswith(PREFIJOS_PERFIL[0]) for c in bloque.columns):
+        X1 = motor.codificar_poblacion(_perfiles_en_linea(bloque, PREFIJOS_PERFIL[0]))
+        X2 = motor.codificar_poblacion(_perfiles_en_linea(bloque, PREFIJOS_PERFIL[1]))
+        compatibilidad = motor.puntuar_pares(X1, X2, interactivo=False)
+    elif {"id1", "id2"} <= set(bloque.columns):
+        if poblacion is None:
+            poblacion = PoblacionCodificada(motor)
+        p1, p2 = poblacion.posiciones(bloque["id1"]), poblacion.posiciones(bloque["id2"])
+        validos = (p1 >= 0) & (p2 >= 0)
+        for faltantes, columna in ((p1 < 0, "id1"), ((p1 >= 0) & (p2 < 0), "id2")):
+            errores[faltantes] = [f"Inquilino no encontrado: {v}" for v in bloque[columna][faltantes]]
+        if validos.any():
+            compatibilidad[validos] = motor.puntuar_pares(
+                poblacion.X[p1[validos]], poblacion.X[p2[validos]], interactivo=False
+            )
+    else:
+        raise ValueError("La entrada necesita columnas id1/id2 o perfil1_*/perfil2_*")
+
+    resultado["compatibilidad"] = np.round(compatibilidad, 1)
+    resultado["error"] = errores
+    return resultado
+
+
+# Estado de cada proceso trabajador (modelo y población cargados una vez)
+_trabajador: Dict = {}
+
+
+def _iniciar_trabajador():
+    motor = MotorIA()
+    if not motor.is_trained:
+        raise ValueError("El modelo no está entrenado")
+    if hasattr(motor.compatibility_model, "n_jobs"):
+        motor.compatibility_model.set_params(n_jobs=1)
+    _trabajador["motor"] = motor
+
+
+def _puntuar_en_trabajador(tarea) -> pd.DataFrame:
+    bloque, inicio = tarea
+    motor = _trabajador["motor"]
+    if "poblacion" not in _trabajador and not any(c.startswith(PREFIJOS_PERFIL[0]) for c in bloque.columns):
+        _trabajador["poblacion"] = PoblacionCodificada(motor)
+    return puntuar_bloque(motor, bloque, _trabajador.get("poblacion"), inicio)
+
+
+# ============================================================================
+# 📤 ESCRITURA Y CHECKPOINT
+# ============================================================================
+class EscritorResultados:
+    """Anexa bloques de resultados a CSV/JSONL; `bytes_inicio` descarta lo escrito tras el checkpoint"""
+
+    def __init__(self, ruta: str, bytes_inicio: int = 0):
+        self.formato = formato_archivo(ruta, FORMATOS_SALIDA)
+        self.archivo = open(ruta, "a+b")
+        self.archivo.truncate(bytes_inicio)
+        self.archivo.seek(bytes_inicio)
+
+    def escribir(self, resultado: pd.DataFrame) -> int:
+        if self.formato == "csv":
+            texto = resultado.to_csv(index=False, header=self.archivo.tell() == 0)
+        else:
+            texto = resultado.to_json(orient="records", lines=True, force_ascii=False)
+            if not texto.endswith("\n"):
+                texto += "\n"
+        self.archivo.write(texto.encode("utf-8"))
+        self.archivo.flush()
+        os.fsync(self.archivo.fileno())
+        return self.archivo.tell()
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+def _ruta_checkpoint(salida: str) -> str:
+    return salida + ".checkpoint.json"
+
+
+def _guardar_checkpoint(ruta: str, datos: Dict):
+    temporal = ruta + ".tmp"
+    with open(temporal, "w") as f:
+        json.dump(datos, f)
+    os.replace(temporal, ruta)
+
+
+def _leer_checkpoint(ruta: str, entrada: str) -> Dict:
+    if not os.path.exists(ruta):
+        return {"filas": 0, "bytes_salida": 0}
+    with open(ruta) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("entrada") != os.path.abspath(entrada):
+        raise ValueError(f"El checkpoint {ruta} corresponde a otra entrada: {checkpoint.get('entrada')}")
+    return checkpoint
+
+
+# ============================================================================
+# 🏭 ARCHIVO COMPLETO
+# ============================================================================
+def puntuar_archivo(entrada: str, salida: str, tamano_bloque: int = 50000,
+                    procesos: int = 1, reanudar: bool = True) -> Dict:
+    """
+    Puntúa todos los pares de `entrada` y los escribe en `salida`. Con
+    `reanudar`, continúa desde el checkpoint de la salida si existe.
+    La memoria queda acotada a ~2 bloques en vuelo por proceso.
+    """
+    formato_archivo(salida, FORMATOS_SALIDA)
+    ruta_checkpoint = _ruta_checkpoint(salida)
+    if not reanudar and os.path.exists(ruta_checkpoint):
+        os.remove(ruta_checkpoint)
+    checkpoint = _leer_checkpoint(ruta_checkpoint, entrada)
+    if checkpoint["filas"]:
+        logger.info(f"⏯️ Reanudando desde la fila {checkpoint['filas']:,}")
+
+    motor = MotorIA()
+    if not motor.is_trained:
+        raise ValueError("No hay modelo entrenado para puntuar")
+    version = motor.metrics.last_training
+    if checkpoint.get("version_modelo") not in (None, version):
+        logger.warning(f"⚠️ El checkpoint se generó con el modelo {checkpoint['version_modelo']}; ahora {version}")
+
+    escritor = EscritorResultados(salida, checkpoint["bytes_salida"])
+    filas, errores = checkpoint["filas"], checkpoint.get("errores", 0)
+    procesadas = 0
+    inicio_tiempo = time.monotonic()
+
+    def registrar(resultado: pd.DataFrame):
+        nonlocal filas, errores, procesadas
+        bytes_salida = escritor.escribir(resultado)
+        filas += len(resultado)
+        procesadas += len(resultado)
+        errores += int((resultado["error"] != "").sum())
+        _guardar_checkpoint(ruta_checkpoint, {
+            "entrada": os.path.abspath(entrada),
+            "filas": filas,
+            "bytes_salida": bytes_salida,
+            "errores": errores,
+            "version_modelo": version,
+        })
+        velocidad = procesadas / max(time.monotonic() - inicio_tiempo, 1e-9)
+        logger.info(f"⏱️ {filas:,} filas puntuadas · {velocidad:,.0f} filas/s")
+
+    bloques = leer_bloques(entrada, tamano_bloque, saltar=filas)
+    try:
+        if procesos <= 1:
+            poblacion = None
+            for bloque in bloques:
+                if poblacion is None and not any(c.startswith(PREFIJOS_PERFIL[0]) for c in bloque.columns):
+                    poblacion = PoblacionCodificada(motor)
+                registrar(puntuar_bloque(motor, bloque, poblacion, filas))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=procesos,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_iniciar_trabajador,
+            ) as pool:
+                en_vuelo = deque()
+                siguiente = filas
+                for bloque in bloques:
+                    en_vuelo.append(pool.submit(_puntuar_en_trabajador, (bloque, siguiente)))
+                    siguiente += len(bloque)
+                    if len(en_vuelo) >= 2 * procesos:
+                        registrar(en_vuelo.popleft().result())
+                while en_vuelo:
+                    registrar(en_vuelo.popleft().result())
+    finally:
+        escritor.cerrar()
+
+    segundos = time.monotonic() - inicio_tiempo
+    resumen = {
+        "filas": filas,
+        "filas_nuevas": procesadas,
+        "errores": errores,
+        "segundos": round(segundos, 2),
+        "filas_por_segundo": round(procesadas / segundos, 1) if segundos > 0 else 0.0,
+        "version_modelo": version,
+    }
+    logger.info(f"✅ Puntuación completa: {resumen}")
+    return resumen
@@ -0,0 +1,399 @@
+# app/core/recomendaciones.py
+"""
+Recomendaciones precalculadas: el top-K de matches de cada inquilino,
+calculado en lote después de cada entrenamiento.
+
+Cada lista se guarda en la colección `recomendaciones` con la versión del
+modelo (metrics.last_training) en la clave, así que nunca se mezclan
+puntuaciones de modelos distintos. El chatbot lee la lista de su versión y
+solo puntúa en vivo a los inquilinos que no están en la instantánea.
+Los inquilinos registrados después se incorporan con agregar_a_recomendaciones.
+
+Toda lista top-K (precalculada, incremental o en vivo en el chatbot y la API)
+se puntúa con el bosque completo (interactivo=False), nunca con el modelo
+destilado, para que un mismo par tenga la misma puntuación venga de donde venga.
+
+Límite: el precálculo puntúa todos los pares, O(N²) llamadas al bosque. Con
+3.000 inquilinos tarda unos 7 minutos; con decenas de miles pasa a horas y
+conviene lanzarlo como trabajo en segundo plano fuera de horas de uso.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.almacenamiento import ClaveDuplicadaError
+from app.core.config import config
+from app.core.database import db_manager
+from app.core.database_async import cargar_inquilinos_df
+from app.core.ia_engine import MotorIA
+from app.core.inquilinos_frame import normalizar_ids, registro_poblacion
+
+logger = logging.getLogger(__name__)
+
+COLECCION_RECOMENDACIONES = "recomendaciones"
+
+# Factores que se muestran como "en común" en cada match
+FACTORES_COMUNES = ['fumador', 'mascotas', 'orden', 'deporte', 'bioritmo', 'nivel_educativo']
+
+# Umbral de "mejores opciones" que muestra el chatbot
+UMBRAL_MEJORES_OPCIONES = 70
+
+# Reintentos de una inserción incremental cuando otra escritura cambió la lista
+MAX_REINTENTOS_LISTA = 5
+
+# Memoria máxima de la matriz de puntuaciones (bases × población) de un bloque;
+# la matriz combinada de features la acota puntuar_lote (MEMORIA_LOTE)
+MEMORIA_BLOQUE = 64 * 1024 ** 2
+MAX_BASES_BLOQUE = 256
+
+
+def obtener_factores_comunes(inquilino1, inquilino2) -> List[str]:
+    """Identifica factores en común entre dos inquilinos"""
+    comunes = []
+    for factor in FACTORES_COMUNES:
+        if factor in inquilino1.index and factor in inquilino2.index:
+            if inquilino1[factor] == inquilino2[factor]:
+                comunes.append(f"{factor}: {inquilino1[factor]}")
+    return comunes
+
+
+def _id_lista(version: str, id_inquilino) -> str:
+    return f"{version}:{int(id_inquilino)}"
+
+
+def _id_instantanea(version: str) -> str:
+    return f"instantanea:{version}"
+
+
+def _documento_lista(version: str, id_inquilino, matches: List[Dict], k: int, alta: int) -> Dict:
+    """
+    Lista top-K de un inquilino. `umbral` es la puntuación que hay que
+    superar para entrar en ella (0 mientras tenga menos de K matches).
+    `revision` crece con cada cambio incremental (ver _insertar_en_lista).
+    """
+    return {
+        "_id": _id_lista(version, id_inquilino),
+        "version": version,
+        "id_inquilino": int(id_inquilino),
+        "matches": matches,
+        "umbral": matches[-1]["compatibilidad"] if len(matches) >= k else 0.0,
+        "alta_compatibilidad": int(alta),
+        "revision": 0,
+        "generado": datetime.utcnow(),
+    }
+
+
+# ============================================================================
+# 🧮 PUNTUACIÓN (dentro de cada proceso trabajador)
+# ============================================================================
+_trabajador: Dict = {}
+
+
+def _iniciar_trabajador(df: pd.DataFrame, en_pool: bool = True):
+    """
+    Carga el modelo y codifica la población una sola vez por proceso. Dentro
+    del pool el bosque usa un solo hilo; fuera, conserva sus n_jobs.
+    """
+    motor = MotorIA()
+    if not motor.is_trained:
+        raise ValueError("El modelo no está entrenado")
+    if en_pool and hasattr(motor.compatibility_model, "n_jobs"):
+        # El paralelismo ya lo da el pool de procesos
+        motor.compatibility_model.set_params(n_jobs=1)
+    _trabajador.update(
+        motor=motor,
+        X=motor.codificar_poblacion(df),
+        ids=df['id_inquilino'].to_numpy(),
+        factores=df.reindex(columns=FACTORES_COMUNES).to_numpy(dtype=object),
+    )
+
+
+def _factores_comunes_posiciones(factores: np.ndarray, i: int, j: int) -> List[str]:
+    return [
+        f"{factor}: {a}"
+        for factor, a, b in zip(FACTORES_COMUNES, factores[i], factores[j])
+        if not pd.isna(a) and a == b
+    ]
+
+
+def _puntuar_bloque(tarea) -> List[Dict]:
+    """Top-K de las posiciones [inicio, fin) contra toda la población"""
+    inicio, fin, k, version = tarea
+    motor, X, ids, factores = (_trabajador[c] for c in ("motor", "X", "ids", "factores"))
+
+    # Bosque completo (no el destilado), igual que los caminos en vivo que
+    # completan listas: chatbot.recomendaciones_en_vivo y ServicioAPI._calcular_matches
+    compat = motor.puntuar_lote(X[inicio:fin], X, interactivo=False)
+    documentos = []
+    for fila, puntuaciones in enumerate(compat.round(1)):
+        posicion = inicio + fila
+        puntuaciones[posicion] = -np.inf  # uno mismo no cuenta
+        candidatos = min(k, len(ids) - 1)
+        # Ranking sobre la puntuación redondeada (la que se muestra) y, ante
+        # empate, el id más bajo primero: el mismo orden que el cálculo en vivo
+        # y que agregar_a_recomendaciones, sin depender del último bit del lote
+        corte = -np.partition(-puntuaciones, candidatos - 1)[candidatos - 1]
+        elegibles = np.flatnonzero(puntuaciones >= corte)
+        mejores = sorted(elegibles, key=lambda j: (-puntuaciones[j], j))[:candidatos]
+        matches = [
+            {
+                "id_inquilino": int(ids[j]),
+                "compatibilidad": float(puntuaciones[j]),
+                "factores_comunes": _factores_comunes_posiciones(factores, posicion, j),
+            }
+            for j in mejores
+        ]
+        alta = (puntuaciones >= UMBRAL_MEJORES_OPCIONES).sum()
+        documentos.append(_documento_lista(version, ids[posicion], matches, k, alta))
+    return documentos
+
+
+def tamano_bloque(n: int, maximo: int = MAX_BASES_BLOQUE) -> int:
+    """Filas por bloque (hasta `maximo`) cuya matriz de puntuaciones contra `n` columnas cabe en MEMORIA_BLOQUE"""
+    return int(max(1, min(maximo, MEMORIA_BLOQUE // max(1, n * 8))))
+
+
+# ============================================================================
+# 🏭 PRECÁLCULO
+# ============================================================================
+def precalcular_recomendaciones(
+    k: Optional[int] = None,
+    procesos: Optional[int] = None,
+    progreso: Optional[Callable[[str, float], None]] = None,
+    db=None,
+) -> Dict:
+    """
+    Calcula y guarda el top-K de cada inquilino con el modelo guardado en
+    MODEL_PATH. Los bloques se reparten entre `procesos` trabajadores
+    ("spawn"); con procesos=1 se calcula en el proceso actual.
+    Al terminar se borran las listas de versiones anteriores.
+    El coste es O(N²) pares con el bosque completo (ver el docstring del módulo).
+    """
+    db = db or db_manager
+    k = k or config.RECOMENDACIONES_TOP_K
+    procesos = procesos or config.MAX_WORKERS
+    progreso = progreso or (lambda etapa, fraccion: None)
+    inicio = datetime.utcnow()
+
+    motor = MotorIA()
+    if not motor.is_trained:
+        raise ValueError("No hay modelo entrenado para precalcular recomendaciones")
+    version = motor.metrics.last_training
+
+    df = normalizar_ids(cargar_inquilinos_df())
+    df = df.sort_values('id_inquilino').reset_index(drop=True)
+    if len(df) < 2:
+        raise ValueError("Se necesitan al menos 2 inquilinos")
+    progreso("datos", 1.0)
+
+    bloque = tamano_bloque(len(df))
+    tareas = [(i, min(i + bloque, len(df)), k, version) for i in range(0, len(df), bloque)]
+
+    coleccion = db.almacenamiento.coleccion(COLECCION_RECOMENDACIONES)
+    coleccion.crear_indice([("version", 1), ("umbral", 1)])
+    coleccion.eliminar({"version": version})  # recálculo de la misma versión
+
+    def guardar(resultados):
+        for i, documentos in enumerate(resultados, 1):
+            coleccion.insertar_muchos(documentos)
+            progreso("puntuacion", i / len(tareas))
+
+    if procesos <= 1:
+        _iniciar_trabajador(df, en_pool=False)
+        try:
+            guardar(map(_puntuar_bloque, tareas))
+        finally:
+            _trabajador.clear()
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=procesos,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_iniciar_trabajador,
+            initargs=(df,),
+        )
+        try:
+            guardar(pool.map(_puntuar_bloque, tareas))
+        finally:
+            # Si se cancela a mitad no se esperan los bloques pendientes
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    resumen = {
+        "version": version,
+        "inquilinos": len(df),
+        "k": k,
+        "max_id": int(df['id_inquilino'].max()),
+        "bloques": len(tareas),
+        "segundos": round((datetime.utcnow() - inicio).total_seconds(), 2),
+    }
+    coleccion.insertar({
+        "_id": _id_instantanea(version),
+        "tipo": "instantanea",
+        **resumen,
+        "generado": datetime.utcnow(),
+    })
+    eliminadas = coleccion.eliminar({"version": {"$ne": version}})
+    progreso("guardado", 1.0)
+    logger.info(
+        f"🏆 Recomendaciones precalculadas: {len(df)} inquilinos, top-{k}, "
+        f"versión {version} ({resumen['segundos']}s, {eliminadas} documentos antiguos eliminados)"
+    )
+    return resumen
+
+
+# ============================================================================
+# ➕ ACTUALIZACIÓN INCREMENTAL
+# ============================================================================
+def agregar_a_recomendaciones(id_inquilino, motor: Optional[MotorIA] = None, db=None) -> Optional[Dict]:
+    """
+    Incorpora un inquilino recién registrado a las listas de la versión
+    vigente sin recalcularlas: se puntúa solo al nuevo contra la población
+    (un lote, O(N)), se guarda su propio top-K y se le inserta en las listas
+    cuyo umbral supera. La puntuación es simétrica, así que basta una pasada.
+    None si no hay precálculo para la versión del modelo.
+    """
+    db = db or db_manager
+    try:
+        motor = motor or MotorIA()
+        modelos = motor.modelos  # la versión con que se puntúa es la de la lista
+        version = modelos.metrics.last_training if modelos.is_trained else None
+        coleccion = db.almacenamiento.coleccion(COLECCION_RECOMENDACIONES)
+        instantanea = coleccion.buscar_uno({"_id": _id_instantanea(version)}) if version else None
+        if instantanea is None:
+            return None
+        k = instantanea["k"]
+
+        documento = db.obtener_inquilino_por_id(id_inquilino)
+        if documento is None:
+            raise ValueError(f"Inquilino no encontrado: {id_inquilino}")
+        nuevo = pd.Series(documento)
+        id_nuevo = int(nuevo['id_inquilino'])
+
+        poblacion = registro_poblacion.actual().df
+        poblacion = poblacion[poblacion['id_inquilino'] != id_nuevo]
+        poblacion = poblacion.sort_values('id_inquilino').reset_index(drop=True)
+        if poblacion.empty:
+            return None
+
+        puntuaciones = motor.puntuar_lote(
+            motor.codificar_poblacion(nuevo.to_frame().T, modelos), motor.codificar_poblacion(poblacion, modelos),
+            interactivo=False, modelos=modelos,
+        )[0]
+        puntuaciones = puntuaciones.round(1)
+        ids = poblacion['id_inquilino'].to_numpy()
+        posiciones = {int(i): p for p, i in enumerate(ids)}
+
+        # 1) Top-K propio. El _id es único: si otra llamada ya lo incluyó
+        #    (o estaba en el precálculo), la inserción falla y no se repite nada
+        matches = [
+            {
+                "id_inquilino": int(ids[j]),
+                "compatibilidad": float(puntuaciones[j]),
+                "factores_comunes": obtener_factores_comunes(nuevo, poblacion.iloc[j]),
+            }
+            for j in np.argsort(-puntuaciones, kind="stable")[:k]
+        ]
+        alta = (puntuaciones >= UMBRAL_MEJORES_OPCIONES).sum()
+        try:
+            coleccion.insertar(_documento_lista(version, id_nuevo, matches, k, alta))
+        except ClaveDuplicadaError:
+            return None
+
+        # 2) Listas existentes donde el nuevo supera el K-ésimo puntaje
+        actualizadas = 0
+        for lista in coleccion.buscar({"version": version, "umbral": {"$lt": float(puntuaciones.max())}}):
+            j = posiciones.get(lista["id_inquilino"])
+            if j is None:
+                continue
+            match = {
+                "id_inquilino": id_nuevo,
+                "compatibilidad": float(puntuaciones[j]),
+                "factores_comunes": obtener_factores_comunes(nuevo, poblacion.iloc[j]),
+            }
+            if _insertar_en_lista(coleccion, lista, match, k):
+                actualizadas += 1
+
+        # 3) Conteo de mejores opciones y resumen de la instantánea ($inc/$max: atómicos)
+        altas = [_id_lista(version, i) for i in ids[puntuaciones >= UMBRAL_MEJORES_OPCIONES]]
+        if altas:
+            coleccion.actualizar_muchos({"_id": {"$in": altas}}, {"$inc": {"alta_compatibilidad": 1}})
+        coleccion.actualizar_uno(
+            {"_id": _id_instantanea(version)},
+            {"$inc": {"inquilinos": 1}, "$max": {"max_id": id_nuevo}},
+        )
+
+        logger.info(f"🏆 Inquilino {id_nuevo} agregado a las recomendaciones ({actualizadas} listas actualizadas)")
+        return {"version": version, "id_inquilino": id_nuevo, "listas_actualizadas": actualizadas}
+    except Exception as e:
+        logger.error(f"❌ Error actualizando recomendaciones del inquilino {id_inquilino}: {e}")
+        return None
+
+
+def _insertar_en_lista(coleccion, lista: Dict, match: Dict, k: int) -> bool:
+    """
+    Inserta `match` en su lugar de la lista y la recorta a K. La escritura es
+    condicional a la `revision` leída (compare-and-swap): si otro proceso
+    cambió la lista entretanto, se relee y se reintenta sobre la nueva.
+    False si el match ya no supera el umbral o la lista dejó de existir.
+    """
+    for _ in range(MAX_REINTENTOS_LISTA):
+        if match["compatibilidad"] <= lista["umbral"]:
+            return False
+        if any(m["id_inquilino"] == match["id_inquilino"] for m in lista["matches"]):
+            return False
+        # Ante empate queda detrás: tiene el id más alto, igual que en el precálculo
+        lugar = next(
+            (i for i, m in enumerate(lista["matches"]) if m["compatibilidad"] < match["compatibilidad"]),
+            len(lista["matches"]),
+        )
+        matches = (lista["matches"][:lugar] + [match] + lista["matches"][lugar:])[:k]
+        # Las listas anteriores a `revision` no la tienen: None coincide con el campo ausente
+        if coleccion.actualizar_uno(
+            {"_id": lista["_id"], "revision": lista.get("revision")},
+            {
+                "$set": {
+                    "matches": matches,
+                    "umbral": matches[-1]["compatibilidad"] if len(matches) >= k else 0.0,
+                },
+                "$inc": {"revision": 1},
+            },
+        ):
+            return True
+        lista = coleccion.buscar_uno({"_id": lista["_id"]})
+        if lista is None:
+            return False
+    logger.warning(f"⚠️ Lista {lista['_id']} sin actualizar tras {MAX_REINTENTOS_LISTA} intentos concurrentes")
+    return False
+
+
+# ============================================================================
+# 📖 LECTURA
+# ============================================================================
+def obtener_recomendaciones(id_inquilino, version: Optional[str], db=None) -> Optional[Dict]:
+    """Lista precalculada del inquilino para esa versión del modelo (None si no existe)"""
+    if not version:
+        return None
+    try:
+        coleccion = (db or db_manager).almacenamiento.coleccion(COLECCION_RECOMENDACIONES)
+        return coleccion.buscar_uno({"_id": _id_lista(version, id_inquilino)})
+    except Exception as e:
+        logger.error(f"❌ Error leyendo recomendaciones precalculadas: {e}")
+        return None
+
+
+
+def obtener_recomendaciones_lote(ids, version: Optional[str], db=None) -> Dict:
+    """Listas precalculadas de varios inquilinos en una sola consulta ({id: lista}; faltan las que no existen)"""
+    if not version:
+        return {}
+    try:
+        coleccion = (db or db_manager).almacenamiento.coleccion(COLECCION_RECOMENDACIONES)
+        listas = coleccion.buscar({"_id": {"$in": [_id_lista(version, i) for i in set(ids)]}})
+        return {lista["id_inquilino"]: lista for lista in listas}
+    except Exception as e:
+        logger.error(f"❌ Error leyendo recomendaciones precalculadas: {e}")
+        return {}
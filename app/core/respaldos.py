@@ -0,0 +1,254 @@
+# app/core/respaldos.py
+"""
+Respaldos de modelos direccionados por contenido.
+
+Estructura bajo BACKUP_PATH:
+    objetos/ab/abcdef....gz      una copia comprimida por contenido distinto (sha256)
+    instantaneas/<id>.json       manifiesto: ruta relativa → sha256, tamaño, mtime
+Un respaldo nuevo solo comprime y escribe los archivos cuyo contenido no está
+ya en `objetos/`. Si tamaño y mtime no cambiaron desde la última instantánea,
+ni siquiera se vuelve a leer el archivo. Al podar instantáneas (más allá de
+MAX_BACKUP_FILES) se borran los objetos que ya nadie referencia.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import config
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LECTURA = 1024 * 1024
+NIVEL_COMPRESION = 6
+
+# Objetos más recientes que esto no se recolectan (un respaldo en curso
+# puede haberlos escrito o reutilizado sin haber guardado aún su manifiesto)
+GRACIA_RECOLECCION = 3600
+
+
+def _clave_orden(id_instantanea: str):
+    """Orden cronológico de IDs `AAAAMMDD_HHMMSS[_n]`: el sufijo de desempate se compara como número"""
+    base, _, sufijo = id_instantanea.partition("_")[2].partition("_")
+    return id_instantanea[:8], base, int(sufijo) if sufijo.isdigit() else 0
+
+
+def _sha256(ruta: str) -> str:
+    digesto = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(TAMANO_LECTURA), b""):
+            digesto.update(bloque)
+    return digesto.hexdigest()
+
+
+class AlmacenRespaldos:
+    """Instantáneas de un directorio con deduplicación por sha256"""
+
+    def __init__(self, ruta: Optional[str] = None):
+        self.ruta = ruta or config.BACKUP_PATH
+        self.dir_objetos = os.path.join(self.ruta, "objetos")
+        self.dir_instantaneas = os.path.join(self.ruta, "instantaneas")
+
+    def _ruta_objeto(self, sha: str) -> str:
+        return os.path.join(self.dir_objetos, sha[:2], f"{sha}.gz")
+
+    def _ruta_manifiesto(self, id_instantanea: str) -> str:
+        return os.path.join(self.dir_instantaneas, f"{id_instantanea}.json")
+
+    # =========================================================================
+    # 📋 INSTANTÁNEAS
+    # =========================================================================
+    def listar(self) -> List[str]:
+        """IDs de las instantáneas, de la más antigua a la más reciente"""
+        if not os.path.isdir(self.dir_instantaneas):
+            return []
+        ids = (n[:-5] for n in os.listdir(self.dir_instantaneas) if n.endswith(".json"))
+        return sorted(ids, key=_clave_orden)
+
+    def manifiesto(self, id_instantanea: str) -> Dict:
+        with open(self._ruta_manifiesto(id_instantanea)) as f:
+            return json.load(f)
+
+    def ultima(self) -> Optional[Dict]:
+        ids = self.listar()
+        return self.manifiesto(ids[-1]) if ids else None
+
+    def vencido(self, horas: Optional[float] = None) -> bool:
+        """True si no hay respaldo o el último tiene más de `horas` (AUTO_BACKUP_HOURS)"""
+        horas = config.AUTO_BACKUP_HOURS if horas is None else horas
+        ultima = self.ultima()
+        if ultima is None:
+            return True
+        edad = datetime.now() - datetime.fromisoformat(ultima["creado"])
+        return edad.total_seconds() >= horas * 3600
+
+    # =========================================================================
+    # 💾 RESPALDO
+    # =========================================================================
+    def _guardar_objeto(self, origen: str, sha: str) -> int:
+        """Escribe el objeto si no existe. Devuelve los bytes comprimidos escritos"""
+        destino = self._ruta_objeto(sha)
+        if os.path.exists(destino):
+            os.utime(destino)  # lo protege de una recolección concurrente
+            return 0
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporal = f"{destino}.{os.getpid()}.tmp"
+        with open(origen, "rb") as entrada, gzip.open(temporal, "wb", compresslevel=NIVEL_COMPRESION) as salida:
+            shutil.copyfileobj(entrada, salida, TAMANO_LECTURA)
+        os.replace(temporal, destino)
+        return os.path.getsize(destino)
+
+    def respaldar(self, origen: Optional[str] = None) -> Dict:
+        """Crea una instantánea de `origen` (MODEL_PATH) y devuelve su manifiesto"""
+        origen = origen or config.MODEL_PATH
+        inicio = time.monotonic()
+        anterior = (self.ultima() or {}).get("archivos", {})
+
+        archivos, bytes_nuevos, objetos_nuevos, releidos = {}, 0, 0, 0
+        for raiz, _, nombres in os.walk(origen):
+            for nombre in sorted(nombres):
+                ruta = os.path.join(raiz, nombre)
+                relativa = os.path.relpath(ruta, origen).replace(os.sep, "/")
+                estado = os.stat(ruta)
+                previo = anterior.get(relativa)
+                if (previo and previo["bytes"] == estado.st_size and previo["mtime_ns"] == estado.st_mtime_ns
+                        and os.path.exists(self._ruta_objeto(previo["sha256"]))):
+                    sha = previo["sha256"]
+                else:
+                    sha = _sha256(ruta)
+                    releidos += 1
+                escritos = self._guardar_objeto(ruta, sha)
+                bytes_nuevos += escritos
+                objetos_nuevos += 1 if escritos else 0
+                archivos[relativa] = {"sha256": sha, "bytes": estado.st_size, "mtime_ns": estado.st_mtime_ns}
+
+        ahora = datetime.now()
+        id_instantanea = ahora.strftime("%Y%m%d_%H%M%S")
+        sufijo = 1
+        while os.path.exists(self._ruta_manifiesto(id_instantanea)):
+            id_instantanea = f"{ahora.strftime('%Y%m%d_%H%M%S')}_{sufijo:03d}"
+            sufijo += 1
+
+        manifiesto = {
+            "id": id_instantanea,
+            "creado": ahora.isoformat(),
+            "origen": os.path.abspath(origen),
+            "archivos": archivos,
+            "bytes_totales": sum(a["bytes"] for a in archivos.values()),
+            "bytes_nuevos_comprimidos": bytes_nuevos,
+            "objetos_nuevos": objetos_nuevos,
+            "archivos_releidos": releidos,
+            "segundos": round(time.monotonic() - inicio, 2),
+        }
+        os.makedirs(self.dir_instantaneas, exist_ok=True)
+        temporal = self._ruta_manifiesto(id_instantanea) + ".tmp"
+        with open(temporal, "w") as f:
+            json.dump(manifiesto, f, indent=2)
+        os.replace(temporal, self._ruta_manifiesto(id_instantanea))
+
+        logger.info(
+            f"💾 Instantánea {id_instantanea}: {len(archivos)} archivos, "
+            f"{objetos_nuevos} objetos nuevos ({bytes_nuevos / 1024 ** 2:.1f} MB escritos) "
+            f"en {manifiesto['segundos']}s"
+        )
+        return manifiesto
+
+    # =========================================================================
+    # ♻️ RESTAURACIÓN
+    # =========================================================================
+    def _restaurar_archivo(self, destino: str, relativa: str, entrada: Dict):
+        ruta = os.path.join(destino, *relativa.split("/"))
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.restaurando"
+        digesto = hashlib.sha256()
+        with gzip.open(self._ruta_objeto(entrada["sha256"]), "rb") as origen, open(temporal, "wb") as salida:
+            for bloque in iter(lambda: origen.read(TAMANO_LECTURA), b""):
+                digesto.update(bloque)
+                salida.write(bloque)
+        if digesto.hexdigest() != entrada["sha256"]:
+            os.remove(temporal)
+            raise ValueError(f"Objeto corrupto para {relativa} ({entrada['sha256'][:12]})")
+        os.replace(temporal, ruta)
+
+    def restaurar(self, id_instantanea: Optional[str] = None, destino: Optional[str] = None,
+                  procesos: Optional[int] = None) -> Dict:
+        """
+        Restaura la instantánea (por defecto la última) en `destino` (MODEL_PATH).
+        Los archivos se descomprimen en paralelo, se verifican y se reemplazan
+        de forma atómica; los que no están en la instantánea no se tocan.
+        """
+        ids = self.listar()
+        if not ids:
+            raise ValueError(f"No hay instantáneas en {self.ruta}")
+        id_instantanea = id_instantanea or ids[-1]
+        if id_instantanea not in ids:
+            raise ValueError(f"Instantánea no encontrada: {id_instantanea}")
+        destino = destino or config.MODEL_PATH
+        archivos = self.manifiesto(id_instantanea)["archivos"]
+
+        inicio = time.monotonic()
+        with ThreadPoolExecutor(max_workers=procesos or config.MAX_WORKERS) as pool:
+            for futuro in [pool.submit(self._restaurar_archivo, destino, r, e) for r, e in archivos.items()]:
+                futuro.result()
+
+        resumen = {"id": id_instantanea, "destino": os.path.abspath(destino), "archivos": len(archivos),
+                   "segundos": round(time.monotonic() - inicio, 2)}
+        logger.info(f"♻️ Instantánea restaurada: {resumen}")
+        return resumen
+
+    # =========================================================================
+    # 🧹 PODA
+    # =========================================================================
+    def podar(self, conservar: Optional[int] = None) -> Dict:
+        """Conserva las `conservar` instantáneas más recientes (MAX_BACKUP_FILES) y recolecta objetos"""
+        conservar = config.MAX_BACKUP_FILES if conservar is None else conservar
+        ids = self.listar()
+        eliminadas = ids[:max(0, len(ids) - conservar)]
+        for id_instantanea in eliminadas:
+            os.remove(self._ruta_manifiesto(id_instantanea))
+
+        referenciados = {
+            entrada["sha256"]
+            for id_instantanea in self.listar()
+            for entrada in self.manifiesto(id_instantanea)["archivos"].values()
+        }
+        objetos_borrados = bytes_liberados = 0
+        limite = time.time() - GRACIA_RECOLECCION
+        if os.path.isdir(self.dir_objetos):
+            for raiz, _, nombres in os.walk(self.dir_objetos):
+                for nombre in nombres:
+                    ruta = os.path.join(raiz, nombre)
+                    if (nombre.endswith(".gz") and nombre[:-3] in referenciados) or os.path.getmtime(ruta) > limite:
+                        continue
+                    bytes_liberados += os.path.getsize(ruta)
+                    os.remove(ruta)
+                    objetos_borrados += 1
+
+        resumen = {"instantaneas_eliminadas": len(eliminadas), "objetos_eliminados": objetos_borrados,
+                   "mb_liberados": round(bytes_liberados / 1024 ** 2, 2)}
+        if eliminadas or objetos_borrados:
+            logger.info(f"🧹 Poda de respaldos: {resumen}")
+        return resumen
+
+
+def respaldar_si_vencido(origen: Optional[str] = None, almacen: Optional[AlmacenRespaldos] = None) -> Optional[Dict]:
+    """
+    Respalda MODEL_PATH si el último respaldo tiene más de AUTO_BACKUP_HOURS
+    y poda después. Nunca lanza: un fallo del respaldo no debe tumbar al llamador.
+    """
+    almacen = almacen or AlmacenRespaldos()
+    try:
+        if not almacen.vencido():
+            return None
+        manifiesto = almacen.respaldar(origen)
+        almacen.podar()
+        return manifiesto
+    except Exception as e:
+        logger.error(f"❌ Error en respaldo automático: {e}")
+        return None
@@ -0,0 +1,439 @@
+# app/core/servicio_api.py
+"""
+Servicio HTTP de puntuación (sin Streamlit) sobre RoomMatchIAEngine.
+
+Rutas:
+    GET  /salud                       estado y versión del modelo
+    GET  /compatibilidad?id1=&id2=    compatibilidad de un par
+    GET  /matches?id=&k=              top-K del inquilino
+    GET  /explicacion?id1=&id2=       explicación detallada de un par
+    GET  /metricas                    latencias p50/p99 por ruta y tamaño de lotes
+    POST /recargar                    vuelve a cargar los modelos de MODEL_PATH
+
+Las solicitudes de /compatibilidad y /matches que llegan a la vez se agrupan
+en micro-lotes (ventana API_VENTANA_LOTE_MS, máximo API_MAX_LOTE) y se
+puntúan con una sola llamada vectorizada al modelo.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import config
+from app.core.database import db_manager
+from app.core.ia_engine import MotorIA
+from app.core.almacen_inquilinos import COLUMNAS_COMPACTAS
+from app.core.inquilinos_frame import registro_poblacion
+from app.core.recomendaciones import obtener_factores_comunes, obtener_recomendaciones_lote, tamano_bloque
+
+logger = logging.getLogger(__name__)
+
+# Tiempo máximo que una solicitud espera el resultado de su lote
+TIMEOUT_LOTE = 30.0
+
+
+class ErrorAPI(Exception):
+    """Error con código HTTP para el cliente"""
+
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# ============================================================================
+# 📦 MICRO-LOTES
+# ============================================================================
+class MicroLotes:
+    """
+    Agrupa las solicitudes concurrentes: un hilo toma la primera de la cola,
+    espera hasta `ventana` segundos (o hasta `max_lote`) a que lleguen más y
+    llama a procesar_lote(cargas) → un resultado (o una excepción) por carga.
+    """
+
+    def __init__(self, procesar_lote: Callable[[List], List], ventana: float, max_lote: int, nombre: str):
+        self.procesar_lote = procesar_lote
+        self.ventana = ventana
+        self.max_lote = max_lote
+        self.lotes = 0
+        self.solicitudes = 0
+        self.mayor_lote = 0
+        self._cola: "queue.Queue[tuple]" = queue.Queue()
+        self._hilo = threading.Thread(target=self._bucle, name=f"lotes-{nombre}", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, carga) -> Future:
+        futuro = Future()
+        self._cola.put((carga, futuro))
+        return futuro
+
+    def _bucle(self):
+        while True:
+            lote = [self._cola.get()]
+            limite = time.monotonic() + self.ventana
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            self.lotes += 1
+            self.solicitudes += len(lote)
+            self.mayor_lote = max(self.mayor_lote, len(lote))
+            try:
+                resultados = self.procesar_lote([carga for carga, _ in lote])
+            except Exception as e:
+                logger.error(f"❌ Error procesando lote: {e}")
+                resultados = [e] * len(lote)
+            for (_, futuro), resultado in zip(lote, resultados):
+                if isinstance(resultado, Exception):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+
+    def estadisticas(self) -> Dict:
+        return {
+            "lotes": self.lotes,
+            "solicitudes": self.solicitudes,
+            "tamano_medio": self.solicitudes / self.lotes if self.lotes else 0.0,
+            "mayor_lote": self.mayor_lote,
+        }
+
+
+# ============================================================================
+# ⏱️ LATENCIAS
+# ============================================================================
+class MetricasLatencia:
+    """Últimas `ventana` latencias por ruta (segura entre hilos)"""
+
+    def __init__(self, ventana: int = 10000):
+        self._muestras = defaultdict(lambda: deque(maxlen=ventana))
+        self._totales = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def registrar(self, ruta: str, segundos: float):
+        with self._lock:
+            self._muestras[ruta].append(segundos)
+            self._totales[ruta] += 1
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            muestras = {ruta: np.array(valores) * 1000 for ruta, valores in self._muestras.items()}
+            totales = dict(self._totales)
+        return {
+            ruta: {
+                "solicitudes": totales[ruta],
+                "p50_ms": round(float(np.percentile(valores, 50)), 2),
+                "p99_ms": round(float(np.percentile(valores, 99)), 2),
+            }
+            for ruta, valores in muestras.items()
+        }
+
+
+# ============================================================================
+# 🧠 SERVICIO
+# ============================================================================
+def _entero(parametros: Dict, nombre: str, defecto: Optional[int] = None) -> int:
+    valor = parametros.get(nombre)
+    if valor is None:
+        if defecto is None:
+            raise ErrorAPI(400, f"Falta el parámetro '{nombre}'")
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErrorAPI(400, f"Parámetro '{nombre}' no es un entero: {valor}")
+
+
+def _top_k(puntuaciones: np.ndarray, posiciones: np.ndarray, k: int):
+    """Los k mejores por puntuación descendente y, ante empate, posición (id) más baja"""
+    if len(puntuaciones) > k:
+        corte = -np.partition(-puntuaciones, k - 1)[k - 1]
+        elegibles = puntuaciones >= corte
+        puntuaciones, posiciones = puntuaciones[elegibles], posiciones[elegibles]
+    orden = np.lexsort((posiciones, -puntuaciones))[:k]
+    return puntuaciones[orden], posiciones[orden]
+
+
+def _a_json(valor):
+    if hasattr(valor, "tolist"):
+        return valor.tolist()
+    if hasattr(valor, "item"):
+        return valor.item()
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return str(valor)
+
+
+class ServicioAPI:
+    """Lógica de las rutas; el servidor HTTP solo traduce solicitudes y respuestas"""
+
+    def __init__(self, motor=None, db=None, ventana_ms: Optional[float] = None, max_lote: Optional[int] = None):
+        self.motor = motor or MotorIA()
+        self.db = db or db_manager
+        ventana = (config.API_VENTANA_LOTE_MS if ventana_ms is None else ventana_ms) / 1000
+        max_lote = max_lote or config.API_MAX_LOTE
+        self.lotes_pares = MicroLotes(self._puntuar_pares, ventana, max_lote, "pares")
+        self.lotes_matches = MicroLotes(self._calcular_matches, ventana, max_lote, "matches")
+        self.metricas = MetricasLatencia()
+        self._poblacion = None
+        self._lock_poblacion = threading.Lock()
+
+        self.rutas = {
+            ("GET", "/salud"): self.salud,
+            ("GET", "/compatibilidad"): self.compatibilidad,
+            ("GET", "/matches"): self.matches,
+            ("GET", "/explicacion"): self.explicacion,
+            ("GET", "/metricas"): self.resumen_metricas,
+            ("POST", "/recargar"): self.recargar,
+        }
+
+    def _exigir_modelo(self):
+        self.motor.recargar_si_hay_version_nueva()
+        if not self.motor.is_trained:
+            raise ErrorAPI(503, "El modelo no está entrenado")
+
+    # ------------------------------------------------------------------ rutas
+    def salud(self, parametros: Dict) -> Dict:
+        return {
+            "estado": "ok",
+            "modelo_entrenado": self.motor.is_trained,
+            "version_modelo": self.motor.metrics.last_training,
+            "inquilinos": self.db.contar_inquilinos(),
+        }
+
+    def compatibilidad(self, parametros: Dict) -> Dict:
+        self._exigir_modelo()
+        par = (_entero(parametros, "id1"), _entero(parametros, "id2"))
+        return self.lotes_pares.enviar(par).result(TIMEOUT_LOTE)
+
+    def matches(self, parametros: Dict) -> Dict:
+        self._exigir_modelo()
+        k = _entero(parametros, "k", config.RECOMENDACIONES_TOP_K)
+        if k < 1:
+            raise ErrorAPI(400, "k debe ser mayor que 0")
+        solicitud = (_entero(parametros, "id"), k)
+        return self.lotes_matches.enviar(solicitud).result(TIMEOUT_LOTE)
+
+    def explicacion(self, parametros: Dict) -> Dict:
+        self._exigir_modelo()
+        resultado = self.motor.explicar_compatibilidad_detallada(_entero(parametros, "id1"), _entero(parametros, "id2"))
+        if "error" in resultado:
+            raise ErrorAPI(404, resultado["error"])
+        return resultado
+
+    def resumen_metricas(self, parametros: Dict) -> Dict:
+        return {
+            "latencias": self.metricas.resumen(),
+            "lotes": {
+                "compatibilidad": self.lotes_pares.estadisticas(),
+                "matches": self.lotes_matches.estadisticas(),
+            },
+        }
+
+    def recargar(self, parametros: Dict) -> Dict:
+        if not self.motor.cargar_modelos():
+            raise ErrorAPI(503, "No se encontró modelo entrenado")
+        return {"version_modelo": self.motor.metrics.last_training}
+
+    # ------------------------------------------------------------------ lotes
+    def _perfiles(self, ids) -> Dict[int, Dict]:
+        return self.db.obtener_inquilinos_por_ids(list(set(ids)))
+
+    def _puntuar_pares(self, pares: List[tuple]) -> List:
+        perfiles = self._perfiles(i for par in pares for i in par)
+        resultados: List = [None] * len(pares)
+        validos = []
+        for posicion, par in enumerate(pares):
+            faltante = next((i for i in par if i not in perfiles), None)
+            if faltante is None:
+                validos.append(posicion)
+            else:
+                resultados[posicion] = ErrorAPI(404, f"Inquilino no encontrado: {faltante}")
+
+        if validos:
+            modelos = self.motor.modelos
+            X1 = self.motor.codificar_poblacion(pd.DataFrame([perfiles[pares[p][0]] for p in validos]), modelos)
+            X2 = self.motor.codificar_poblacion(pd.DataFrame([perfiles[pares[p][1]] for p in validos]), modelos)
+            for posicion, compat in zip(validos, self.motor.puntuar_pares(X1, X2, modelos=modelos)):
+                compat = round(float(compat), 1)
+                resultados[posicion] = {
+                    "id1": pares[posicion][0],
+                    "id2": pares[posicion][1],
+                    "compatibilidad_porcentaje": compat,
+                    "recomendacion": "✅ Buena combinación" if compat >= 60 else "⚠️ Poca compatibilidad",
+                }
+        return resultados
+
+    def _poblacion_codificada(self):
+        """
+        (versión, df, X, modelos) de la población vigente; se recodifica solo
+        si cambia la población o se publican modelos nuevos. `df` lleva las
+        columnas compactas y las que pide el encoder, nunca la tabla lateral entera.
+        """
+        instantanea = registro_poblacion.actual()
+        modelos = self.motor.modelos
+        with self._lock_poblacion:
+            if self._poblacion is None or self._poblacion[0] != instantanea.version \
+                    or self._poblacion[3] is not modelos:
+                features = list(getattr(modelos.encoder, "feature_names_in_", []))
+                columnas = [*COLUMNAS_COMPACTAS, *[c for c in features if c not in COLUMNAS_COMPACTAS]]
+                df = instantanea.almacen.vista(columnas).sort_values('id_inquilino').reset_index(drop=True)
+                self._poblacion = (instantanea.version, df, self.motor.codificar_poblacion(df, modelos), modelos)
+            return self._poblacion
+
+    def _calcular_matches(self, solicitudes: List[tuple]) -> List:
+        version = self.motor.metrics.last_training
+        resultados: List = [None] * len(solicitudes)
+        pendientes = []
+        listas = obtener_recomendaciones_lote((i for i, _ in solicitudes), version, self.db)
+        for posicion, (id_inquilino, k) in enumerate(solicitudes):
+            lista = listas.get(int(id_inquilino))
+            if lista and k <= len(lista["matches"]):
+                resultados[posicion] = {
+                    "id_inquilino": id_inquilino,
+                    "matches": lista["matches"][:k],
+                    "fuente": "precalculado",
+                }
+            else:
+                pendientes.append(posicion)
+        if not pendientes:
+            return resultados
+
+        # Inquilinos fuera de la instantánea: una sola matriz para todo el lote
+        perfiles = self._perfiles(solicitudes[p][0] for p in pendientes)
+        for posicion in [p for p in pendientes if solicitudes[p][0] not in perfiles]:
+            resultados[posicion] = ErrorAPI(404, f"Inquilino no encontrado: {solicitudes[posicion][0]}")
+        pendientes = [p for p in pendientes if solicitudes[p][0] in perfiles]
+        if not pendientes:
+            return resultados
+
+        _, df, X, modelos = self._poblacion_codificada()
+        ids = df['id_inquilino'].to_numpy()
+        bases = [perfiles[solicitudes[p][0]] for p in pendientes]
+        X_bases = self.motor.codificar_poblacion(pd.DataFrame(bases), modelos)
+
+        # La población se recorre por bloques (bases × bloque cabe en MEMORIA_BLOQUE)
+        # y cada base conserva solo su top-K acumulado
+        mejores = [(np.empty(0), np.empty(0, dtype=int)) for _ in pendientes]
+        paso = tamano_bloque(len(bases), maximo=len(ids))
+        for inicio in range(0, len(ids), paso):
+            fin = min(inicio + paso, len(ids))
+            # Bosque completo, como las listas precalculadas: misma puntuación por par
+            compat = self.motor.puntuar_lote(X_bases, X[inicio:fin], interactivo=False, modelos=modelos).round(1)
+            posiciones = np.arange(inicio, fin)
+            for fila, posicion in enumerate(pendientes):
+                id_inquilino, k = solicitudes[posicion]
+                puntuaciones = np.where(ids[inicio:fin] == id_inquilino, -np.inf, compat[fila])
+                previas, posiciones_previas = mejores[fila]
+                mejores[fila] = _top_k(
+                    np.concatenate([previas, puntuaciones]), np.concatenate([posiciones_previas, posiciones]), k
+                )
+
+        for fila, posicion in enumerate(pendientes):
+            id_inquilino, _ = solicitudes[posicion]
+            base = pd.Series(bases[fila])
+            puntuaciones, posiciones = mejores[fila]
+            resultados[posicion] = {
+                "id_inquilino": id_inquilino,
+                "matches": [
+                    {
+                        "id_inquilino": int(ids[j]),
+                        "compatibilidad": float(puntuacion),
+                        "factores_comunes": obtener_factores_comunes(base, df.iloc[j]),
+                    }
+                    for puntuacion, j in zip(puntuaciones, posiciones)
+                    if np.isfinite(puntuacion)
+                ],
+                "fuente": "en_vivo",
+            }
+        return resultados
+
+
+# ============================================================================
+# 🌐 SERVIDOR HTTP
+# ============================================================================
+class ManejadorAPI(BaseHTTPRequestHandler):
+    """Traduce HTTP ↔ ServicioAPI (self.server.servicio) y mide la latencia"""
+
+    protocol_version = "HTTP/1.1"  # conexiones persistentes
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def _descartar_cuerpo(self):
+        """
+        Ninguna ruta usa el cuerpo, pero hay que leerlo: en una conexión
+        persistente lo no leído se tomaría como la siguiente solicitud. Si su
+        longitud no se conoce, la conexión se cierra tras responder.
+        """
+        try:
+            pendiente = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            pendiente = -1
+        if pendiente < 0 or self.headers.get("Transfer-Encoding"):
+            self.close_connection = True
+            return
+        while pendiente > 0:
+            leido = len(self.rfile.read(min(pendiente, 64 * 1024)))
+            if not leido:
+                break
+            pendiente -= leido
+
+    def _atender(self, metodo: str):
+        inicio = time.perf_counter()
+        self._descartar_cuerpo()
+        url = urlparse(self.path)
+        ruta = url.path.rstrip("/") or "/"
+        parametros = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+        servicio: ServicioAPI = self.server.servicio
+
+        manejador = servicio.rutas.get((metodo, ruta))
+        try:
+            if manejador is None:
+                raise ErrorAPI(404, f"Ruta no encontrada: {metodo} {ruta}")
+            estado, cuerpo = 200, manejador(parametros)
+        except ErrorAPI as e:
+            estado, cuerpo = e.estado, {"error": str(e)}
+        except Exception as e:
+            logger.error(f"❌ Error en {metodo} {ruta}: {e}")
+            estado, cuerpo = 500, {"error": str(e)}
+
+        datos = json.dumps(cuerpo, default=_a_json, ensure_ascii=False).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(datos)
+
+        if manejador is not None:
+            servicio.metricas.registrar(ruta, time.perf_counter() - inicio)
+
+    def log_message(self, formato, *args):
+        logger.debug(formato % args)
+
+
+def crear_servidor(servicio: Optional[ServicioAPI] = None, host: Optional[str] = None,
+                   puerto: Optional[int] = None) -> ThreadingHTTPServer:
+    """Servidor con un hilo por conexión; llamar a serve_forever() para atender"""
+    direccion = (host or config.API_HOST, config.API_PORT if puerto is None else puerto)
+    servidor = ThreadingHTTPServer(direccion, ManejadorAPI)
+    servidor.daemon_threads = True
+    servidor.servicio = servicio or ServicioAPI()
+    return servidor
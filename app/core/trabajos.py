@@ -0,0 +1,372 @@
+# app/core/trabajos.py
+"""
+Ejecutor de trabajos pesados (entrenamiento, análisis de sesgos, puntuación
+masiva) en un pool de procesos, fuera del hilo de Streamlit.
+
+El estado vive en la colección `trabajos` del backend de almacenamiento, así
+que cualquier proceso (la app, un script) puede consultar el progreso o pedir
+la cancelación. Cada trabajo avanza por etapas; el proceso trabajador reporta
+el progreso en el documento y revisa la bandera `cancelar` en cada reporte.
+
+El gestor renueva `updated_at` de sus trabajos activos cada TRABAJOS_LATIDO_S
+segundos; al arrancar, los activos que llevan LATIDOS_PERDIDOS latidos sin
+renovarse (su proceso murió) se marcan como fallidos.
+"""
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from app.core.config import config
+from app.core.database import db_manager
+from app.core.ia_engine import ETAPAS_ENTRENAMIENTO, MotorIA, RoomMatchIAEngine
+from app.core.puntuacion_masiva import puntuar_bloque
+from app.core.recomendaciones import precalcular_recomendaciones
+from app.core.respaldos import respaldar_si_vencido
+
+logger = logging.getLogger(__name__)
+
+COLECCION_TRABAJOS = "trabajos"
+
+PENDIENTE = "pendiente"
+EJECUTANDO = "ejecutando"
+COMPLETADO = "completado"
+FALLIDO = "fallido"
+CANCELADO = "cancelado"
+ESTADOS_ACTIVOS = [PENDIENTE, EJECUTANDO]
+LATIDOS_PERDIDOS = 4
+
+
+class TrabajoCancelado(Exception):
+    """Se pidió cancelar el trabajo mientras se ejecutaba"""
+
+
+# ============================================================================
+# 🧱 TIPOS DE TRABAJO (se ejecutan dentro del proceso trabajador)
+# ============================================================================
+def _trabajo_entrenamiento(parametros: Dict, progreso: "ReporteProgreso") -> Dict:
+    motor = RoomMatchIAEngine()
+    resultado = motor.entrenar_modelo_completo(
+        progreso=progreso,
+        muestra=parametros.get("muestra"),
+        n_jobs=parametros.get("n_jobs"),
+        etapas=parametros.get("etapas"),
+    )
+    if "error" in resultado:
+        return resultado
+
+    # Las listas de la versión nueva las calcula un trabajo "recomendaciones"
+    # aparte, que el gestor encola al completarse este (ver _al_terminar)
+    respaldo = respaldar_si_vencido()
+    if respaldo:
+        resultado["respaldo"] = respaldo["id"]
+    return resultado
+
+
+def _trabajo_sesgos(parametros: Dict, progreso: "ReporteProgreso") -> Dict:
+    motor = MotorIA()
+    progreso("modelos", 1.0)
+    resultado = motor.analizar_sesgos_modelo()
+    progreso("analisis", 1.0)
+    return resultado
+
+
+def _trabajo_puntuacion(parametros: Dict, progreso: "ReporteProgreso") -> Dict:
+    """Compatibilidad de una lista de pares [[id1, id2], ...] (camino vectorizado)"""
+    motor = MotorIA()
+    progreso("modelos", 1.0)
+
+    pares = pd.DataFrame(parametros.get("pares", []), columns=["id1", "id2"])
+    resultado = puntuar_bloque(motor, pares) if len(pares) else pd.DataFrame(columns=["id1", "id2"])
+    progreso("puntuacion", 1.0)
+    return {
+        "pares": [
+            {
+                "id1": fila["id1"],
+                "id2": fila["id2"],
+                "compatibilidad": None if pd.isna(fila["compatibilidad"]) else fila["compatibilidad"],
+                "error": fila["error"] or None,
+            }
+            for fila in resultado.to_dict("records")
+        ]
+    }
+
+
+def _trabajo_recomendaciones(parametros: Dict, progreso: "ReporteProgreso") -> Dict:
+    # Ya corre dentro del pool: sin un pool propio (MAX_WORKERS² procesos), el
+    # paralelismo lo dan los hilos del bosque
+    return precalcular_recomendaciones(k=parametros.get("k"), procesos=1, progreso=progreso)
+
+
+# tipo → (funcion(parametros, progreso) → dict, etapas). Se define aquí y no por
+# registro dinámico: los trabajadores ("spawn") solo importan este módulo.
+TIPOS_TRABAJO: Dict[str, tuple] = {
+    "entrenamiento": (_trabajo_entrenamiento, ETAPAS_ENTRENAMIENTO),
+    "sesgos": (_trabajo_sesgos, ["modelos", "analisis"]),
+    "puntuacion": (_trabajo_puntuacion, ["modelos", "puntuacion"]),
+    "recomendaciones": (_trabajo_recomendaciones, ["datos", "puntuacion", "guardado"]),
+}
+
+
+# ============================================================================
+# 📈 PROGRESO
+# ============================================================================
+class ReporteProgreso:
+    """Callable progreso(etapa, fraccion) que persiste el avance y atiende la cancelación"""
+
+    def __init__(self, coleccion, id_trabajo: str, etapas: List[str]):
+        self.coleccion = coleccion
+        self.id_trabajo = id_trabajo
+        self.etapas = {etapa: 0.0 for etapa in etapas}
+
+    def __call__(self, etapa: str, fraccion: float):
+        self.etapas[etapa] = max(0.0, min(1.0, float(fraccion)))
+        doc = self.coleccion.buscar_y_actualizar(
+            {"_id": self.id_trabajo},
+            {
+                "$set": {
+                    "etapa": etapa,
+                    "etapas": dict(self.etapas),
+                    "progreso": sum(self.etapas.values()) / len(self.etapas),
+                },
+                "$currentDate": {"updated_at": True},
+            },
+        )
+        if doc and doc.get("cancelar"):
+            raise TrabajoCancelado(f"Trabajo {self.id_trabajo} cancelado en la etapa {etapa}")
+
+
+def _serializable(resultado):
+    """Resultado apto para el backend (sin tipos numpy ni objetos arbitrarios)"""
+    def convertir(valor):
+        if hasattr(valor, "tolist"):
+            return valor.tolist()
+        if hasattr(valor, "item"):
+            return valor.item()
+        return str(valor)
+    return json.loads(json.dumps(resultado, default=convertir))
+
+
+def _ejecutar_trabajo(id_trabajo: str):
+    """Punto de entrada en el proceso trabajador"""
+    logging.basicConfig(level=config.LOG_LEVEL)
+    coleccion = db_manager.almacenamiento.coleccion(COLECCION_TRABAJOS)
+
+    trabajo = coleccion.buscar_y_actualizar(
+        {"_id": id_trabajo, "estado": PENDIENTE, "cancelar": False},
+        {"$set": {"estado": EJECUTANDO, "iniciado": datetime.utcnow()},
+         "$currentDate": {"updated_at": True}},
+    )
+    if trabajo is None:
+        # Cancelado antes de empezar (o ya tomado por otro proceso)
+        coleccion.actualizar_uno(
+            {"_id": id_trabajo, "estado": PENDIENTE},
+            {"$set": {"estado": CANCELADO, "terminado": datetime.utcnow()}},
+        )
+        return
+
+    funcion, etapas = TIPOS_TRABAJO[trabajo["tipo"]]
+    progreso = ReporteProgreso(coleccion, id_trabajo, etapas)
+    cambios = {}
+    try:
+        resultado = funcion(trabajo.get("parametros", {}), progreso)
+        cambios.update(estado=COMPLETADO, resultado=_serializable(resultado), progreso=1.0)
+        logger.info(f"✅ Trabajo {trabajo['tipo']} {id_trabajo} completado")
+    except TrabajoCancelado as e:
+        cambios.update(estado=CANCELADO, mensaje=str(e))
+        logger.info(f"🛑 {e}")
+    except Exception as e:
+        cambios.update(estado=FALLIDO, error=str(e))
+        logger.error(f"❌ Trabajo {trabajo['tipo']} {id_trabajo} falló: {e}")
+
+    cambios["terminado"] = datetime.utcnow()
+    # Si entretanto se dio por interrumpido, se respeta ese cierre
+    coleccion.actualizar_uno(
+        {"_id": id_trabajo, "estado": EJECUTANDO}, {"$set": cambios, "$currentDate": {"updated_at": True}}
+    )
+
+
+# ============================================================================
+# 🗂️ GESTOR
+# ============================================================================
+class GestorTrabajos:
+    """
+    Envía trabajos al pool de procesos (MAX_WORKERS) y consulta la tabla de
+    trabajos. Los procesos se crean con "spawn": cada trabajador abre su
+    propia conexión a la base de datos.
+    """
+
+    def __init__(self, db=None, max_workers: Optional[int] = None):
+        self.db = db or db_manager
+        self.coleccion = self.db.almacenamiento.coleccion(COLECCION_TRABAJOS)
+        self.max_workers = max_workers or config.MAX_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._activos = set()
+        self._lock = threading.Lock()
+        self._latido: Optional[threading.Thread] = None
+        self.coleccion.crear_indice([("estado", 1), ("creado", -1)])
+        self.recuperar_interrumpidos()
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        if self._latido is None:
+            self._latido = threading.Thread(target=self._latir, name="latido-trabajos", daemon=True)
+            self._latido.start()
+        return self._pool
+
+    # =========================================================================
+    # 💓 LATIDO Y RECUPERACIÓN
+    # =========================================================================
+    def recuperar_interrumpidos(self) -> int:
+        """
+        Marca como fallidos los trabajos activos sin latido desde hace
+        LATIDOS_PERDIDOS intervalos: su gestor (y con él el pool) ya no existe
+        """
+        try:
+            limite = datetime.utcnow() - timedelta(seconds=LATIDOS_PERDIDOS * config.TRABAJOS_LATIDO_S)
+            recuperados = self.coleccion.actualizar_muchos(
+                {"estado": {"$in": ESTADOS_ACTIVOS}, "updated_at": {"$lt": limite}},
+                {
+                    "$set": {
+                        "estado": FALLIDO,
+                        "error": "Interrumpido: el proceso que lo ejecutaba dejó de responder",
+                        "terminado": datetime.utcnow(),
+                    },
+                    "$currentDate": {"updated_at": True},
+                },
+            )
+            if recuperados:
+                logger.warning(f"⚠️ {recuperados} trabajos interrumpidos marcados como fallidos")
+            return recuperados
+        except Exception as e:
+            logger.error(f"❌ Error recuperando trabajos interrumpidos: {e}")
+            return 0
+
+    def _latir(self):
+        """Renueva updated_at de los trabajos encolados por este gestor que siguen activos"""
+        while True:
+            time.sleep(config.TRABAJOS_LATIDO_S)
+            with self._lock:
+                ids = list(self._activos)
+            if not ids:
+                continue
+            try:
+                self.coleccion.actualizar_muchos(
+                    {"_id": {"$in": ids}, "estado": {"$in": ESTADOS_ACTIVOS}},
+                    {"$currentDate": {"updated_at": True}},
+                )
+            except Exception as e:
+                logger.error(f"❌ Error renovando el latido de los trabajos: {e}")
+
+    def _al_terminar(self, id_trabajo: str, futuro):
+        """
+        Tras un entrenamiento completado encola el precálculo de recomendaciones
+        de la versión nueva. Si el proceso trabajador murió (pool roto), el
+        trabajo no se cerró: se cierra aquí.
+        """
+        with self._lock:
+            self._activos.discard(id_trabajo)
+        error = futuro.exception() if not futuro.cancelled() else None
+        if error is None:
+            self._encadenar(id_trabajo)
+            return
+        logger.error(f"❌ El proceso del trabajo {id_trabajo} terminó de forma anómala: {error}")
+        try:
+            self.coleccion.actualizar_uno(
+                {"_id": id_trabajo, "estado": {"$in": ESTADOS_ACTIVOS}},
+                {"$set": {"estado": FALLIDO, "error": f"Interrumpido: {error}", "terminado": datetime.utcnow()},
+                 "$currentDate": {"updated_at": True}},
+            )
+        except Exception as e:
+            logger.error(f"❌ Error cerrando el trabajo {id_trabajo}: {e}")
+        if isinstance(error, BrokenProcessPool):
+            # El pool roto no acepta más trabajos: el siguiente envío crea otro
+            self._pool = None
+
+    def _encadenar(self, id_trabajo: str):
+        try:
+            trabajo = self.estado(id_trabajo)
+            if not trabajo or trabajo["tipo"] != "entrenamiento" or trabajo["estado"] != COMPLETADO \
+                    or "error" in (trabajo.get("resultado") or {}):
+                return
+            parametros = {"k": trabajo["parametros"]["k"]} if "k" in trabajo.get("parametros", {}) else {}
+            # En otro hilo: este callback corre en el hilo que administra el pool
+            threading.Thread(
+                target=self.enviar, args=("recomendaciones",), kwargs=parametros, daemon=True
+            ).start()
+        except Exception as e:
+            logger.error(f"❌ Error encolando las recomendaciones tras el trabajo {id_trabajo}: {e}")
+
+    def enviar(self, tipo: str, **parametros) -> str:
+        """Registra el trabajo y lo encola en el pool. Devuelve su id"""
+        if tipo not in TIPOS_TRABAJO:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        _, etapas = TIPOS_TRABAJO[tipo]
+        id_trabajo = uuid.uuid4().hex
+        ahora = datetime.utcnow()
+        self.coleccion.insertar({
+            "_id": id_trabajo,
+            "tipo": tipo,
+            "parametros": parametros,
+            "estado": PENDIENTE,
+            "cancelar": False,
+            "etapas": {etapa: 0.0 for etapa in etapas},
+            "etapa": None,
+            "progreso": 0.0,
+            "creado": ahora,
+            "updated_at": ahora,
+        })
+        with self._lock:
+            self._activos.add(id_trabajo)
+        futuro = self._obtener_pool().submit(_ejecutar_trabajo, id_trabajo)
+        futuro.add_done_callback(lambda f: self._al_terminar(id_trabajo, f))
+        logger.info(f"📨 Trabajo {tipo} encolado: {id_trabajo}")
+        return id_trabajo
+
+    def estado(self, id_trabajo: str) -> Optional[Dict]:
+        return self.coleccion.buscar_uno({"_id": id_trabajo})
+
+    def listar(self, limite: int = 20, activos: bool = False) -> List[Dict]:
+        filtro = {"estado": {"$in": ESTADOS_ACTIVOS}} if activos else {}
+        return self.coleccion.buscar(filtro, orden=[("creado", -1)], limite=limite)
+
+    def cancelar(self, id_trabajo: str) -> bool:
+        """Pide la cancelación; el trabajador la atiende en su siguiente reporte"""
+        return self.coleccion.actualizar_uno(
+            {"_id": id_trabajo, "estado": {"$in": ESTADOS_ACTIVOS}},
+            {"$set": {"cancelar": True}, "$currentDate": {"updated_at": True}},
+        )
+
+    def esperar(self, id_trabajo: str, intervalo: float = 1.0, timeout: Optional[float] = None) -> Dict:
+        """Bloquea hasta que el trabajo termine (para scripts)"""
+        inicio = time.monotonic()
+        while True:
+            trabajo = self.estado(id_trabajo)
+            if trabajo is None or trabajo["estado"] not in ESTADOS_ACTIVOS:
+                return trabajo
+            if timeout is not None and time.monotonic() - inicio > timeout:
+                return trabajo
+            time.sleep(intervalo)
+
+
+_gestor: Optional[GestorTrabajos] = None
+
+
+def obtener_gestor_trabajos() -> GestorTrabajos:
+    """Gestor único por proceso (el pool se crea al enviar el primer trabajo)"""
+    global _gestor
+    if _gestor is None:
+        _gestor = GestorTrabajos()
+    return _gestor
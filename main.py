@@ -8,9 +8,7 @@ import streamlit as st
 import logging
 
 from app.core.config import config
-from app.core.database import DatabaseManager   # ✅ usar la clase
 from app.core.ia_engine import MotorIA
-from app.components import dashboard, formulario, chatbot
 
 # ==============================
 # CONFIGURACIÓN GENERAL
@@ -27,17 +25,22 @@ st.set_page_config(
     layout="wide",
 )
 
-# ✅ Instancia global de la base de datos
-db_manager = DatabaseManager()
-
 # ==============================
 # INICIALIZAR SISTEMA
 # ==============================
-def inicializar_sistema():
+@st.cache_resource(show_spinner="🔧 Cargando Motor IA...")
+def obtener_motor_ia():
+    """Motor IA único por proceso: se carga una vez y lo comparten todas las sesiones"""
     logger.info("🔧 Inicializando Motor IA...")
-    if "motor_ia" not in st.session_state:
-        st.session_state.motor_ia = MotorIA()
-        st.session_state.motor_ia.cargar_modelos()
+    return MotorIA()  # MotorIA() ya llama a cargar_modelos()
+
+def inicializar_sistema():
+    # La sesión solo guarda una referencia al motor compartido (solo lectura)
+    motor_ia = obtener_motor_ia()
+    # El motor es compartido: cualquier sesión que se ejecute publica los
+    # modelos que un trabajo de entrenamiento haya guardado entretanto
+    motor_ia.recargar_si_hay_version_nueva()
+    st.session_state.motor_ia = motor_ia
 
 # ==============================
 # SIDEBAR
@@ -49,7 +52,9 @@ def mostrar_sidebar():
         [
             "📊 Dashboard",
             "📝 Registrar Inquilino",
+            "🔎 Explorar Inquilinos",
             "🤖 ChatBot",
+            "🛠️ Trabajos",
             "⚙️ Configuración",
             "ℹ️ Acerca de"
         ]
@@ -58,23 +63,36 @@ def mostrar_sidebar():
 # ==============================
 # PANTALLAS PRINCIPALES
 # ==============================
+# Cada pantalla importa su componente al mostrarse: plotly y el resto de
+# dependencias de una página no se cargan hasta que alguien la abre
 def pantalla_dashboard():
+    from app.components import dashboard
     st.markdown("## 📊 Dashboard de Análisis")
     dashboard.mostrar_dashboard_completo(st.session_state.motor_ia)
 
 def pantalla_formulario():
+    from app.components import formulario
     st.markdown("## 📝 Registro de Inquilinos")
     if hasattr(formulario, "mostrar_formulario"):
         formulario.mostrar_formulario()
     elif hasattr(formulario, "mostrar_formulario_registro"):
-        formulario.mostrar_formulario_registro()
+        formulario.mostrar_formulario_registro(st.session_state.motor_ia)
     else:
         st.error("❌ No hay función de formulario disponible en formulario.py")
 
+def pantalla_explorador():
+    from app.components import explorador
+    explorador.mostrar_explorador()
+
 def pantalla_chatbot():
+    from app.components import chatbot
     st.markdown("## 🤖 ChatBot de Compatibilidad")
     chatbot.mostrar_chatbot_avanzado(st.session_state.motor_ia)
 
+def pantalla_trabajos():
+    from app.components import panel_trabajos
+    panel_trabajos.mostrar_panel_trabajos(st.session_state.motor_ia)
+
 def pantalla_configuracion():
     st.markdown("## ⚙️ Configuración del Sistema")
     st.json({
@@ -109,8 +127,12 @@ def main():
         pantalla_dashboard()
     elif opcion == "📝 Registrar Inquilino":
         pantalla_formulario()
+    elif opcion == "🔎 Explorar Inquilinos":
+        pantalla_explorador()
     elif opcion == "🤖 ChatBot":
         pantalla_chatbot()
+    elif opcion == "🛠️ Trabajos":
+        pantalla_trabajos()
     elif opcion == "⚙️ Configuración":
         pantalla_configuracion()
     elif opcion == "ℹ️ Acerca de":
@@ -3,23 +3,53 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import shutil
+import argparse
 import logging
-from datetime import datetime
 from app.core.config import config
+from app.core.respaldos import AlmacenRespaldos
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("backup_models")
 
 def main():
-    src = config.MODEL_PATH
-    dst = os.path.join(config.BACKUP_PATH, f"models_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    parser = argparse.ArgumentParser(description="Respaldos deduplicados de MODEL_PATH")
+    sub = parser.add_subparsers(dest="comando")
 
-    os.makedirs(dst, exist_ok=True)
-    shutil.copytree(src, dst, dirs_exist_ok=True)
+    respaldar = sub.add_parser("respaldar", help="Crea una instantánea (comando por defecto)")
+    respaldar.add_argument("--auto", action="store_true",
+                           help=f"Solo si el último respaldo tiene más de AUTO_BACKUP_HOURS ({config.AUTO_BACKUP_HOURS}h)")
 
-    logger.info(f"✅ Backup completado en {dst}")
+    sub.add_parser("listar", help="Lista las instantáneas")
+
+    restaurar = sub.add_parser("restaurar", help="Restaura una instantánea")
+    restaurar.add_argument("id", nargs="?", default=None, help="ID de la instantánea (por defecto la última)")
+    restaurar.add_argument("--destino", default=config.MODEL_PATH)
+    restaurar.add_argument("--procesos", type=int, default=config.MAX_WORKERS)
+
+    podar = sub.add_parser("podar", help="Conserva las N instantáneas más recientes")
+    podar.add_argument("--conservar", type=int, default=config.MAX_BACKUP_FILES)
+
+    args = parser.parse_args()
+    almacen = AlmacenRespaldos()
+
+    if args.comando == "listar":
+        for id_instantanea in almacen.listar():
+            m = almacen.manifiesto(id_instantanea)
+            logger.info(
+                f"📦 {id_instantanea}: {len(m['archivos'])} archivos, {m['bytes_totales'] / 1024 ** 2:.1f} MB "
+                f"({m['bytes_nuevos_comprimidos'] / 1024 ** 2:.1f} MB nuevos)"
+            )
+    elif args.comando == "restaurar":
+        almacen.restaurar(args.id, args.destino, args.procesos)
+    elif args.comando == "podar":
+        almacen.podar(args.conservar)
+    else:
+        if getattr(args, "auto", False) and not almacen.vencido():
+            logger.info("⏭️ El último respaldo sigue vigente")
+            return
+        manifiesto = almacen.respaldar()
+        almacen.podar()
+        logger.info(f"✅ Backup completado: {manifiesto['id']} en {almacen.ruta}")
 
 if __name__ == "__main__":
     main()
-
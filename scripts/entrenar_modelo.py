@@ -3,18 +3,64 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import argparse
 import logging
-from app.core.ia_engine import MotorIA
+from app.core.ia_engine import ETAPAS_MODELO, MotorIA
+from app.core.recomendaciones import precalcular_recomendaciones
+from app.core.respaldos import respaldar_si_vencido
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("entrenar_modelo")
 
 def main():
+    parser = argparse.ArgumentParser(description="Entrena el modelo de compatibilidad")
+    parser.add_argument("--muestra", type=float, default=None,
+                        help="Fracción (<= 1) o número de inquilinos; muestreo estratificado por 'compatible'")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Núcleos a usar (por defecto todos)")
+    parser.add_argument("--etapas", default=",".join(ETAPAS_MODELO),
+                        help=f"Etapas separadas por coma ({','.join(ETAPAS_MODELO)})")
+    parser.add_argument("--sin-recomendaciones", action="store_true",
+                        help="No precalcula las recomendaciones de la versión nueva")
+    args = parser.parse_args()
+
     logger.info("🚀 Entrenando modelo básico de compatibilidad...")
     motor = MotorIA()
-    resultado = motor.entrenar_modelo_completo()
+    resultado = motor.entrenar_modelo_completo(
+        progreso=lambda etapa, fraccion: logger.info(f"⏱️ {etapa}: {fraccion:.0%}"),
+        muestra=args.muestra,
+        n_jobs=args.n_jobs,
+        etapas=[e.strip() for e in args.etapas.split(",") if e.strip()],
+    )
+    if "error" in resultado:
+        logger.error(f"❌ Entrenamiento fallido: {resultado['error']}")
+        return
+    reporte = resultado.pop("entrenamiento")
+    destilado = resultado.pop("destilado", {})
     logger.info("✅ Modelo entrenado y guardado en /models")
     logger.info(f"Métricas: {resultado}")
 
+    logger.info(f"📋 Reporte por etapa ({reporte['inquilinos']:,} de {reporte['inquilinos_totales']:,} inquilinos):")
+    for etapa in reporte["etapas"]:
+        logger.info(f"   {etapa['etapa']:<15} {etapa['segundos']:>9.2f}s {etapa['memoria_pico_mb']:>9.1f} MB")
+
+    if destilado:
+        fidelidad = destilado["fidelidad"]
+        logger.info(
+            f"🎓 Destilado ({'en uso' if destilado['en_uso'] else 'descartado'}): "
+            f"acuerdo {fidelidad['acuerdo']:.1%}, error medio {fidelidad['error_medio_puntos']:.2f} pts "
+            f"(p95 {fidelidad['error_p95_puntos']:.2f}), {destilado['aceleracion']:.1f}x más rápido, "
+            f"{destilado['reduccion_tamano']:.1f}x más pequeño"
+        )
+
+    if not args.sin_recomendaciones:
+        logger.info("🏆 Precalculando recomendaciones de la versión nueva...")
+        resumen = precalcular_recomendaciones(
+            progreso=lambda etapa, fraccion: logger.info(f"⏱️ recomendaciones/{etapa}: {fraccion:.0%}")
+        )
+        logger.info(f"✅ Recomendaciones guardadas: {resumen}")
+
+    # Respaldo de los modelos si el último supera AUTO_BACKUP_HOURS
+    respaldar_si_vencido()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,25 @@
+# scripts/exportar_datos.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+from app.core.exportacion import exportar_inquilinos
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("exportar_datos")
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta la colección de inquilinos a partes JSONL comprimidas")
+    parser.add_argument("destino", help="Directorio de la exportación")
+    parser.add_argument("--por-parte", type=int, default=100000, help="Documentos por archivo")
+    parser.add_argument("--sin-pii", action="store_true", help="Excluye nombre y cédula")
+    parser.add_argument("--compresion", choices=["gzip", "zstd"], default="gzip")
+    args = parser.parse_args()
+
+    manifiesto = exportar_inquilinos(args.destino, args.por_parte, args.sin_pii, args.compresion)
+    logger.info(f"📦 Manifiesto: {os.path.join(args.destino, 'manifiesto.json')} (suma {manifiesto['suma']})")
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ import logging
 from dotenv import load_dotenv
 from tqdm import tqdm  # 🔥 Barra de progreso
 from app.core.database import DatabaseManager
-from app.core.inquilino_schema import generar_inquilino_demo
+from app.core.inquilino_schema import a_documentos, generar_inquilinos_demo, validar_lote
 
 # Cargar variables del .env
 load_dotenv()
@@ -14,6 +14,9 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("generar_dataset_demo")
 
+# Inquilinos generados, validados e insertados por lote
+TAMANO_LOTE = 10000
+
 def main():
     # 🔹 Leer cantidad desde argumento o desde .env
     if len(sys.argv) > 1:
@@ -23,21 +26,25 @@ def main():
 
     db = DatabaseManager()
 
-    # Limpieza de la colección antes de generar datos nuevos
-    db.inquilinos_collection.delete_many({})
+    # Limpieza de la colección (y del contador de IDs) antes de generar datos nuevos
+    db.limpiar_inquilinos()
     logger.info("🧹 Colección limpiada antes de insertar nuevos datos")
 
-    logger.info(f"🎯 Generando {cantidad} inquilinos demo...")
+    # Reservar todos los IDs en un solo bloque
+    primer_id = db.reservar_ids_inquilino(cantidad)
+    logger.info(f"🎯 Generando {cantidad} inquilinos demo (IDs {primer_id}-{primer_id + cantidad - 1})...")
 
     insertados = 0
     # 🔥 Usamos tqdm para mostrar barra de progreso
-    for _ in tqdm(range(cantidad), desc="Progreso", unit="inquilinos"):
-        try:
-            inquilino = generar_inquilino_demo()
-            db.insertar_inquilino(inquilino, log_individual=False)
-            insertados += 1
-        except Exception as e:
-            logger.warning(f"⚠️ Inquilino descartado: {e}")
+    with tqdm(total=cantidad, desc="Progreso", unit="inquilinos") as barra:
+        for inicio in range(0, cantidad, TAMANO_LOTE):
+            lote = min(TAMANO_LOTE, cantidad - inicio)
+            validos, errores = validar_lote(generar_inquilinos_demo(lote))
+            for posicion, motivo in errores.items():
+                logger.warning(f"⚠️ Inquilino descartado ({posicion}): {motivo}")
+            validos["id_inquilino"] = primer_id + inicio + validos.index
+            insertados += db.insertar_inquilinos(a_documentos(validos))
+            barra.update(lote)
 
     logger.info(f"✅ Dataset demo generado exitosamente. Total insertados: {insertados}")
 
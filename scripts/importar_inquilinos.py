@@ -0,0 +1,30 @@
+# scripts/importar_inquilinos.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+from app.core.importacion import importar_archivo
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("importar_inquilinos")
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa inquilinos de agencias desde CSV/JSONL")
+    parser.add_argument("entrada", help="Archivo .csv o .jsonl con un inquilino por fila")
+    parser.add_argument("--cuarentena", default=None,
+                        help="JSONL para las filas rechazadas (por defecto <entrada>.cuarentena.jsonl)")
+    parser.add_argument("--bloque", type=int, default=5000, help="Filas validadas e insertadas por bloque")
+    args = parser.parse_args()
+
+    cuarentena = args.cuarentena or f"{os.path.splitext(args.entrada)[0]}.cuarentena.jsonl"
+    logger.info(f"📥 Importando {args.entrada} (cuarentena: {cuarentena})...")
+    resumen = importar_archivo(args.entrada, cuarentena, args.bloque)
+    if resumen["cuarentena"]:
+        logger.warning(f"⚠️ {resumen['cuarentena']:,} filas rechazadas; revise {cuarentena}")
+    if resumen["importadas"]:
+        logger.info("💡 Ejecute scripts/precalcular_recomendaciones.py para incluir a los nuevos inquilinos")
+
+if __name__ == "__main__":
+    main()
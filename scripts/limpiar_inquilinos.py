@@ -1,10 +1,15 @@
 import sys
 import os
+import time
+import argparse
 import logging
 
 # 👇 Agregar la raíz del proyecto al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from pymongo import UpdateMany
+from pymongo.errors import OperationFailure
+
 from app.core.database import db_manager
 
 logging.basicConfig(level=logging.INFO)
@@ -26,32 +31,154 @@ DEFAULTS = {
     "rol": "inquilino"
 }
 
-def limpiar_inquilinos():
+# Valores considerados vacíos (None también cubre campos faltantes en Mongo)
+VALORES_VACIOS = [None, "", "null", "None"]
+
+
+def _es_vacio(campo):
+    """Expresión de agregación: True si el campo falta o tiene un valor vacío"""
+    return {"$in": [{"$ifNull": [f"${campo}", None]}, VALORES_VACIOS]}
+
+
+def _filtro_documentos_sucios():
+    """Filtro que selecciona solo documentos con al menos un campo a corregir"""
+    return {"$or": [{campo: {"$in": VALORES_VACIOS}} for campo in DEFAULTS]}
+
+
+def _pipeline_limpieza():
+    """Update con pipeline: aplica DEFAULTS en el servidor con lógica tipo $ifNull"""
+    cambios = {
+        campo: {"$cond": [_es_vacio(campo), valor_def, f"${campo}"]}
+        for campo, valor_def in DEFAULTS.items()
+    }
+    # Marca de modificación para la sincronización incremental
+    cambios["updated_at"] = "$$NOW"
+    return [{"$set": cambios}]
+
+
+def contar_campos_sucios(collection):
+    """
+    Cuenta en una sola agregación los documentos sucios y los campos
+    a corregir por cada clave de DEFAULTS.
+    """
+    grupo = {"_id": None, "documentos": {"$sum": 1}}
+    for campo in DEFAULTS:
+        grupo[campo] = {"$sum": {"$cond": [_es_vacio(campo), 1, 0]}}
+
+    resultado = list(collection.aggregate([
+        {"$match": _filtro_documentos_sucios()},
+        {"$group": grupo},
+    ]))
+    if not resultado:
+        return 0, {campo: 0 for campo in DEFAULTS}
+
+    conteo = resultado[0]
+    return conteo["documentos"], {campo: conteo[campo] for campo in DEFAULTS}
+
+
+def _contar_campos_sucios_generico(coleccion):
+    """Conteo equivalente para backends sin pipelines de agregación (SQLite embebido)"""
+    documentos = coleccion.contar(_filtro_documentos_sucios())
+    campos = {campo: coleccion.contar({campo: {"$in": VALORES_VACIOS}}) for campo in DEFAULTS}
+    return documentos, campos
+
+
+def _limpiar_generico(coleccion):
+    """Un actualizar_muchos por campo a través de la interfaz de almacenamiento"""
+    return sum(
+        coleccion.actualizar_muchos(
+            {campo: {"$in": VALORES_VACIOS}},
+            {"$set": {campo: valor_def}, "$currentDate": {"updated_at": True}},
+        )
+        for campo, valor_def in DEFAULTS.items()
+    )
+
+
+def _limpiar_con_pipeline(collection):
+    """Un único update_many con pipeline (MongoDB >= 4.2). Devuelve documentos modificados"""
+    resultado = collection.update_many(_filtro_documentos_sucios(), _pipeline_limpieza())
+    return resultado.modified_count
+
+
+def _limpiar_con_bulk(collection):
+    """
+    Fallback para servidores sin updates con pipeline: un UpdateMany por campo,
+    enviados juntos en un solo bulk_write desordenado. Devuelve campos modificados.
+    """
+    operaciones = [
+        UpdateMany(
+            {campo: {"$in": VALORES_VACIOS}},
+            {"$set": {campo: valor_def}, "$currentDate": {"updated_at": True}},
+        )
+        for campo, valor_def in DEFAULTS.items()
+    ]
+    resultado = collection.bulk_write(operaciones, ordered=False)
+    return resultado.modified_count
+
+
+def limpiar_inquilinos(dry_run=False, modo="pipeline"):
     """
-    Analiza todos los documentos en MongoDB e inserta valores por defecto
-    donde encuentre null o campos faltantes.
+    Inserta valores por defecto donde haya null o campos faltantes,
+    resolviendo todo del lado del servidor (sin traer documentos a Python).
     """
+    # pymongo directo si el backend es Mongo; si no, la interfaz genérica
     collection = db_manager.inquilinos_collection
-    inquilinos = list(collection.find({}))
+    inicio = time.perf_counter()
+
+    # Documentos sin updated_at: la sincronización incremental solo filtra por ese campo
+    sin_marca = db_manager.inquilinos.contar({"updated_at": None})
+    if sin_marca:
+        logger.info(f"🕒 {sin_marca} inquilinos sin updated_at")
+        if not dry_run:
+            db_manager.completar_updated_at()
 
-    logger.info(f"🔎 Analizando {len(inquilinos)} inquilinos...")
+    if collection is not None:
+        documentos, campos = contar_campos_sucios(collection)
+    else:
+        documentos, campos = _contar_campos_sucios_generico(db_manager.inquilinos)
+    total_campos_corregidos = sum(campos.values())
+    logger.info(f"🔎 {documentos} inquilinos con campos a corregir ({total_campos_corregidos} campos)")
+    for campo, cantidad in campos.items():
+        if cantidad:
+            logger.info(f"   • {campo}: {cantidad}")
 
-    total_campos_corregidos = 0
-    actualizados = 0
+    if dry_run or documentos == 0:
+        logger.info("🧪 Dry-run: no se modificó ningún documento" if dry_run else "✨ Nada que limpiar")
+        return {"documentos": documentos, "campos": campos, "actualizados": 0, "unidad": "inquilinos"}
 
-    for inq in inquilinos:
-        cambios = {}
-        for campo, valor_def in DEFAULTS.items():
-            if campo not in inq or inq[campo] in (None, "", "null", "None"):
-                cambios[campo] = valor_def
-        if cambios:
-            collection.update_one({"_id": inq["_id"]}, {"$set": cambios})
-            actualizados += 1
-            total_campos_corregidos += len(cambios)
-            logger.info(f"✅ Inquilino {inq.get('id_inquilino')} actualizado con {cambios}")
+    # El pipeline cuenta inquilinos modificados; bulk y genérico, campos (un update por campo)
+    unidad = "campos"
+    if collection is None:
+        actualizados = _limpiar_generico(db_manager.inquilinos)
+    elif modo == "pipeline":
+        try:
+            actualizados, unidad = _limpiar_con_pipeline(collection), "inquilinos"
+        except OperationFailure as e:
+            logger.warning(f"⚠️ Update con pipeline no soportado ({e}); usando bulk_write")
+            actualizados = _limpiar_con_bulk(collection)
+    else:
+        actualizados = _limpiar_con_bulk(collection)
 
-    logger.info(f"✨ Limpieza completada. {actualizados} inquilinos actualizados.")
+    duracion = time.perf_counter() - inicio
+    throughput = documentos / duracion if duracion > 0 else float(documentos)
+
+    logger.info(f"✨ Limpieza completada. {actualizados} {unidad} actualizados.")
     logger.info(f"📊 Total de campos corregidos: {total_campos_corregidos}")
+    logger.info(f"⏱️ {duracion:.2f}s ({throughput:,.0f} inquilinos/s)")
+
+    return {"documentos": documentos, "campos": campos, "actualizados": actualizados, "unidad": unidad}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Limpieza masiva de inquilinos en MongoDB")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Solo contar documentos y campos a corregir")
+    parser.add_argument("--modo", choices=["pipeline", "bulk"], default="pipeline",
+                        help="pipeline: un update_many con agregación; bulk: un UpdateMany por campo")
+    args = parser.parse_args()
+
+    limpiar_inquilinos(dry_run=args.dry_run, modo=args.modo)
+
 
 if __name__ == "__main__":
-    limpiar_inquilinos()
+    main()
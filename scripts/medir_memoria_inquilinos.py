@@ -0,0 +1,79 @@
+# scripts/medir_memoria_inquilinos.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.core.almacen_inquilinos import CAMPOS_CATEGORICOS, AlmacenInquilinos
+from app.core.inquilino_schema import TABLA_CATEGORIAS, generar_inquilinos_demo
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("medir_memoria_inquilinos")
+
+
+def _mb(n_bytes):
+    return n_bytes / 1024 ** 2
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara la memoria del DataFrame de documentos con la del AlmacenInquilinos compacto"
+    )
+    parser.add_argument("--inquilinos", type=int, default=1_000_000)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    # DataFrame como el que se arma con los documentos de la BD (columnas object)
+    inicio = time.perf_counter()
+    df = generar_inquilinos_demo(args.inquilinos, args.semilla)
+    df.insert(0, "id_inquilino", np.arange(1, len(df) + 1))
+    df["rol"] = "inquilino"
+    df["created_at"] = df["updated_at"] = datetime.utcnow()
+    logger.info(f"🧪 {len(df):,} inquilinos demo generados en {time.perf_counter() - inicio:.1f}s")
+
+    inicio = time.perf_counter()
+    almacen = AlmacenInquilinos.desde_df(df)
+    logger.info(f"🏗️ Almacén construido en {time.perf_counter() - inicio:.1f}s")
+
+    # La vista no copia: sus códigos son los mismos arreglos del almacén
+    inicio = time.perf_counter()
+    vista = almacen.vista()
+    ms_vista = (time.perf_counter() - inicio) * 1000
+    sin_copia = all(np.shares_memory(vista[c].cat.codes.to_numpy(), almacen.columnas[c]) for c in CAMPOS_CATEGORICOS)
+    for campo in CAMPOS_CATEGORICOS:
+        esperado = TABLA_CATEGORIAS.codificar(campo, df[campo])
+        if not np.array_equal(vista[campo].cat.codes.to_numpy(), esperado):
+            raise ValueError(f"La vista no coincide con los datos en {campo}")
+
+    ids = np.random.default_rng(args.semilla).integers(1, len(df) + 1, 100_000)
+    inicio = time.perf_counter()
+    almacen.posiciones(ids)
+    us_busqueda = (time.perf_counter() - inicio) * 1e6 / len(ids)
+
+    memoria = almacen.memoria()
+    actual = int(df.memory_usage(index=True, deep=True).sum())
+    compacto = memoria["columnas"] + memoria["indice"]
+    filas = [
+        ("DataFrame de documentos (object)", actual),
+        ("Almacén: columnas + índice", compacto),
+        ("Tabla lateral (si se carga)", memoria["laterales"]),
+        ("Almacén + tabla lateral", compacto + memoria["laterales"]),
+    ]
+
+    print(f"\n📦 MEMORIA CON {len(df):,} INQUILINOS")
+    print(f"{'representación':<34}{'MB':>10}{'bytes/inq':>12}")
+    for nombre, n_bytes in filas:
+        print(f"{nombre:<34}{_mb(n_bytes):>10.1f}{n_bytes / len(df):>12.1f}")
+    print(f"\n📉 Columnas compactas: {actual / compacto:.0f}x menos que el DataFrame de documentos")
+    print(f"👁️ vista() en {ms_vista:.2f} ms · sin copia: {'sí' if sin_copia else 'no'}")
+    print(f"🔎 id → fila: {us_busqueda:.3f} µs por id (lote de {len(ids):,})")
+
+
+if __name__ == "__main__":
+    main()
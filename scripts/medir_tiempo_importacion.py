@@ -0,0 +1,85 @@
+# scripts/medir_tiempo_importacion.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import logging
+import statistics
+import subprocess
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("medir_tiempo_importacion")
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Puntos de arranque: módulos que se importan y archivos que se cargan sin ejecutar su main()
+OBJETIVOS = {
+    "main.py": "runpy.run_path('main.py')",
+    "app.core.ia_engine": "import app.core.ia_engine",
+    "app.core.recomendaciones": "import app.core.recomendaciones",
+    "app.core.trabajos": "import app.core.trabajos",
+    "scripts/limpiar_inquilinos.py": "runpy.run_path('scripts/limpiar_inquilinos.py')",
+    "scripts/entrenar_modelo.py": "runpy.run_path('scripts/entrenar_modelo.py')",
+}
+
+# Dependencias que solo deben cargarse al usarse (entrenar, explicar, graficar).
+# Streamlit ya importa plotly.graph_objects para su tema; plotly.express no
+PESADAS = ["sklearn", "shap", "fairlearn", "plotly.express", "matplotlib"]
+
+_MEDICION = """
+import json, runpy, sys, time
+inicio = time.perf_counter()
+{codigo}
+segundos = time.perf_counter() - inicio
+print(json.dumps({{"segundos": segundos, "pesadas": [m for m in {pesadas!r} if m in sys.modules]}}))
+"""
+
+
+def medir(codigo):
+    """Importa en un intérprete nuevo (sin caché de módulos). Devuelve (segundos, pesadas cargadas)"""
+    resultado = subprocess.run(
+        [sys.executable, "-c", _MEDICION.format(codigo=codigo, pesadas=PESADAS)],
+        cwd=RAIZ, capture_output=True, text=True, timeout=120,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+    datos = json.loads(resultado.stdout.strip().splitlines()[-1])
+    return datos["segundos"], datos["pesadas"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mide el tiempo de importación de la app y los scripts; falla si supera el presupuesto"
+    )
+    parser.add_argument("--presupuesto", type=float, default=1.5, help="segundos máximos por objetivo (mediana)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--objetivo", action="append", choices=list(OBJETIVOS), help="medir solo estos objetivos")
+    args = parser.parse_args()
+
+    fallos = []
+    print(f"\n⏱️ TIEMPO DE IMPORTACIÓN (mediana de {args.repeticiones}, presupuesto {args.presupuesto:.2f}s)")
+    print(f"{'objetivo':<32}{'segundos':>10}  dependencias pesadas")
+    for nombre in args.objetivo or OBJETIVOS:
+        mediciones = [medir(OBJETIVOS[nombre]) for _ in range(args.repeticiones)]
+        segundos = statistics.median(m[0] for m in mediciones)
+        pesadas = sorted({p for m in mediciones for p in m[1]})
+        estado = "✅"
+        if segundos > args.presupuesto:
+            fallos.append(f"{nombre}: {segundos:.2f}s > {args.presupuesto:.2f}s")
+            estado = "❌"
+        if pesadas:
+            fallos.append(f"{nombre}: importa {', '.join(pesadas)} al arrancar")
+            estado = "❌"
+        print(f"{nombre:<32}{segundos:>10.2f}  {', '.join(pesadas) or '-'} {estado}")
+
+    if fallos:
+        for fallo in fallos:
+            logger.error(f"❌ {fallo}")
+        sys.exit(1)
+    logger.info("✅ Arranque dentro del presupuesto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# scripts/precalcular_recomendaciones.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+from app.core.recomendaciones import precalcular_recomendaciones
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("precalcular_recomendaciones")
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula el top-K de matches de cada inquilino")
+    parser.add_argument("--k", type=int, default=None, help="Matches por inquilino (RECOMENDACIONES_TOP_K)")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos trabajadores (MAX_WORKERS)")
+    args = parser.parse_args()
+
+    logger.info("🏆 Precalculando recomendaciones con el modelo guardado...")
+    resumen = precalcular_recomendaciones(
+        k=args.k,
+        procesos=args.procesos,
+        progreso=lambda etapa, fraccion: logger.info(f"⏱️ {etapa}: {fraccion:.0%}"),
+    )
+    logger.info(f"✅ Recomendaciones guardadas: {resumen}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# scripts/prueba_carga_api.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import http.client
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("prueba_carga_api")
+
+_local = threading.local()
+
+def _conexion(url):
+    """Una conexión persistente por hilo cliente"""
+    if getattr(_local, "conexion", None) is None:
+        _local.conexion = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    return _local.conexion
+
+def _get(url, ruta):
+    conexion = _conexion(url)
+    try:
+        conexion.request("GET", ruta)
+        respuesta = conexion.getresponse()
+        cuerpo = respuesta.read()
+        return respuesta.status, cuerpo
+    except (http.client.HTTPException, OSError):
+        _local.conexion = None
+        conexion.close()
+        raise
+
+def _ruta_aleatoria(tipo, max_id, k):
+    if tipo == "matches":
+        return f"/matches?id={random.randint(1, max_id)}&k={k}"
+    id1, id2 = random.sample(range(1, max_id + 1), 2)
+    return f"/compatibilidad?id1={id1}&id2={id2}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga local de la API de puntuación")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--ruta", choices=["compatibilidad", "matches"], default="compatibilidad")
+    parser.add_argument("--solicitudes", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    url = urlparse(args.url)
+
+    estado, cuerpo = _get(url, "/salud")
+    salud = json.loads(cuerpo)
+    logger.info(f"🩺 {salud}")
+    max_id = max(2, salud["inquilinos"])
+
+    latencias, codigos = [], Counter()
+    lock = threading.Lock()
+
+    def una_solicitud(_):
+        inicio = time.perf_counter()
+        try:
+            codigo, _ = _get(url, _ruta_aleatoria(args.ruta, max_id, args.k))
+        except Exception:
+            codigo = "error"
+        with lock:
+            latencias.append(time.perf_counter() - inicio)
+            codigos[codigo] += 1
+
+    logger.info(f"🚀 {args.solicitudes} solicitudes a /{args.ruta} con concurrencia {args.concurrencia}...")
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+        list(pool.map(una_solicitud, range(args.solicitudes)))
+    total = time.perf_counter() - inicio
+
+    latencias_ms = np.array(latencias) * 1000
+    logger.info(f"✅ {args.solicitudes / total:.1f} solicitudes/s en {total:.2f}s · códigos {dict(codigos)}")
+    logger.info(f"⏱️ Cliente: p50 {np.percentile(latencias_ms, 50):.2f} ms · p99 {np.percentile(latencias_ms, 99):.2f} ms")
+    _, cuerpo = _get(url, "/metricas")
+    logger.info(f"📊 Servidor: {json.loads(cuerpo)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# scripts/puntuar_pares.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+from app.core.config import config
+from app.core.puntuacion_masiva import puntuar_archivo
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("puntuar_pares")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Puntúa pares de inquilinos (id1,id2 o perfil1_*/perfil2_*) desde CSV/JSONL/Parquet"
+    )
+    parser.add_argument("entrada", help="Archivo de pares (.csv, .jsonl, .parquet)")
+    parser.add_argument("salida", help="Archivo de resultados (.csv o .jsonl)")
+    parser.add_argument("--bloque", type=int, default=50000, help="Filas por bloque")
+    parser.add_argument("--procesos", type=int, default=config.MAX_WORKERS)
+    parser.add_argument("--desde-cero", action="store_true",
+                        help="Ignora el checkpoint y reescribe la salida")
+    args = parser.parse_args()
+
+    logger.info(f"🚀 Puntuando {args.entrada} → {args.salida} ({args.procesos} procesos)")
+    puntuar_archivo(args.entrada, args.salida, args.bloque, args.procesos, reanudar=not args.desde_cero)
+
+if __name__ == "__main__":
+    main()
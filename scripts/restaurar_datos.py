@@ -0,0 +1,27 @@
+# scripts/restaurar_datos.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+from app.core.config import config
+from app.core.exportacion import restaurar_inquilinos
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("restaurar_datos")
+
+def main():
+    parser = argparse.ArgumentParser(description="Restaura una exportación de inquilinos (scripts/exportar_datos.py)")
+    parser.add_argument("origen", help="Directorio con manifiesto.json y las partes")
+    parser.add_argument("--procesos", type=int, default=config.MAX_WORKERS, help="Partes insertadas en paralelo")
+    parser.add_argument("--limpiar", action="store_true", help="Vacía la colección antes de restaurar")
+    parser.add_argument("--sin-verificar", action="store_true", help="Omite la comprobación final del contenido")
+    args = parser.parse_args()
+
+    resumen = restaurar_inquilinos(args.origen, args.procesos, args.limpiar, not args.sin_verificar)
+    if resumen.get("verificado") is False:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# scripts/servidor_api.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import logging
+from app.core.config import config
+from app.core.servicio_api import ServicioAPI, crear_servidor
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("servidor_api")
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP de puntuación de compatibilidad")
+    parser.add_argument("--host", default=config.API_HOST)
+    parser.add_argument("--puerto", type=int, default=config.API_PORT)
+    parser.add_argument("--ventana-ms", type=float, default=config.API_VENTANA_LOTE_MS,
+                        help="Espera máxima para agrupar solicitudes en un lote")
+    parser.add_argument("--max-lote", type=int, default=config.API_MAX_LOTE)
+    args = parser.parse_args()
+
+    servicio = ServicioAPI(ventana_ms=args.ventana_ms, max_lote=args.max_lote)
+    if not servicio.motor.is_trained:
+        logger.warning("⚠️ Modelo sin entrenar: las rutas de puntuación responderán 503")
+    servidor = crear_servidor(servicio, args.host, args.puerto)
+    logger.info(f"🌐 API escuchando en http://{args.host}:{args.puerto} "
+                f"(ventana {args.ventana_ms} ms, lote máx. {args.max_lote})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Deteniendo API...")
+    finally:
+        servidor.server_close()
+
+if __name__ == "__main__":
+    main()